@@ -0,0 +1,140 @@
+# backend/aggregation.py - Single-pass aggregation engine shared by plot rendering and the JSON series endpoint
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from downsampling import downsample_series
+from metrics import phase
+from plot_cache import DEFAULT_MAX_POINTS
+
+STAT_MODES = ("Sum", "Mean", "Median", "Mode")
+HISTOGRAM_BINS = 20
+
+
+def _to_json_values(values) -> List[Any]:
+    """Convert a numpy/pandas sequence to plain Python values, mapping NaN to None"""
+    return [None if isinstance(v, float) and np.isnan(v) else v for v in np.asarray(values).tolist()]
+
+
+def _grouped_mode(df: pd.DataFrame, keys: List[str], y_axis: str) -> pd.Series:
+    """Most frequent y per group (smallest value wins ties), computed with one groupby over keys + y"""
+    counts = df.groupby(keys + [y_axis], observed=True, sort=False).size().rename("_count").reset_index()
+    counts = counts.sort_values(["_count", y_axis], ascending=[False, True], kind="mergesort")
+    modes = counts.drop_duplicates(subset=keys, keep="first").set_index(keys)[y_axis]
+    return modes.sort_index()
+
+
+def aggregate_xy(df: pd.DataFrame, x_axis: str, y_axis: str, legend_attr: Optional[str] = None,
+                 stat_mode: str = "Sum") -> pd.Series:
+    """Aggregate y per x (and per legend value) in a single groupby pass.
+
+    Returns a Series indexed by x, or by (x, legend) when a legend is given.
+    """
+    if stat_mode not in STAT_MODES:
+        raise ValueError(f"Unsupported stat_mode '{stat_mode}', expected one of {list(STAT_MODES)}")
+    keys = [x_axis, legend_attr] if legend_attr else [x_axis]
+    if stat_mode == "Mode":
+        return _grouped_mode(df, keys, y_axis)
+    grouped = df.groupby(keys, observed=True, sort=True)[y_axis]
+    return getattr(grouped, stat_mode.lower())()
+
+
+def _xy_series(df: pd.DataFrame, x_axis: str, y_axis: str, legend_attr: Optional[str], stat_mode: str) -> List[Dict[str, Any]]:
+    """Aggregated x/y arrays per legend value; converted to JSON values by the caller"""
+    agg = aggregate_xy(df, x_axis, y_axis, legend_attr, stat_mode)
+    if not legend_attr:
+        return [{"name": y_axis, "x": agg.index, "y": agg.values}]
+    # Split the aggregated result (not the raw rows) by legend value
+    agg = agg.sort_index(level=[1, 0])
+    legend_codes, legend_values = pd.factorize(agg.index.get_level_values(1), sort=True)
+    boundaries = np.flatnonzero(np.diff(legend_codes)) + 1
+    x_values = agg.index.get_level_values(0)
+    series = []
+    for code, (start, stop) in enumerate(zip(np.r_[0, boundaries], np.r_[boundaries, len(agg)])):
+        series.append({
+            "name": str(legend_values[code]),
+            "x": x_values[start:stop],
+            "y": agg.values[start:stop],
+        })
+    return series
+
+
+def _histogram_series(df: pd.DataFrame, y_axis: str, legend_attr: Optional[str], bins: int) -> Dict[str, Any]:
+    """Histogram counts for every legend value at once, over shared bin edges"""
+    y = pd.to_numeric(df[y_axis], errors="coerce").to_numpy(dtype=float)
+    valid = ~np.isnan(y)
+    edges = np.histogram_bin_edges(y[valid], bins=bins) if valid.any() else np.linspace(0, 1, bins + 1)
+    bin_index = np.clip(np.searchsorted(edges, y, side="right") - 1, 0, bins - 1)
+    if legend_attr:
+        codes, legend_values = pd.factorize(df[legend_attr], sort=True)
+        valid &= codes >= 0
+    else:
+        codes, legend_values = np.zeros(len(y), dtype=np.int64), [y_axis]
+    flat = codes[valid] * bins + bin_index[valid]
+    counts = np.bincount(flat, minlength=len(legend_values) * bins).reshape(len(legend_values), bins)
+    return {
+        "bin_edges": edges.tolist(),
+        "series": [{"name": str(name), "counts": counts[i].tolist()} for i, name in enumerate(legend_values)],
+    }
+
+
+def _box_stats(df: pd.DataFrame, y_axis: str) -> Dict[str, Any]:
+    """Tukey box-plot statistics (1.5 IQR whiskers) for the y column"""
+    y = pd.to_numeric(df[y_axis], errors="coerce").dropna().to_numpy(dtype=float)
+    if len(y) == 0:
+        raise ValueError(f"Column '{y_axis}' has no numeric values")
+    q1, med, q3 = np.percentile(y, [25, 50, 75])
+    iqr = q3 - q1
+    inside = y[(y >= q1 - 1.5 * iqr) & (y <= q3 + 1.5 * iqr)]
+    return {
+        "label": y_axis,
+        "q1": float(q1),
+        "med": float(med),
+        "q3": float(q3),
+        "mean": float(y.mean()),
+        "whislo": float(inside.min()),
+        "whishi": float(inside.max()),
+        "fliers": y[(y < inside.min()) | (y > inside.max())].tolist(),
+    }
+
+
+def aggregate_series(df: pd.DataFrame, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute everything needed to draw a plot as compact, JSON-serializable series"""
+    with phase("groupby"):
+        return _aggregate_series(df, config)
+
+
+def _aggregate_series(df: pd.DataFrame, config: Dict[str, Any]) -> Dict[str, Any]:
+    x_axis = config["x_axis"]
+    y_axis = config["y_axis"]
+    graph_type = config.get("graph_type") or "Line"
+    legend_attr = config.get("legend_attr")
+    stat_mode = config.get("stat_mode") or "Sum"
+    max_points = config.get("max_points", DEFAULT_MAX_POINTS)
+    if legend_attr not in df.columns:
+        legend_attr = None
+
+    result = {
+        "graph_type": graph_type,
+        "x_axis": x_axis,
+        "y_axis": y_axis,
+        "legend_attr": legend_attr,
+        "stat_mode": stat_mode,
+    }
+    if graph_type in ("Line", "Scatter", "Bar"):
+        series = _xy_series(df, x_axis, y_axis, legend_attr, stat_mode)
+        # Bounded before any JSON conversion, so render time and payload no longer grow with the x cardinality
+        result["downsampling"] = downsample_series(series, graph_type, max_points)
+        for s in series:
+            for field in ("x", "y", "counts"):
+                if field in s:
+                    s[field] = _to_json_values(s[field])
+        result["series"] = series
+    elif graph_type == "Histogram":
+        result.update(_histogram_series(df, y_axis, legend_attr, HISTOGRAM_BINS))
+    elif graph_type == "Box":
+        result["box"] = _box_stats(df, y_axis)
+    else:
+        raise ValueError(f"Unsupported graph_type '{graph_type}'")
+    return result
@@ -0,0 +1,351 @@
+# backend/benchmark.py - Micro-benchmarks of the heavy code paths plus a concurrent load run against the API,
+# with OpenRouter replaced by openrouter_stub.py; results are written as JSON to diff between commits
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_CSV = os.path.join(BACKEND_DIR, "..", "frontend", "src", "assets", "workout_fitness_tracker_data.csv")
+DEFAULT_DATA_DIR = os.path.join(BACKEND_DIR, "benchmark_data")
+DEFAULT_RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmark_results")
+
+# One config per graph type, all on columns of the sample dataset
+PLOT_CONFIGS = {
+    "Line": {"x_axis": "Age", "y_axis": "Calories Burned", "legend_attr": "Gender", "stat_mode": "Mean"},
+    "Scatter": {"x_axis": "Weight (kg)", "y_axis": "Calories Burned", "stat_mode": "Mean"},
+    "Bar": {"x_axis": "Workout Type", "y_axis": "Calories Burned", "stat_mode": "Sum"},
+    "Histogram": {"x_axis": "Workout Type", "y_axis": "Heart Rate (bpm)", "legend_attr": "Gender"},
+    "Box": {"x_axis": "Workout Type", "y_axis": "Workout Duration (mins)"},
+}
+EXERCISES = ["Jogging", "Cycling", "HIIT", "Cardio", "Yoga", "Weight Lifting", "Swimming"]
+ACTIVITY_LEVELS = ["Sedentary", "Lightly active", "Moderately active", "Very active", "Super active"]
+
+
+def summarize(samples_s: List[float], wall_s: Optional[float] = None, errors: int = 0) -> Dict[str, Any]:
+    """Latency percentiles in milliseconds; throughput is per wall-clock second when calls overlapped"""
+    ordered = sorted(samples_s)
+    count = len(ordered)
+
+    def percentile(q: float) -> float:
+        # Nearest-rank, so p99 of a small sample is an observed latency rather than an interpolation
+        return ordered[min(count - 1, max(0, math.ceil(q / 100 * count) - 1))] * 1000
+
+    total = wall_s if wall_s is not None else sum(ordered)
+    return {
+        "count": count,
+        "errors": errors,
+        "p50_ms": round(percentile(50), 3) if count else None,
+        "p99_ms": round(percentile(99), 3) if count else None,
+        "mean_ms": round(sum(ordered) / count * 1000, 3) if count else None,
+        "min_ms": round(ordered[0] * 1000, 3) if count else None,
+        "max_ms": round(ordered[-1] * 1000, 3) if count else None,
+        "throughput_per_s": round(count / total, 2) if total else None,
+    }
+
+
+def time_calls(call: Callable[[], Any], repeat: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        call()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def scaled_dataset(rows: int, data_dir: str) -> str:
+    """The sample CSV repeated up to rows rows (with unique user IDs), written once and reused across runs"""
+    path = os.path.join(data_dir, f"workouts_{rows}.csv")
+    if os.path.exists(path):
+        return path
+    import numpy as np
+    import pandas as pd
+    sample = pd.read_csv(SAMPLE_CSV)
+    scaled = sample.iloc[np.resize(np.arange(len(sample)), rows)].reset_index(drop=True)
+    scaled["User ID"] = np.arange(1, rows + 1)
+    os.makedirs(data_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    scaled.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def weight_request(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "age": rng.randint(18, 70), "height_cm": rng.randint(150, 200), "weight_kg": round(rng.uniform(50, 120), 1),
+        "activity_level": rng.choice(ACTIVITY_LEVELS), "gender": rng.choice(["Male", "Female"]),
+        "goal_type": rng.choice(["lose", "maintain", "gain"]),
+    }
+
+
+def calorie_request(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "gender": rng.choice(["Male", "Female"]), "weight_kg": round(rng.uniform(50, 120), 1), "age": rng.randint(18, 70),
+        "duration_mins": rng.randint(15, 120), "exercise_type": rng.choice(EXERCISES),
+        "intensity": "Moderate Effort", "heart_rate": rng.choice([None, rng.randint(100, 180)]),
+        "swimming_style": "Freestyle (moderate)",
+    }
+
+
+def run_micro(csv_path: str, args) -> Dict[str, Dict[str, Any]]:
+    """Call the endpoint handlers and the code behind them in-process, without HTTP in between"""
+    import main
+    from plot_cache import normalize_plot_config
+    rng = random.Random(args.seed)
+    results = {}
+    loop = asyncio.new_event_loop()
+
+    def handler_samples(handler, model, payloads) -> List[float]:
+        requests = [model(**payload) for payload in payloads]
+
+        async def timed():
+            await handler(requests[0])
+            samples = []
+            for request in requests:
+                started = time.perf_counter()
+                await handler(request)
+                samples.append(time.perf_counter() - started)
+            return samples
+
+        return loop.run_until_complete(timed())
+
+    try:
+        results["predict_weight"] = summarize(handler_samples(
+            main.predict_weight, main.WeightPredictionRequest, [weight_request(rng) for _ in range(args.light_repeat)]))
+        results["calculate_calories"] = summarize(handler_samples(
+            main.calculate_calories, main.CalorieCalculationRequest, [calorie_request(rng) for _ in range(args.light_repeat)]))
+    finally:
+        loop.close()
+
+    def parse():
+        with open(csv_path, 'rb') as f:
+            return main.ingest.read_csv_upload(f)
+
+    results["csv_parse"] = summarize(time_calls(parse, args.heavy_repeat, warmup=0))
+    df = parse()
+    # What generate_plot runs on a cache miss, minus the worker-process hop
+    for graph_type, config in PLOT_CONFIGS.items():
+        config = normalize_plot_config({**config, "graph_type": graph_type})
+        main.validate_plot_config(df, config)
+        results[f"generate_plot[{graph_type}]"] = summarize(
+            time_calls(lambda: main.plotting.render_plot(df, config), args.heavy_repeat))
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url: str, process: subprocess.Popen, timeout_s: float = 60.0):
+    import httpx
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout_s:.0f}s")
+
+
+async def load_scenario(client, requests: List[Callable], concurrency: int) -> Dict[str, Any]:
+    """Issue the requests with at most concurrency in flight; each callable sends one and returns True on success"""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples, errors = [], 0
+
+    async def one(send):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                ok = await send(client)
+            except Exception:
+                ok = False
+            samples.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(send) for send in requests))
+    return {"concurrency": concurrency, **summarize(samples, time.perf_counter() - started, errors)}
+
+
+async def run_load_scenarios(base_url: str, csv_path: str, args) -> Dict[str, Dict[str, Any]]:
+    import httpx
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300.0) as client:
+        with open(csv_path, 'rb') as f:
+            upload = await client.post("/api/datasets", files={"file": (os.path.basename(csv_path), f, "text/csv")})
+        upload.raise_for_status()
+        dataset_id = upload.json()["dataset_id"]
+
+        def post_json(path: str, payload: Dict[str, Any], check: Callable[[Any], bool] = lambda body: True):
+            async def send(c):
+                response = await c.post(path, json=payload)
+                return response.status_code == 200 and check(response.json())
+            return send
+
+        def get(path: str, params: Dict[str, Any]):
+            async def send(c):
+                return (await c.get(path, params=params)).status_code == 200
+            return send
+
+        plot_params = [
+            {"dataset_id": dataset_id, "graph_type": graph_type, **{k: v for k, v in config.items() if v is not None}}
+            for graph_type, config in PLOT_CONFIGS.items()
+        ]
+        scenarios = {
+            "predict_weight": [post_json("/api/predict-weight", weight_request(rng)) for _ in range(args.requests)],
+            "calculate_calories": [post_json("/api/calculate-calories", calorie_request(rng)) for _ in range(args.requests)],
+            # After the first request per graph type these are rendered-plot cache hits
+            "generate_plot": [get("/api/generate-plot/image", plot_params[i % len(plot_params)]) for i in range(args.requests)],
+            # Distinct prompts, so every request waits on the stub instead of the LLM cache
+            "ai_insights": [
+                post_json("/api/ai-insights", {"prompt": f"Benchmark prompt {i}"},
+                          lambda body: "insights" in body and not body["insights"].startswith("❌"))
+                for i in range(args.requests)
+            ],
+        }
+        results = {}
+        for name, requests in scenarios.items():
+            results[name] = await load_scenario(client, requests, args.concurrency)
+    return results
+
+
+def run_load(csv_path: str, args) -> Dict[str, Dict[str, Any]]:
+    """Start the stub and the API (one uvicorn worker, private scratch storage) as subprocesses and load them"""
+    stub_port, api_port = free_port(), free_port()
+    processes = []
+    with tempfile.TemporaryDirectory(prefix="workout-bench-") as scratch:
+        env = {
+            **os.environ,
+            "OPENROUTER_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+            "OPENROUTER_API_KEY": "benchmark",
+            "DATASET_STORE_DIR": os.path.join(scratch, "datasets"),
+            "WORKOUT_DB_PATH": os.path.join(scratch, "workouts.db"),
+            "SHARED_STATE_PATH": os.path.join(scratch, "shared_state.db"),
+            "PREWARM_SUBSYSTEMS": "all",
+        }
+        try:
+            processes.append(subprocess.Popen(
+                [sys.executable, "openrouter_stub.py", "--port", str(stub_port), "--latency-ms", str(args.stub_latency_ms),
+                 "--jitter-ms", str(args.stub_jitter_ms), "--seed", str(args.seed)],
+                cwd=BACKEND_DIR, env=env,
+            ))
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(api_port), "--log-level", "warning"],
+                cwd=BACKEND_DIR, env=env,
+            ))
+            wait_for(f"http://127.0.0.1:{stub_port}/stats", processes[0])
+            wait_for(f"http://127.0.0.1:{api_port}/api/health", processes[1])
+            return asyncio.run(run_load_scenarios(f"http://127.0.0.1:{api_port}", csv_path, args))
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait(timeout=30)
+
+
+def environment() -> Dict[str, Any]:
+    def git(*command) -> str:
+        result = subprocess.run(["git", *command], cwd=BACKEND_DIR, capture_output=True, text=True)
+        return result.stdout.strip() if result.returncode == 0 else ""
+
+    versions = {}
+    for package in ("fastapi", "starlette", "uvicorn", "pandas", "numpy", "matplotlib", "httpx"):
+        try:
+            versions[package] = __import__(package).__version__
+        except ImportError:
+            versions[package] = None
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]):
+    """Print p50/p99 changes for every benchmark present in both result files"""
+    changed = sorted(k for k in current["settings"] if previous.get("settings", {}).get(k) != current["settings"][k])
+    if changed:
+        print(f"Warning: runs used different settings ({', '.join(changed)}), changes are not like for like")
+    print(f"{'benchmark':<34}{'p50 ms':>22}{'p99 ms':>24}")
+    for section in ("micro", "load"):
+        for name, now in current.get(section, {}).items():
+            before = previous.get(section, {}).get(name)
+            if not before:
+                continue
+            cells = []
+            for field in ("p50_ms", "p99_ms"):
+                old, new = before.get(field), now.get(field)
+                change = f"{(new - old) / old * 100:+6.1f}%" if old and new is not None else "    n/a"
+                cells.append(f"{old or 0:>9.2f} -> {new or 0:>9.2f} {change}")
+            print(f"{section + ':' + name:<34}{cells[0]:>22}  {cells[1]:>22}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the workout API and save the results as JSON")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows of the scaled-up sample dataset")
+    parser.add_argument("--only", choices=["micro", "load"], help="run just one of the two suites")
+    parser.add_argument("--light-repeat", type=int, default=200, help="calls per predict_weight/calculate_calories micro-benchmark")
+    parser.add_argument("--heavy-repeat", type=int, default=3, help="calls per CSV parse/plot micro-benchmark")
+    parser.add_argument("--requests", type=int, default=200, help="requests per load scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight during the load run")
+    parser.add_argument("--stub-latency-ms", type=float, default=200.0, help="OpenRouter stub response time")
+    parser.add_argument("--stub-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where the scaled dataset is cached")
+    parser.add_argument("--output", help=f"result file (default {DEFAULT_RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to print p50/p99 changes against")
+    args = parser.parse_args()
+
+    csv_path = scaled_dataset(args.rows, args.data_dir)
+    results = {"environment": environment(), "settings": {k: v for k, v in vars(args).items() if k not in ("output", "compare")}}
+    if args.only != "load":
+        # The in-process micro run must not touch the real dataset store or workout database
+        with tempfile.TemporaryDirectory(prefix="workout-bench-") as scratch:
+            os.environ.setdefault("DATASET_STORE_DIR", os.path.join(scratch, "datasets"))
+            os.environ.setdefault("WORKOUT_DB_PATH", os.path.join(scratch, "workouts.db"))
+            results["micro"] = run_micro(csv_path, args)
+    if args.only != "micro":
+        results["load"] = run_load(csv_path, args)
+
+    env = results["environment"]
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, f"{env['commit'] or 'unknown'}{'-dirty' if env['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    for section in ("micro", "load"):
+        for name, stats in results.get(section, {}).items():
+            print(f"{section + ':' + name:<34} p50 {stats['p50_ms']:>9.2f} ms  p99 {stats['p99_ms']:>9.2f} ms  "
+                  f"{stats['throughput_per_s']:>9.2f}/s  errors {stats['errors']}")
+    print(f"Results written to {output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
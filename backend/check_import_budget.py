@@ -0,0 +1,67 @@
+# backend/check_import_budget.py - Fails when importing the API exceeds its cold-start time or memory budget
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_BUDGET_S = float(os.getenv("IMPORT_BUDGET_S", "1.0"))
+IMPORT_BUDGET_RSS_MB = float(os.getenv("IMPORT_BUDGET_RSS_MB", "80"))
+# Subsystems that must stay unloaded until a request needs them
+LAZY_MODULES = ("pandas", "numpy", "matplotlib", "httpx", "seaborn")
+RUNS = 3
+
+PROBE = """
+import json, resource, sys, time
+
+def peak_rss_mb():
+    # ru_maxrss survives fork and exec on Linux, so it would report the parent's peak (e.g. pytest's);
+    # VmHWM belongs to this process image alone
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "import_s": elapsed,
+    "max_rss_mb": peak_rss_mb(),
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def measure() -> dict:
+    """Import main in a fresh interpreter, as a newly started worker would"""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    # Best of a few runs, so a cold disk cache on the first one does not fail the check
+    runs = [measure() for _ in range(RUNS)]
+    best = min(runs, key=lambda run: run["import_s"])
+    print(f"import main: {best['import_s']:.2f}s (budget {IMPORT_BUDGET_S:.2f}s), "
+          f"max RSS {best['max_rss_mb']:.0f} MB (budget {IMPORT_BUDGET_RSS_MB:.0f} MB)")
+    failures = []
+    if best["import_s"] > IMPORT_BUDGET_S:
+        failures.append(f"import took {best['import_s']:.2f}s")
+    if best["max_rss_mb"] > IMPORT_BUDGET_RSS_MB:
+        failures.append(f"RSS reached {best['max_rss_mb']:.0f} MB")
+    if best["loaded"]:
+        failures.append(f"eagerly imported {best['loaded']}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+# backend/cohort_index.py - Sorted per-cohort metric arrays answering "what percentile is this user" by binary search
+import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from rollup_cube import DERIVED_DIMENSIONS
+
+COHORT_METRICS = ("VO2 Max", "Resting Heart Rate (bpm)", "Body Fat (%)", "Steps Taken", "Calories Burned")
+COHORT_DIMENSIONS = ("Gender", "Age Band", "Workout Type")
+AGE_SOURCE, AGE_BINS, AGE_LABELS = DERIVED_DIMENSIONS["Age Band"]
+# Narrowest first; a user falls back to the next level while their cohort is smaller than min_cohort_size
+COHORT_LEVELS = (("Gender", "Age Band", "Workout Type"), ("Gender", "Age Band"), ("Gender",), ())
+
+CohortKey = Tuple[Optional[str], ...]
+
+
+def _key_part(value) -> str:
+    return str(value).strip().casefold()
+
+
+def merge_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Merge two sorted arrays in O(len(a) + len(b)), without re-sorting a"""
+    if not len(a):
+        return b
+    return np.insert(a, np.searchsorted(a, b, side='right'), b)
+
+
+def age_band(age: float) -> Optional[str]:
+    position = bisect_right(AGE_BINS, age) - 1
+    return AGE_LABELS[position] if 0 <= position < len(AGE_LABELS) else None
+
+
+class CohortIndex:
+    """For every cohort at every level of COHORT_LEVELS, each metric's values sorted once at build time.
+
+    A percentile is then two np.searchsorted calls. Appended rows are merged into the cohorts they
+    touch only, and the cohort map is swapped as a whole, so lookups never take a lock.
+    """
+
+    def __init__(self, df: pd.DataFrame, min_cohort_size: int = 30):
+        missing = [c for c in ("Gender", AGE_SOURCE) if c not in df.columns]
+        if missing:
+            raise ValueError(f"Cohorts need the columns {missing}")
+        self.metrics = [m for m in COHORT_METRICS if m in df.columns]
+        if not self.metrics:
+            raise ValueError(f"None of the cohort metrics {list(COHORT_METRICS)} is in the dataset")
+        self.has_workout_type = "Workout Type" in df.columns
+        self.min_cohort_size = min_cohort_size
+        # Sequence number of the last stored append merged into this index; replays hold log_lock
+        self.log_seq = 0
+        self.log_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.rows = len(df)
+        # Original spelling of each casefolded dimension value, for responses; swapped like the cohort map
+        self._cohorts, self._sizes, self._labels = self._build(df)
+
+    def missing_columns(self, df: pd.DataFrame) -> List[str]:
+        required = ["Gender", AGE_SOURCE] + (["Workout Type"] if self.has_workout_type else [])
+        return [c for c in required if c not in df.columns]
+
+    def _build(
+        self, df: pd.DataFrame
+    ) -> Tuple[Dict[CohortKey, Dict[str, np.ndarray]], Dict[CohortKey, int], Dict[str, str]]:
+        frame = pd.DataFrame({
+            "Gender": df["Gender"].astype(str).map(_key_part),
+            "Age Band": pd.cut(df[AGE_SOURCE], bins=AGE_BINS, labels=AGE_LABELS, right=False).astype(str),
+            "Workout Type": df["Workout Type"].astype(str).map(_key_part) if self.has_workout_type else "",
+        })
+        labels = {}
+        for column in ("Gender", "Workout Type"):
+            if column in df.columns:
+                labels.update(zip(frame[column], df[column].astype(str).str.strip()))
+        values = {
+            m: df[m].to_numpy(dtype=np.float64) if m in df.columns else np.full(len(df), np.nan)
+            for m in self.metrics
+        }
+        cohorts, sizes = {}, {}
+        for level in COHORT_LEVELS:
+            if "Workout Type" in level and not self.has_workout_type:
+                continue
+            groups = frame.groupby(list(level), observed=True, sort=False).indices if level else {(): np.arange(len(df))}
+            for group, positions in groups.items():
+                group = group if isinstance(group, tuple) else (group,)
+                named = dict(zip(level, group))
+                key = tuple(named.get(d) for d in COHORT_DIMENSIONS)
+                sizes[key] = len(positions)
+                cohort = {}
+                for metric, column in values.items():
+                    selected = column[positions]
+                    cohort[metric] = np.sort(selected[~np.isnan(selected)])
+                cohorts[key] = cohort
+        return cohorts, sizes, labels
+
+    def append(self, df: pd.DataFrame, seq: Optional[int] = None) -> int:
+        """Merge newly added rows into the cohorts they belong to; every other cohort is left as it is.
+
+        With a log sequence number, an entry this index has already merged is skipped.
+        """
+        missing = self.missing_columns(df)
+        if missing:
+            raise KeyError(f"Appended rows are missing columns: {missing}")
+        delta, delta_sizes, delta_labels = self._build(df)
+        with self._lock:
+            if seq is not None:
+                if seq <= self.log_seq:
+                    return self.rows
+                self.log_seq = seq
+            cohorts, sizes = dict(self._cohorts), dict(self._sizes)
+            empty = np.empty(0, dtype=np.float64)
+            for key, added in delta.items():
+                current = cohorts.get(key, {})
+                cohorts[key] = {m: merge_sorted(current.get(m, empty), added[m]) for m in self.metrics}
+                sizes[key] = sizes.get(key, 0) + delta_sizes[key]
+            self._cohorts, self._sizes, self._labels = cohorts, sizes, {**self._labels, **delta_labels}
+            self.rows += len(df)
+        return self.rows
+
+    def resolve(self, gender: str, age: float, workout_type: Optional[str] = None) -> CohortKey:
+        """The narrowest cohort of the user with at least min_cohort_size rows (everyone, failing that)"""
+        sizes = self._sizes
+        band = age_band(age)
+        workout = _key_part(workout_type) if workout_type and self.has_workout_type else None
+        candidates = [
+            (_key_part(gender), band, workout),
+            (_key_part(gender), band, None),
+            (_key_part(gender), None, None),
+        ]
+        for key in candidates:
+            # Keys that are not a level of COHORT_LEVELS (no age band, say) simply have no size
+            if sizes.get(key, 0) >= self.min_cohort_size:
+                return key
+        return (None, None, None)
+
+    def percentiles(self, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Percentile rank of each user's metrics within their cohort, batched per cohort and metric.
+
+        Each user is a dict with gender, age, optional workout_type and a metrics dict. The rank counts
+        half of the tied values (mid-rank), so a value equal to the whole cohort lands on 50.
+        """
+        cohorts, sizes = self._cohorts, self._sizes
+        keys = [self.resolve(u["gender"], u["age"], u.get("workout_type")) for u in users]
+        results = [
+            {"cohort": self._describe_key(key), "cohort_size": sizes.get(key, 0), "percentiles": {}}
+            for key in keys
+        ]
+        members = defaultdict(list)
+        for i, key in enumerate(keys):
+            members[key].append(i)
+        for key, indices in members.items():
+            for metric, ordered in cohorts[key].items():
+                asked = [i for i in indices if users[i]["metrics"].get(metric) is not None]
+                if not asked:
+                    continue
+                if not len(ordered):
+                    for i in asked:
+                        results[i]["percentiles"][metric] = None
+                    continue
+                values = np.array([users[i]["metrics"][metric] for i in asked], dtype=np.float64)
+                below = np.searchsorted(ordered, values, side='left')
+                at_or_below = np.searchsorted(ordered, values, side='right')
+                ranks = (below + at_or_below) * (50.0 / len(ordered))
+                for i, rank in zip(asked, ranks.tolist()):
+                    results[i]["percentiles"][metric] = round(rank, 2)
+        return results
+
+    def _describe_key(self, key: CohortKey) -> Dict[str, str]:
+        labels = self._labels
+        return {
+            dimension: value if dimension == "Age Band" else labels.get(value, value)
+            for dimension, value in zip(COHORT_DIMENSIONS, key) if value is not None
+        }
+
+    def describe(self) -> Dict[str, Any]:
+        sizes = self._sizes
+        return {
+            "rows": self.rows,
+            "metrics": self.metrics,
+            "dimensions": [d for d in COHORT_DIMENSIONS if d != "Workout Type" or self.has_workout_type],
+            "age_bands": list(AGE_LABELS),
+            "min_cohort_size": self.min_cohort_size,
+            "cohorts": len(sizes),
+            "smallest_full_cohort": min((n for key, n in sizes.items() if None not in key), default=None),
+        }
+
+
+class CohortRegistry:
+    """Cohort indexes keyed by dataset_id, least recently used dropped beyond max_indexes"""
+
+    def __init__(self, max_indexes: int, min_cohort_size: int):
+        self.max_indexes = max_indexes
+        self.min_cohort_size = min_cohort_size
+        self._indexes: "OrderedDict[str, CohortIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dataset_id: str) -> Optional[CohortIndex]:
+        with self._lock:
+            index = self._indexes.get(dataset_id)
+            if index is not None:
+                self._indexes.move_to_end(dataset_id)
+            return index
+
+    def build(self, dataset_id: str, df: pd.DataFrame) -> CohortIndex:
+        index = CohortIndex(df, self.min_cohort_size)
+        with self._lock:
+            self._indexes[dataset_id] = index
+            self._indexes.move_to_end(dataset_id)
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+
+cohort_registry = CohortRegistry(
+    max_indexes=int(os.getenv("COHORT_MAX_DATASETS", "8")),
+    min_cohort_size=int(os.getenv("COHORT_MIN_SIZE", "30")),
+)
@@ -0,0 +1,250 @@
+# backend/column_store.py - On-disk columnar dataset store: one .npy file per column, read back memory-mapped
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DATASET_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+MANIFEST_NAME = "manifest.json"
+# Rows appended to a dataset later, one numbered part per append: <dataset>/appends/00000001/...
+APPENDS_DIR = "appends"
+# Array kinds written as-is: bool, signed/unsigned int, float, complex, timedelta, datetime
+RAW_KINDS = "biufcmM"
+
+
+class ColumnStore:
+    """Datasets persisted once per dataset_id; reads memory-map only the requested columns.
+
+    Text columns are stored as integer codes plus a category list in the manifest, so every
+    column file is a plain fixed-width array that the OS page cache can share between workers.
+    Beyond max_bytes on disk the least recently loaded datasets are deleted, appends included.
+    Recency is the manifest's mtime, so every worker sharing the directory evicts in the same order.
+    """
+
+    def __init__(self, root: str, max_bytes: Optional[int] = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._manifests: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _path(self, dataset_id: str) -> str:
+        if not DATASET_ID_PATTERN.match(dataset_id):
+            raise ValueError("Invalid dataset_id")
+        return os.path.join(self.root, dataset_id)
+
+    def __contains__(self, dataset_id: str) -> bool:
+        try:
+            return self.manifest(dataset_id) is not None
+        except ValueError:
+            return False
+
+    def manifest(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self._path(dataset_id), MANIFEST_NAME)
+        if not os.path.exists(path):
+            # Possibly evicted by another worker since it was cached here
+            with self._lock:
+                self._manifests.pop(dataset_id, None)
+            return None
+        with self._lock:
+            manifest = self._manifests.get(dataset_id)
+        if manifest is not None:
+            return manifest
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        with self._lock:
+            self._manifests[dataset_id] = manifest
+        return manifest
+
+    def _write_part(self, df: pd.DataFrame) -> str:
+        """Write df's columns and manifest into a new private directory under root and return its path.
+        Callers rename it into place, so concurrent writers never see each other's partial files."""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = os.path.join(self.root, f".tmp.{uuid.uuid4().hex}")
+        os.makedirs(tmp_path)
+        try:
+            columns = []
+            for i, name in enumerate(df.columns):
+                filename = f"{i}.npy"
+                values = df[name]
+                entry = {"name": name, "file": filename, "kind": "raw"}
+                if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype.kind not in RAW_KINDS:
+                    entry["kind"] = "category" if isinstance(values.dtype, pd.CategoricalDtype) else "object"
+                    categorical = values if entry["kind"] == "category" else values.astype("category")
+                    entry["categories"] = categorical.cat.categories.tolist()
+                    array = categorical.cat.codes.to_numpy()
+                else:
+                    array = values.to_numpy()
+                np.save(os.path.join(tmp_path, filename), array, allow_pickle=False)
+                columns.append(entry)
+            manifest = {"rows": len(df), "columns": columns, "memory": df.attrs.get("memory")}
+            with open(os.path.join(tmp_path, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        return tmp_path
+
+    @staticmethod
+    def _read_part(path: str, manifest: Dict[str, Any], columns: Optional[List[str]] = None) -> pd.DataFrame:
+        wanted = None if columns is None else set(columns)
+        data = {}
+        for entry in manifest["columns"]:
+            if wanted is not None and entry["name"] not in wanted:
+                continue
+            array = np.load(os.path.join(path, entry["file"]), mmap_mode='r', allow_pickle=False)
+            if entry["kind"] == "raw":
+                data[entry["name"]] = array
+            else:
+                values = pd.Categorical.from_codes(array, categories=entry["categories"])
+                data[entry["name"]] = values if entry["kind"] == "category" else values.astype(object)
+        return pd.DataFrame(data, copy=False)
+
+    def save(self, dataset_id: str, df: pd.DataFrame) -> bool:
+        """Write a dataset's columns; returns False if it was already stored"""
+        final_path = self._path(dataset_id)
+        if dataset_id in self:
+            return False
+        tmp_path = self._write_part(df)
+        try:
+            os.rename(tmp_path, final_path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if dataset_id in self:
+                return False  # another worker stored it first
+            raise
+        self.enforce_budget(keep=dataset_id)
+        return True
+
+    def column_names(self, dataset_id: str) -> List[str]:
+        manifest = self.manifest(dataset_id)
+        return [column["name"] for column in manifest["columns"]] if manifest else []
+
+    def load(self, dataset_id: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """DataFrame over memory-mapped column files; unknown requested columns are skipped"""
+        manifest = self.manifest(dataset_id)
+        if manifest is None:
+            raise KeyError(dataset_id)
+        self._touch(dataset_id)
+        df = self._read_part(self._path(dataset_id), manifest, columns)
+        if columns is None and manifest.get("memory"):
+            df.attrs["memory"] = manifest["memory"]
+        return df
+
+    def append(self, dataset_id: str, df: pd.DataFrame) -> int:
+        """Store rows appended to a stored dataset and return their sequence number (1, 2, ...).
+
+        Appends live in the dataset's own directory, so they last as long as the dataset does and
+        every worker (including ones started later) can replay them in order. Raises KeyError if the
+        dataset is not stored.
+        """
+        if dataset_id not in self:
+            raise KeyError(dataset_id)
+        appends_path = os.path.join(self._path(dataset_id), APPENDS_DIR)
+        os.makedirs(appends_path, exist_ok=True)
+        tmp_path = self._write_part(df)
+        try:
+            while True:
+                seq = (self.appended(dataset_id) or [0])[-1] + 1
+                part_path = os.path.join(appends_path, f"{seq:08d}")
+                try:
+                    # Renaming onto an existing part fails, so a worker racing for the same number retries
+                    os.rename(tmp_path, part_path)
+                    break
+                except OSError:
+                    if not os.path.isdir(appends_path):
+                        raise KeyError(dataset_id)  # evicted meanwhile
+                    if not os.path.exists(part_path):
+                        raise
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        self.enforce_budget(keep=dataset_id)
+        return seq
+
+    def appended(self, dataset_id: str, after_seq: int = 0) -> List[int]:
+        """Sequence numbers of the dataset's appends after after_seq, in order"""
+        try:
+            names = os.listdir(os.path.join(self._path(dataset_id), APPENDS_DIR))
+        except OSError:
+            return []
+        return sorted(seq for seq in (int(name) for name in names if name.isdigit()) if seq > after_seq)
+
+    def load_append(self, dataset_id: str, seq: int) -> pd.DataFrame:
+        path = os.path.join(self._path(dataset_id), APPENDS_DIR, f"{seq:08d}")
+        try:
+            with open(os.path.join(path, MANIFEST_NAME), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise KeyError(f"{dataset_id} append {seq}")
+        return self._read_part(path, manifest)
+
+    def delete(self, dataset_id: str):
+        with self._lock:
+            self._manifests.pop(dataset_id, None)
+        shutil.rmtree(self._path(dataset_id), ignore_errors=True)
+
+    def _touch(self, dataset_id: str):
+        try:
+            os.utime(os.path.join(self._path(dataset_id), MANIFEST_NAME))
+        except OSError:
+            pass  # evicted meanwhile; the caller's open files stay readable
+
+    def _usage(self) -> List[Tuple[float, str, int]]:
+        """(last used, dataset_id, bytes) of every stored dataset, least recently used first"""
+        usage = []
+        for name in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            if not DATASET_ID_PATTERN.match(name):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                last_used = os.stat(os.path.join(path, MANIFEST_NAME)).st_mtime
+                size = sum(
+                    os.path.getsize(os.path.join(directory, filename))
+                    for directory, _, filenames in os.walk(path) for filename in filenames
+                )
+            except OSError:
+                continue  # being written or deleted by another worker
+            usage.append((last_used, name, size))
+        return sorted(usage)
+
+    def enforce_budget(self, keep: Optional[str] = None) -> int:
+        """Delete least recently used datasets (never keep) until the store fits max_bytes; returns how many"""
+        if self.max_bytes is None:
+            return 0
+        usage = self._usage()
+        total = sum(size for _, _, size in usage)
+        evicted = 0
+        for _, dataset_id, size in usage:
+            if total <= self.max_bytes:
+                break
+            if dataset_id == keep:
+                continue
+            self.delete(dataset_id)
+            total -= size
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        usage = self._usage()
+        return {
+            "root": self.root,
+            "datasets": len(usage),
+            "bytes": sum(size for _, _, size in usage),
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+column_store = ColumnStore(
+    os.getenv("DATASET_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "datasets")),
+    # DATASET_STORE_MAX_MB=0 lifts the limit
+    max_bytes=int(float(os.getenv("DATASET_STORE_MAX_MB", "2048")) * 1024 * 1024) or None,
+)
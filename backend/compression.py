@@ -0,0 +1,57 @@
+# backend/compression.py - Gzip for complete JSON/text response bodies; streams and binary images pass through untouched
+import gzip
+from typing import Iterable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+COMPRESSIBLE_TYPES = ("application/json", "image/svg+xml", "text/plain", "text/html", "text/csv")
+
+
+class JSONCompressionMiddleware:
+    """Gzip single-message response bodies of compressible content types.
+
+    Unlike a blanket GZipMiddleware this never buffers a streamed body (SSE would stall) and never
+    recompresses PNG/WebP bytes, which are already compressed.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000, compresslevel: int = 6,
+                 content_types: Iterable[str] = COMPRESSIBLE_TYPES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.content_types = tuple(content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get("accept-encoding", ""):
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message = {}
+        decided = False
+
+        async def send_maybe_compressed(message: Message):
+            nonlocal start_message, decided
+            if decided:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            decided = True
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "").split(";")[0].strip()
+            if message.get("more_body", False) or "content-encoding" in headers \
+                    or content_type not in self.content_types or len(body) < self.minimum_size:
+                await send(start_message)
+                await send(message)
+                return
+            compressed = gzip.compress(body, compresslevel=self.compresslevel)
+            headers["Content-Encoding"] = "gzip"
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_maybe_compressed)
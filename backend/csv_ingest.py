@@ -0,0 +1,248 @@
+# backend/csv_ingest.py - Streaming, chunked CSV ingestion and incremental profiling
+import os
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import dataframe_nbytes
+from metrics import phase
+from schema_registry import compact_chunk, concat_column, detect_schema
+from sketches import HyperLogLog, KLLSketch, ReservoirSample
+
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "50000"))
+SUMMARY_PERCENTILES = (25, 50, 75)
+APPROX_QUANTILE_K = int(os.getenv("APPROX_QUANTILE_K", "200"))
+APPROX_HLL_PRECISION = int(os.getenv("APPROX_HLL_PRECISION", "12"))
+# Values per column kept for exact percentiles; beyond this a column switches to a KLL sketch
+EXACT_QUANTILE_MAX_VALUES = int(os.getenv("EXACT_QUANTILE_MAX_VALUES", "1000000"))
+
+
+def upload_size(fileobj: BinaryIO) -> int:
+    """Size in bytes of a seekable upload, leaving the read position at the start"""
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+
+def iter_csv_chunks(
+    fileobj: BinaryIO,
+    chunksize: int = CSV_CHUNK_ROWS,
+    memory: Optional[Dict[str, Any]] = None
+) -> Iterator[pd.DataFrame]:
+    """Parse a CSV file object chunk by chunk without materializing the decoded text.
+
+    Each chunk is narrowed to compact dtypes (see schema_registry); pass a dict as memory to
+    collect the schema name and the chunks' bytes before and after.
+    """
+    fileobj.seek(0)
+    schema = None
+    with pd.read_csv(fileobj, chunksize=chunksize, encoding='utf-8') as reader:
+        for i, chunk in enumerate(reader):
+            chunk.columns = chunk.columns.str.strip()
+            if i == 0:
+                schema = detect_schema(chunk.columns)
+            compacted = compact_chunk(chunk, schema)
+            if memory is not None:
+                memory["schema"] = schema.name if schema else None
+                memory["bytes_before"] = memory.get("bytes_before", 0) + dataframe_nbytes(chunk)
+            yield compacted
+
+
+def read_csv_upload(fileobj: BinaryIO, chunksize: int = CSV_CHUNK_ROWS) -> pd.DataFrame:
+    """Parse a whole CSV file object into one compact DataFrame, chunk by chunk.
+
+    Chunks are split into columns as they arrive, and each column is concatenated on its own while
+    its pieces are released, so peak memory is about one copy of the data plus one column, not two
+    copies. The memory report ends up in df.attrs["memory"].
+    """
+    memory: Dict[str, Any] = {}
+    with phase("csv_parse"):
+        pieces: Dict[str, List[pd.Series]] = {}
+        for chunk in iter_csv_chunks(fileobj, chunksize, memory):
+            for column in chunk.columns:
+                # Copied so no piece keeps a whole multi-column block of its chunk alive
+                pieces.setdefault(column, []).append(chunk[column].copy())
+        # copy=False keeps one block per column instead of stacking same-dtype columns into new arrays
+        df = pd.DataFrame({column: concat_column(pieces.pop(column)) for column in list(pieces)}, copy=False)
+    memory["bytes_after"] = dataframe_nbytes(df)
+    df.attrs["memory"] = memory
+    return df
+
+
+def _combine_dtypes(a, b):
+    """dtype a column ends up with when two chunks disagree, mirroring a single read_csv"""
+    if a == b:
+        return a
+    if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b) \
+            and not pd.api.types.is_bool_dtype(a) and not pd.api.types.is_bool_dtype(b):
+        return np.result_type(a, b)
+    return np.dtype(object)
+
+
+def _is_summarized(dtype) -> bool:
+    """Columns included by DataFrame.describe() on a mixed frame"""
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+class _RunningMoments:
+    """count/mean/M2/min/max merged across chunks (Chan et al. parallel variance).
+
+    Percentiles are exact from the kept values, or approximate from a KLL sketch when one is given.
+    Past max_exact_values kept values the column switches to a sketch, so memory stays bounded.
+    """
+
+    def __init__(self, sketch: Optional[KLLSketch] = None, max_exact_values: int = EXACT_QUANTILE_MAX_VALUES):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.values: List[np.ndarray] = []
+        self.sketch = sketch
+        self.max_exact_values = max_exact_values
+
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        n = len(values)
+        if n == 0:
+            return
+        chunk_mean = values.mean()
+        chunk_m2 = ((values - chunk_mean) ** 2).sum()
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        if self.sketch is None and self.count > self.max_exact_values:
+            self.sketch = KLLSketch(APPROX_QUANTILE_K)
+            for kept in self.values:
+                self.sketch.update(kept)
+            self.values = []
+        if self.sketch is not None:
+            self.sketch.update(values)
+        else:
+            # Only the parsed numeric values are kept, for exact percentiles
+            self.values.append(values)
+
+    @property
+    def approximate(self) -> bool:
+        return self.sketch is not None
+
+    def describe(self) -> Dict[str, float]:
+        if self.count == 0:
+            nan = float('nan')
+            return {"count": 0.0, "mean": nan, "std": nan, "min": nan, "25%": nan, "50%": nan, "75%": nan, "max": nan}
+        if self.sketch is not None:
+            quantiles = self.sketch.quantiles([q / 100 for q in SUMMARY_PERCENTILES])
+        else:
+            quantiles = np.percentile(np.concatenate(self.values), SUMMARY_PERCENTILES)
+        return {
+            "count": float(self.count),
+            "mean": float(self.mean),
+            "std": float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float('nan'),
+            "min": float(self.min),
+            "25%": float(quantiles[0]),
+            "50%": float(quantiles[1]),
+            "75%": float(quantiles[2]),
+            "max": float(self.max),
+        }
+
+
+class StreamingProfile:
+    """Builds the analyze-data summary incrementally from DataFrame chunks.
+
+    With approximate=True memory no longer grows with the row count: percentiles come from KLL
+    sketches, distinct counts from HyperLogLog and sample_data from a reservoir sample. Without it,
+    columns longer than EXACT_QUANTILE_MAX_VALUES still fall back to sketched percentiles, and the
+    result is flagged approximate.
+    """
+
+    def __init__(self, sample_rows: int = 5, approximate: bool = False):
+        self.sample_rows = sample_rows
+        self.approximate = approximate
+        self.distinct: Dict[str, HyperLogLog] = {}
+        self.reservoir = ReservoirSample(sample_rows) if approximate else None
+        self.rows = 0
+        self.column_names: Optional[List[str]] = None
+        self.dtypes: Dict[str, Any] = {}
+        self.missing: Dict[str, int] = {}
+        self.moments: Dict[str, _RunningMoments] = {}
+        self.sample: Optional[pd.DataFrame] = None
+
+    def update(self, chunk: pd.DataFrame):
+        if self.column_names is None:
+            self.column_names = chunk.columns.tolist()
+            self.sample = chunk.head(self.sample_rows)
+        if self.reservoir is not None:
+            self.reservoir.update(chunk)
+        self.rows += len(chunk)
+        missing = chunk.isnull().sum()
+        for col in self.column_names:
+            dtype = chunk[col].dtype
+            self.dtypes[col] = _combine_dtypes(self.dtypes[col], dtype) if col in self.dtypes else dtype
+            self.missing[col] = self.missing.get(col, 0) + int(missing[col])
+            if _is_summarized(self.dtypes[col]):
+                if col not in self.moments:
+                    self.moments[col] = _RunningMoments(
+                        KLLSketch(APPROX_QUANTILE_K) if self.approximate else None, EXACT_QUANTILE_MAX_VALUES
+                    )
+                self.moments[col].update(chunk[col].to_numpy(dtype=float))
+            else:
+                self.moments.pop(col, None)
+            if self.approximate:
+                self.distinct.setdefault(col, HyperLogLog(APPROX_HLL_PRECISION)).update(chunk[col])
+
+    def result(self) -> Dict[str, Any]:
+        columns = self.column_names or []
+        result = {
+            "rows": self.rows,
+            "columns": len(columns),
+            "column_names": columns,
+            "data_types": {col: str(self.dtypes[col]) for col in columns},
+            "missing_values": {col: self.missing[col] for col in columns},
+            "summary_stats": {col: self.moments[col].describe() for col in columns if col in self.moments},
+            "sample_data": self.sample.to_dict('records') if self.sample is not None else []
+        }
+        if self.approximate:
+            result["sample_data"] = self.reservoir.rows
+            result["distinct_counts"] = {col: round(self.distinct[col].estimate()) for col in columns}
+            result["approximate"] = True
+            result["error_bounds"] = {
+                "quantile_rank_error": round(KLLSketch(APPROX_QUANTILE_K).rank_error(), 4),
+                "quantile_confidence": 0.99,
+                "distinct_count_relative_std_error": round(HyperLogLog(APPROX_HLL_PRECISION).relative_error(), 4),
+                "exact": ["rows", "missing_values", "count", "mean", "std", "min", "max"],
+                "sample": f"uniform random sample of {self.sample_rows} rows"
+            }
+        elif any(moments.approximate for moments in self.moments.values()):
+            result["approximate"] = True
+            result["error_bounds"] = {
+                "quantile_rank_error": round(KLLSketch(APPROX_QUANTILE_K).rank_error(), 4),
+                "quantile_confidence": 0.99,
+                "approximate_percentiles": [col for col in columns if col in self.moments and self.moments[col].approximate],
+                "exact": ["rows", "missing_values", "count", "mean", "std", "min", "max", "sample_data"],
+            }
+        return result
+
+
+def profile_dataframe(df: pd.DataFrame, approximate: bool = False) -> Dict[str, Any]:
+    """analyze-data summary for a DataFrame that is already in memory"""
+    profile = StreamingProfile(approximate=approximate)
+    if approximate:
+        for start in range(0, max(len(df), 1), CSV_CHUNK_ROWS):
+            profile.update(df.iloc[start:start + CSV_CHUNK_ROWS])
+    else:
+        profile.update(df)
+    return profile.result()
+
+
+def profile_csv_upload(fileobj: BinaryIO, chunksize: int = CSV_CHUNK_ROWS, approximate: bool = False) -> Dict[str, Any]:
+    """analyze-data summary computed chunk by chunk; with approximate=True memory is bounded regardless of row count"""
+    profile = StreamingProfile(approximate=approximate)
+    for chunk in iter_csv_chunks(fileobj, chunksize):
+        profile.update(chunk)
+    return profile.result()
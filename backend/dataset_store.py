@@ -0,0 +1,91 @@
+# backend/dataset_store.py - Upload-once dataset registry
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Optional
+
+import pandas as pd
+
+
+def compute_dataset_id(contents: bytes) -> str:
+    """Content hash used as the dataset_id of an uploaded CSV"""
+    return hashlib.sha256(contents).hexdigest()
+
+
+def compute_dataset_id_from_file(fileobj: BinaryIO, block_size: int = 1024 * 1024) -> str:
+    """Same content hash as compute_dataset_id, read in blocks from a seekable file object"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(block_size), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def dataframe_nbytes(df: pd.DataFrame) -> int:
+    """Approximate in-memory size of a DataFrame, including object columns"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class DatasetCache:
+    """LRU cache of parsed DataFrames bounded by their total memory footprint"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, dataset_id: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            df = self._entries.get(dataset_id)
+            if df is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(dataset_id)
+            self.hits += 1
+            return df
+
+    def put(self, dataset_id: str, df: pd.DataFrame) -> bool:
+        """Insert a DataFrame, evicting least recently used entries to stay under budget.
+
+        Returns False when the DataFrame alone exceeds the budget and was not cached.
+        """
+        size = dataframe_nbytes(df)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if dataset_id in self._entries:
+                self._total_bytes -= self._sizes.pop(dataset_id)
+                del self._entries[dataset_id]
+            while self._entries and self._total_bytes + size > self.max_bytes:
+                evicted_id, _ = self._entries.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(evicted_id)
+                self.evictions += 1
+            self._entries[dataset_id] = df
+            self._sizes[dataset_id] = size
+            self._total_bytes += size
+            return True
+
+    def __contains__(self, dataset_id: str) -> bool:
+        with self._lock:
+            return dataset_id in self._entries
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "datasets": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+dataset_cache = DatasetCache(int(float(os.getenv("DATASET_CACHE_MAX_MB", "256")) * 1024 * 1024))
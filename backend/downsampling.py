@@ -0,0 +1,98 @@
+# backend/downsampling.py - Bounded-size plot series: Largest-Triangle-Three-Buckets for lines, grid binning for scatters
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from plot_cache import MIN_POINTS
+
+
+def _numeric_positions(x) -> Tuple[np.ndarray, bool]:
+    """x as float64 and whether it was numeric; other axes (dates, labels) fall back to ordinal positions"""
+    if pd.api.types.is_numeric_dtype(x) and not pd.api.types.is_bool_dtype(x):
+        return np.asarray(x, dtype=np.float64), True
+    return np.arange(len(x), dtype=np.float64), False
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the threshold points that best preserve the visual shape of the line (Steinarsson, 2013).
+
+    The first and last points are always kept. Points between them are split into threshold - 2 buckets,
+    and each bucket keeps the point forming the largest triangle with the previously kept point and the
+    average of the next bucket. Points with a missing y are never selected unless a bucket has nothing else.
+    """
+    n = len(x)
+    if threshold >= n or threshold < MIN_POINTS:
+        return np.arange(n)
+    missing = np.isnan(y)
+    if missing.any():
+        y = np.where(missing, np.nanmean(y) if not missing.all() else 0.0, y)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    starts, stops = edges[:-1], edges[1:]
+    # Averages of every bucket at once; the bucket after the last one is the final point itself
+    sums_x, sums_y = np.add.reduceat(x[1:n - 1], starts - 1), np.add.reduceat(y[1:n - 1], starts - 1)
+    sizes = np.maximum(stops - starts, 1)
+    avg_x = np.append((sums_x / sizes)[1:], x[-1])
+    avg_y = np.append((sums_y / sizes)[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket, (start, stop) in enumerate(zip(starts, stops)):
+        bx, by = x[start:stop], y[start:stop]
+        area = np.abs((x[previous] - avg_x[bucket]) * (by - y[previous])
+                      - (x[previous] - bx) * (avg_y[bucket] - y[previous]))
+        area[missing[start:stop]] = -1.0
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def grid_bin(x: np.ndarray, y: np.ndarray, max_points: int,
+             extent: Optional[Tuple[float, float, float, float]] = None) -> Dict[str, np.ndarray]:
+    """Collapse a dense scatter into at most max_points grid cells: each non-empty cell becomes one point
+    at the centroid of its members, carrying the number of points it stands for.
+    """
+    keep = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[keep], y[keep]
+    side = max(int(np.sqrt(max_points)), 1)
+    x_min, x_max, y_min, y_max = extent if extent is not None else (x.min(), x.max(), y.min(), y.max())
+    # A degenerate axis (all values equal) collapses to a single column/row of cells
+    x_cells = np.clip(((x - x_min) / ((x_max - x_min) or 1.0) * side).astype(np.int64), 0, side - 1)
+    y_cells = np.clip(((y - y_min) / ((y_max - y_min) or 1.0) * side).astype(np.int64), 0, side - 1)
+    cells, inverse = np.unique(x_cells * side + y_cells, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(cells))
+    return {
+        "x": np.bincount(inverse, weights=x, minlength=len(cells)) / counts,
+        "y": np.bincount(inverse, weights=y, minlength=len(cells)) / counts,
+        "counts": counts,
+    }
+
+
+def downsample_series(series: List[Dict[str, Any]], graph_type: str, max_points: int) -> Optional[str]:
+    """Shrink every x/y series longer than max_points in place; returns the method used, or None.
+
+    Series hold array-likes (not yet JSON lists), so only the kept points are ever converted.
+    """
+    if not max_points or graph_type not in ("Line", "Scatter"):
+        return None
+    oversized = [s for s in series if len(s["x"]) > max_points]
+    if not oversized:
+        return None
+    positions = [_numeric_positions(s["x"]) for s in oversized]
+    xs = [x for x, _ in positions]
+    ys = [np.asarray(s["y"], dtype=np.float64) for s in oversized]
+    if graph_type == "Scatter" and all(numeric for _, numeric in positions):
+        # One grid shared by every legend series, so their cells line up
+        all_x, all_y = np.concatenate(xs), np.concatenate(ys)
+        extent = (np.nanmin(all_x), np.nanmax(all_x), np.nanmin(all_y), np.nanmax(all_y))
+        for s, x, y in zip(oversized, xs, ys):
+            binned = grid_bin(x, y, max_points, extent)
+            s["original_points"] = len(s["x"])
+            s["x"], s["y"], s["counts"] = binned["x"], binned["y"], binned["counts"]
+        return "grid"
+    for s, x, y in zip(oversized, xs, ys):
+        indices = lttb_indices(x, y, max_points)
+        s["original_points"] = len(s["x"])
+        s["x"], s["y"] = s["x"][indices], s["y"][indices]
+    return "lttb"
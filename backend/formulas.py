@@ -0,0 +1,105 @@
+# backend/formulas.py - Scalar fitness formulas for single requests, and the constants the vectorized engines share
+from typing import Dict, Optional, Tuple
+
+KCAL_PER_KG = 7700
+ACTIVITY_MULTIPLIERS = {
+    "Sedentary": 1.2,
+    "Lightly active": 1.375,
+    "Moderately active": 1.55,
+    "Very active": 1.725,
+    "Super active": 1.9
+}
+DEFAULT_ACTIVITY_MULTIPLIER = 1.2
+# Moderate, safe default rates in kg/week and the direction of change for each goal
+GOAL_DEFAULT_WEEKLY_KG = {"lose": 0.5, "maintain": 0.0, "gain": 0.25}
+GOAL_SIGNS = {"lose": -1.0, "maintain": 0.0, "gain": 1.0}
+
+
+def normalize_goal(goal_type: str) -> str:
+    return goal_type.strip().lower()
+
+
+def bmr(weight_kg: float, height_cm: float, age: float, gender: str) -> float:
+    """Mifflin-St Jeor basal metabolic rate"""
+    return 10 * weight_kg + 6.25 * height_cm - 5 * age + (5 if gender.lower() == "male" else -161)
+
+
+def linear_weight_plan(
+    weight_kg: float,
+    height_cm: float,
+    age: float,
+    gender: str,
+    activity_level: str,
+    goal_type: str,
+    weekly_rate_kg: Optional[float] = None
+) -> Dict[str, float]:
+    """TDEE, daily intake and daily weight change for one profile at a constant goal rate.
+
+    The closed form of weight_projection.project_weights(adaptive=False) for a single profile,
+    without building a DataFrame. Unknown goals are treated as maintain.
+    """
+    goal = normalize_goal(goal_type)
+    tdee = bmr(weight_kg, height_cm, age, gender) * ACTIVITY_MULTIPLIERS.get(activity_level, DEFAULT_ACTIVITY_MULTIPLIER)
+    weekly_kg = weekly_rate_kg if weekly_rate_kg is not None else GOAL_DEFAULT_WEEKLY_KG.get(goal, 0.0)
+    daily_change_kcal = GOAL_SIGNS.get(goal, 0.0) * weekly_kg * KCAL_PER_KG / 7
+    return {
+        "tdee": tdee,
+        "daily_calories": tdee + daily_change_kcal,
+        "daily_change_kg": daily_change_kcal / KCAL_PER_KG,
+    }
+
+
+HEART_RATE_EXERCISES = ("Jogging", "Cycling")
+DEFAULT_MET = 5.0
+MET_VALUES = {
+    "Jogging": 10.0,
+    "Cycling": 8.0,
+    "Weight Lifting": 4.5,
+    "Swimming": 6.0,
+}
+# Exercises whose MET depends on a second field; the flat MET_VALUES entry is the fallback
+MET_VARIANTS = {
+    "Weight Lifting": ("intensity", {
+        "Light Effort": 3.0,
+        "Moderate Effort": 4.5,
+        "Vigorous Effort": 6.0,
+    }),
+    "Swimming": ("swimming_style", {
+        "Leisurely swimming": 6.0,
+        "Backstroke": 4.8,
+        "Breaststroke": 5.3,
+        "Freestyle (slow)": 5.8,
+        "Freestyle (moderate)": 8.3,
+        "Freestyle (fast)": 9.8,
+        "Butterfly": 13.8,
+        "Treading water (moderate)": 3.5,
+        "Treading water (vigorous)": 7.0,
+    }),
+}
+# Workout types of the fitness-tracker dataset that the calculator has no entry for. Only dataset-wide
+# estimates use them; /api/calculate-calories keeps DEFAULT_MET for these.
+DATASET_MET_VALUES = {**MET_VALUES, "HIIT": 8.0, "Cardio": 7.0, "Yoga": 2.5}
+
+
+def session_calories(
+    gender: str,
+    weight_kg: float,
+    age: float,
+    duration_mins: float,
+    exercise_type: str,
+    intensity: Optional[str] = None,
+    heart_rate: Optional[float] = None,
+    swimming_style: Optional[str] = None
+) -> Tuple[float, str]:
+    """(calories burned, method) for one session; calorie_engine.estimate_calories is the vectorized twin"""
+    if heart_rate and exercise_type in HEART_RATE_EXERCISES:
+        if gender == "Male":
+            per_minute = (-55.0969 + 0.6309 * heart_rate + 0.1988 * weight_kg + 0.2017 * age) / 4.184
+        else:
+            per_minute = (-20.4022 + 0.4472 * heart_rate - 0.1263 * weight_kg + 0.074 * age) / 4.184
+        return round(per_minute * duration_mins, 2), "heart_rate"
+    met = MET_VALUES.get(exercise_type, DEFAULT_MET)
+    if exercise_type in MET_VARIANTS:
+        field, table = MET_VARIANTS[exercise_type]
+        met = table.get(intensity if field == "intensity" else swimming_style, met)
+    return round(met * weight_kg * (duration_mins / 60), 2), "met"
@@ -0,0 +1,212 @@
+# backend/job_queue.py - In-process async job queue for long-running AI generations, visible to every worker
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from starlette.concurrency import run_in_threadpool
+
+from shared_state import StateBackend, shared_state
+
+JOB_NAMESPACE = "jobs"
+# How often a worker re-reads the published status of a job running in another worker
+REMOTE_JOB_POLL_S = 0.25
+
+
+class JobQueueFull(Exception):
+    """Raised when the number of pending jobs has reached its limit"""
+
+
+class Job:
+    """One queued generation and, once finished, its result or error"""
+
+    def __init__(self, kind: str, run: Callable[[], Awaitable[Any]]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._run = run
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def _notify(self):
+        # Wake everyone waiting for a status change, then re-arm for the next one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job's status changes; returns False on timeout"""
+        if self.done:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == "succeeded":
+            data["result"] = self.result
+        elif self.status == "failed":
+            data["error"] = self.error
+        return data
+
+
+class RemoteJob:
+    """A job running in another worker process, followed through the status it publishes to shared state"""
+
+    def __init__(self, snapshot: Dict[str, Any], state: StateBackend):
+        self._snapshot = snapshot
+        self._state = state
+
+    @property
+    def id(self) -> str:
+        return self._snapshot["job_id"]
+
+    @property
+    def status(self) -> str:
+        return self._snapshot["status"]
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    async def wait_for_change(self, timeout: Optional[float] = None) -> bool:
+        if self.done:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            await asyncio.sleep(REMOTE_JOB_POLL_S if remaining is None else min(REMOTE_JOB_POLL_S, remaining))
+            snapshot = self._state.get(JOB_NAMESPACE, self.id)
+            if snapshot is None:
+                # Expired in the meantime; report it as a failure rather than waiting forever
+                self._snapshot = {**self._snapshot, "status": "failed", "error": "Job result expired"}
+                return True
+            if snapshot["status"] != self.status:
+                self._snapshot = snapshot
+                return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._snapshot
+
+
+class JobQueue:
+    """Fixed pool of worker tasks draining a bounded queue; finished jobs are kept for result_ttl_s.
+
+    Jobs run in the worker process that accepted them. With a shared state backend every status
+    change is also published there, so any other worker can answer polls for the job.
+    """
+
+    def __init__(self, workers: int, max_pending: int, result_ttl_s: float, state: Optional[StateBackend] = None):
+        self.worker_count = max(1, workers)
+        self.max_pending = max_pending
+        self.result_ttl_s = result_ttl_s
+        self.state = state if state is not None and state.shared else None
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # Publishes run in threads; taking turns keeps a job's status changes in order in the shared state
+        self._publish_lock = asyncio.Lock()
+
+    def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.worker_count)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    async def submit(self, kind: str, run: Callable[[], Awaitable[Any]]) -> Job:
+        """Queue a coroutine factory and return its Job immediately"""
+        self.start()
+        self._purge_expired()
+        job = Job(kind, run)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"Too many pending jobs ({self.max_pending}), try again shortly")
+        self._jobs[job.id] = job
+        await self._publish(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Union[Job, RemoteJob]]:
+        self._purge_expired()
+        job = self._jobs.get(job_id)
+        if job is None and self.state is not None:
+            snapshot = self.state.get(JOB_NAMESPACE, job_id)
+            return RemoteJob(snapshot, self.state) if snapshot is not None else None
+        return job
+
+    async def _publish(self, job: Job):
+        # A shared backend is a database write, which must not stall the event loop
+        if self.state is not None:
+            async with self._publish_lock:
+                await run_in_threadpool(self.state.put, JOB_NAMESPACE, job.id, job.to_dict(), ttl_s=self.result_ttl_s)
+
+    def stats(self) -> Dict[str, int]:
+        counts = {"queued": 0, "running": 0, "succeeded": 0, "failed": 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {"workers": self.worker_count, "max_pending": self.max_pending, **counts}
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.result_ttl_s
+        expired = [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            await self._publish(job)
+            job._notify()
+            try:
+                job.result = await job._run()
+                job.status = "succeeded"
+            except asyncio.CancelledError:
+                job.status = "failed"
+                job.error = "Job cancelled during shutdown"
+                raise
+            except Exception as e:
+                job.status = "failed"
+                job.error = getattr(e, "detail", None) or str(e)
+            finally:
+                job.finished_at = time.time()
+                job._run = None
+                await self._publish(job)
+                job._notify()
+                self._queue.task_done()
+
+
+job_queue = JobQueue(
+    workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_pending=int(os.getenv("JOB_MAX_PENDING", "1000")),
+    result_ttl_s=float(os.getenv("JOB_RESULT_TTL_S", "3600")),
+    state=shared_state,
+)
@@ -0,0 +1,67 @@
+# backend/lazy_loader.py - Heavy subsystems (pandas/numpy analysis, matplotlib plotting, the LLM client) imported on first use
+import importlib
+import threading
+import time
+from types import ModuleType
+from typing import Dict, Iterable, Optional
+
+
+class LazyModule:
+    """Stand-in for a module that is imported the first time one of its attributes is read"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+        self.load_time_s: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    self.load_time_s = time.perf_counter() - started
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr: str):
+        # Only reached for attributes LazyModule itself does not define
+        return getattr(self.load(), attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module '{self._name}' ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+_registry: Dict[str, LazyModule] = {}
+
+
+def lazy_import(name: str) -> LazyModule:
+    """A shared LazyModule for name; every caller gets the same one"""
+    if name not in _registry:
+        _registry[name] = LazyModule(name)
+    return _registry[name]
+
+
+def prewarm(names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """Import the given (default: all registered) lazy modules now; returns seconds spent on each"""
+    timings = {}
+    for name in names if names is not None else list(_registry):
+        module = lazy_import(name)
+        started = time.perf_counter()
+        module.load()
+        timings[name] = round(time.perf_counter() - started, 4)
+    return timings
+
+
+def subsystem_status() -> Dict[str, Optional[float]]:
+    """Seconds each registered lazy module took to load (excluding dependencies an earlier one already
+    imported), None while it is still unloaded"""
+    return {
+        name: round(module.load_time_s, 4) if module.load_time_s is not None else None
+        for name, module in _registry.items()
+    }
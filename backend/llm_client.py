@@ -0,0 +1,172 @@
+# backend/llm_client.py - Pooled async OpenRouter client with timeouts, bounded concurrency and retries
+import asyncio
+import json
+import os
+import random
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from metrics import phase
+
+SYSTEM_PROMPT = "You are a helpful and motivating fitness coach."
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when the upstream model cannot produce a completion"""
+
+
+def parse_stream_line(line: str) -> Optional[str]:
+    """Extract the content delta from one server-sent event line.
+
+    Returns "" for comments, keep-alives and empty deltas, and None at the end of the stream.
+    """
+    if not line.startswith("data:"):
+        return ""
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return None
+    try:
+        chunk = json.loads(data)
+    except ValueError:
+        return ""
+    if "error" in chunk:
+        raise LLMError(f"OpenRouter stream error: {chunk['error']}")
+    choices = chunk.get("choices") or [{}]
+    return (choices[0].get("delta") or {}).get("content") or ""
+
+
+class OpenRouterClient:
+    """Shares one keep-alive connection pool across all requests of a worker"""
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        timeout_s: float = 60.0,
+        connect_timeout_s: float = 5.0,
+        max_concurrency: int = 8,
+        max_connections: int = 20,
+        max_retries: int = 3,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 8.0,
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.timeout = httpx.Timeout(timeout_s, connect=connect_timeout_s)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    def _headers(self) -> Dict[str, str]:
+        api_key = os.getenv("OPENROUTER_API_KEY")
+        if not api_key:
+            raise LLMError("OpenRouter API key not configured")
+        return {
+            "Authorization": f"Bearer {api_key}",
+            "HTTP-Referer": "https://your-app-domain.com",
+            "Content-Type": "application/json"
+        }
+
+    def build_payload(self, prompt: str, stream: bool = False) -> Dict[str, Any]:
+        messages: List[Dict[str, str]] = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        payload: Dict[str, Any] = {"model": self.model, "messages": messages}
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def _backoff_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Exponential backoff with jitter, honouring a numeric Retry-After header"""
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max_s)
+        delay = self.backoff_base_s * (2 ** attempt)
+        return min(delay, self.backoff_max_s) * (0.5 + random.random() / 2)
+
+    async def complete(self, prompt: str) -> str:
+        """Return the model's reply to a single-turn prompt, retrying on 429/5xx and network errors"""
+        headers = self._headers()
+        payload = self.build_payload(prompt)
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                response = None
+                try:
+                    with phase("llm_call"):
+                        response = await self._get_client().post("/chat/completions", headers=headers, json=payload)
+                    if response.status_code not in RETRY_STATUS_CODES:
+                        response.raise_for_status()
+                        return response.json()["choices"][0]["message"]["content"]
+                    error = LLMError(f"OpenRouter returned HTTP {response.status_code}")
+                except httpx.HTTPStatusError as e:
+                    raise LLMError(f"OpenRouter returned HTTP {e.response.status_code}") from e
+                except (httpx.TimeoutException, httpx.TransportError) as e:
+                    error = LLMError(f"OpenRouter request failed: {e!r}")
+                except (KeyError, IndexError, ValueError) as e:
+                    raise LLMError(f"Unexpected OpenRouter response: {e!r}") from e
+                if attempt == self.max_retries:
+                    raise error
+                await asyncio.sleep(self._backoff_delay(attempt, response))
+        raise LLMError("OpenRouter request failed")
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the model's reply token by token as OpenRouter streams it.
+
+        Failures are only retried until the first token has been yielded.
+        """
+        headers = self._headers()
+        payload = self.build_payload(prompt, stream=True)
+        started = False
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                response = None
+                try:
+                    # Timed until the stream ends, so a slow consumer counts toward the phase too
+                    with phase("llm_call"):
+                        async with self._get_client().stream("POST", "/chat/completions", headers=headers, json=payload) as response:
+                            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                                error = LLMError(f"OpenRouter returned HTTP {response.status_code}")
+                            elif response.status_code >= 400:
+                                raise LLMError(f"OpenRouter returned HTTP {response.status_code}")
+                            else:
+                                async for line in response.aiter_lines():
+                                    token = parse_stream_line(line)
+                                    if token is None:
+                                        break
+                                    if token:
+                                        started = True
+                                        yield token
+                                return
+                except (httpx.TimeoutException, httpx.TransportError) as e:
+                    error = LLMError(f"OpenRouter request failed: {e!r}")
+                    if started or attempt == self.max_retries:
+                        raise error from e
+                await asyncio.sleep(self._backoff_delay(attempt, response))
+        raise error
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+llm_client = OpenRouterClient(
+    base_url=os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+    model=os.getenv("OPENROUTER_MODEL", "mistralai/mistral-small-3.2-24b-instruct:free"),
+    timeout_s=float(os.getenv("LLM_TIMEOUT_S", "60")),
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+)
@@ -1,27 +1,75 @@
 # backend/main.py - Enhanced Version
-from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any, Union
-import pandas as pd
-import numpy as np
+from contextlib import asynccontextmanager
 import json
 import os
+import time
 from datetime import datetime, date
-import requests
-import io
 import base64
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
-from io import BytesIO
 from dotenv import load_dotenv
+from llm_cache import llm_cache, prompt_cache_key
+from job_queue import job_queue, Job, JobQueueFull
+from plot_cache import (
+    plot_cache, plot_cache_key, normalize_plot_config, etag_matches,
+    PLOT_FORMATS, PLOT_DPI_RANGE, MIN_POINTS, MAX_POINTS_LIMIT
+)
+from workout_store import workout_store, DEFAULT_USER
+from formulas import linear_weight_plan, normalize_goal, session_calories, GOAL_SIGNS
+from compression import JSONCompressionMiddleware
+from metrics import metrics, loop_lag_sampler, MetricsMiddleware, PROMETHEUS_CONTENT_TYPE
+from shared_state import shared_state
+from lazy_loader import lazy_import, prewarm, subsystem_status
+
+# Heavy subsystems are imported on first use, so a worker that only serves workouts or health checks
+# never loads pandas, numpy, matplotlib or httpx. PREWARM_SUBSYSTEMS=1 loads them all at startup instead.
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+datasets = lazy_import("dataset_store")
+storage = lazy_import("column_store")
+ingest = lazy_import("csv_ingest")
+aggregation = lazy_import("aggregation")
+plotting = lazy_import("plot_renderer")
+cubes = lazy_import("rollup_cube")
+cohorts = lazy_import("cohort_index")
+calorie_engine = lazy_import("calorie_engine")
+weight_projection = lazy_import("weight_projection")
+routes = lazy_import("route_tracker")
+llm = lazy_import("llm_client")
 
 load_dotenv()
-print("OpenRouter key loaded:", os.getenv("OPENROUTER_API_KEY"))
-app = FastAPI(title="FitTrack API", version="1.0.0")
+
+async def prewarm_subsystems():
+    """Opt-in: PREWARM_SUBSYSTEMS=1 imports every lazy subsystem now, or a comma-separated list of module names"""
+    setting = os.getenv("PREWARM_SUBSYSTEMS", "").strip()
+    if not setting or setting == "0":
+        return
+    names = None if setting.lower() in ("1", "all", "true") else [n.strip() for n in setting.split(",") if n.strip()]
+    await run_in_threadpool(prewarm, names)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the background workers on startup; on shutdown stop them before closing what they use"""
+    job_queue.start()
+    loop_lag_sampler.start()
+    await prewarm_subsystems()
+    try:
+        yield
+    finally:
+        await job_queue.stop()
+        await loop_lag_sampler.stop()
+        if plotting.loaded:
+            plotting.plot_renderer.shutdown()
+        if llm.loaded:
+            await llm.llm_client.aclose()
+        workout_store.close()
+        shared_state.close()
+
+app = FastAPI(title="FitTrack API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -30,7 +78,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+# Large JSON bodies (analysis, series, base64 plots) are gzipped; SSE streams and binary images are not
+app.add_middleware(JSONCompressionMiddleware, minimum_size=int(os.getenv("GZIP_MIN_BYTES", "1000")))
+# Outermost, so request latency includes compression and CORS handling
+app.add_middleware(MetricsMiddleware)
 
 # Pydantic models
 class WorkoutEntry(BaseModel):
@@ -52,7 +105,16 @@ class WeightPredictionRequest(BaseModel):
     weight_kg: float
     activity_level: str
     gender: str
-    goal_type: str  # "lose" only
+    goal_type: str  # "lose", "maintain" or "gain"
+
+class WeightProjectionProfile(WeightPredictionRequest):
+    weekly_rate_kg: Optional[float] = None  # defaults to the goal's standard rate
+
+class WeightProjectionRequest(BaseModel):
+    profiles: List[WeightProjectionProfile]
+    days: int = 180
+    step_days: int = 1
+    adaptive: bool = True
 
 class CalorieCalculationRequest(BaseModel):
     gender: str
@@ -64,6 +126,27 @@ class CalorieCalculationRequest(BaseModel):
     heart_rate: Optional[int] = None
     swimming_style: Optional[str] = None
 
+class CalorieBatchRequest(BaseModel):
+    sessions: Optional[List[CalorieCalculationRequest]] = None
+    dataset_id: Optional[str] = None
+
+class CubeQueryRequest(BaseModel):
+    dataset_id: str
+    measure: str
+    stat: str = "Mean"
+    group_by: List[str] = []
+    filters: Dict[str, Any] = {}
+
+class CohortUser(BaseModel):
+    age: int
+    gender: str
+    workout_type: Optional[str] = None  # narrows the cohort when given
+    metrics: Dict[str, float]  # dataset column name -> the user's value, e.g. {"VO2 Max": 42.0}
+
+class CohortPercentileRequest(BaseModel):
+    users: List[CohortUser]
+    dataset_id: Optional[str] = None  # defaults to the reference dataset
+
 class AIInsightRequest(BaseModel):
     prompt: str
     context: Optional[str] = None
@@ -79,6 +162,9 @@ class PlotRequest(BaseModel):
     graph_type: str  # "Line", "Scatter", "Bar", "Histogram", "Box"
     legend_attr: Optional[str] = None
     stat_mode: Optional[str] = "Sum"  # "Sum", "Mean", "Median", "Mode"
+    max_points: Optional[int] = None  # Line/Scatter downsampling budget per series, 0 disables
+    format: Optional[str] = "png"  # "png", "webp", "svg"
+    dpi: Optional[int] = 150
 
 class PersonalizedWorkoutRequest(BaseModel):
     decision: str  # "Loose Weight" or "Gain Weight"
@@ -117,45 +203,137 @@ class DietPlanResponse(BaseModel):
     user_data: Dict[str, Any]
     generated_at: str
 
-# In-memory storage (replace with database in production)
-workout_logs: List[WorkoutEntry] = []
-user_profiles: Dict[str, UserProfile] = {}
-active_routes: Dict[str, List[RoutePoint]] = {}  # sessionId -> route points
+JOB_MAX_WAIT_S = 30
+CALORIE_BATCH_MAX_SESSIONS = int(os.getenv("CALORIE_BATCH_MAX_SESSIONS", "50000"))
+WEIGHT_PROJECTION_MAX_DAYS = 3 * 365
+WEIGHT_PROJECTION_MAX_PROFILES = int(os.getenv("WEIGHT_PROJECTION_MAX_PROFILES", "10000"))
+STREAMING_PROFILE_THRESHOLD_BYTES = int(float(os.getenv("STREAMING_PROFILE_THRESHOLD_MB", "64")) * 1024 * 1024)
+COHORT_BATCH_MAX_USERS = int(os.getenv("COHORT_BATCH_MAX_USERS", "10000"))
+# Smaller batches are answered on the event loop; a thread hop would cost more than the lookups
+COHORT_INLINE_MAX_USERS = 100
+# Dataset users are compared against when a cohort request names no dataset_id
+COHORT_REFERENCE_CSV = os.getenv("COHORT_REFERENCE_CSV", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "frontend", "src", "assets", "workout_fitness_tracker_data.csv"
+))
 
-def save_logs():
-    pass  # No-op, remove JSON logging
+WORKOUT_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "workout_log.json")
 
-def generate_with_openrouter(prompt: str) -> str:
-    """Generate AI response using OpenRouter"""
-    openrouter_key = os.getenv("OPENROUTER_API_KEY")
-    
-    if not openrouter_key:
-        return "❌ Error: OpenRouter API key not configured"
-    
-    headers = {
-        "Authorization": f"Bearer {openrouter_key}",
-        "HTTP-Referer": "https://your-app-domain.com",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "model": "mistralai/mistral-small-3.2-24b-instruct:free",
-        "messages": [
-            {"role": "system", "content": "You are a helpful and motivating fitness coach."},
-            {"role": "user", "content": prompt}
-        ]
-    }
-    
+def require_csv_upload(file: UploadFile):
+    if not file.filename or not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Only CSV files are supported")
+
+async def register_upload(file: UploadFile):
+    """Parse an uploaded CSV once, persist it to the column store and keep it in the dataset cache, keyed by content hash"""
+    require_csv_upload(file)
+    dataset_id = await run_in_threadpool(datasets.compute_dataset_id_from_file, file.file)
+    df = datasets.dataset_cache.get(dataset_id)
+    if df is None and dataset_id in storage.column_store:
+        df = await run_in_threadpool(storage.column_store.load, dataset_id)
+    if df is None:
+        try:
+            # Parsed straight from the spooled upload in chunks, never as one decoded string
+            df = await run_in_threadpool(ingest.read_csv_upload, file.file)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+        await run_in_threadpool(storage.column_store.save, dataset_id, df)
+    # Datasets larger than the whole cache budget are still served for this request
+    datasets.dataset_cache.put(dataset_id, df)
+    return dataset_id, df
+
+async def load_dataset(file: Optional[UploadFile], dataset_id: Optional[str], columns: Optional[List[str]] = None):
+    """Resolve a (dataset_id, DataFrame) pair from a cached or stored dataset_id, or from an uploaded file.
+
+    Passing columns lets a stored dataset be memory-mapped column by column instead of loaded whole;
+    the returned frame may then contain only (the existing ones of) those columns.
+    """
+    if dataset_id:
+        df = datasets.dataset_cache.get(dataset_id)
+        if df is not None:
+            return dataset_id, df
+        if dataset_id in storage.column_store:
+            df = await run_in_threadpool(storage.column_store.load, dataset_id, columns)
+            if columns is None:
+                datasets.dataset_cache.put(dataset_id, df)
+            return dataset_id, df
+        if file is None:
+            raise HTTPException(status_code=404, detail="Dataset not found, please upload the file again")
+    if file is None:
+        raise HTTPException(status_code=400, detail="Either a CSV file or a dataset_id is required")
+    return await register_upload(file)
+
+def plot_columns(config: Dict[str, Any]) -> List[str]:
+    return [c for c in dict.fromkeys([config["x_axis"], config["y_axis"], config.get("legend_attr")]) if c]
+
+async def generate_with_openrouter(prompt: str, cache: bool = False) -> str:
+    """Generate AI response using OpenRouter.
+
+    Prompts built only from request fields can pass cache=True to reuse earlier
+    completions and share a single upstream call between identical concurrent requests.
+    """
     try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            json=data
-        )
-        response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+        if cache:
+            key = prompt_cache_key(llm.llm_client.model, prompt)
+            return await llm_cache.get_or_generate(key, lambda: llm.llm_client.complete(prompt))
+        return await llm.llm_client.complete(prompt)
     except Exception as e:
         return f"❌ Error: {e}"
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_openrouter_events(prompt: str, cache: bool = False):
+    """Forward model tokens as 'token' events, ending with 'done' or 'error'"""
+    # Flush headers and a first byte right away, before the model produces anything
+    yield ": stream opened\n\n"
+    key = prompt_cache_key(llm.llm_client.model, prompt) if cache else None
+    cached = llm_cache.get(key) if key else None
+    if cached is not None:
+        yield sse_event("token", {"token": cached})
+        yield sse_event("done", {"generated_at": datetime.now().isoformat(), "cached": True})
+        return
+    tokens = []
+    try:
+        async for token in llm.llm_client.stream(prompt):
+            tokens.append(token)
+            yield sse_event("token", {"token": token})
+        if key:
+            llm_cache.put(key, "".join(tokens))
+        yield sse_event("done", {"generated_at": datetime.now().isoformat()})
+    except Exception as e:
+        yield sse_event("error", {"detail": f"❌ Error: {e}"})
+
+def openrouter_sse_response(prompt: str, cache: bool = False) -> StreamingResponse:
+    return StreamingResponse(
+        stream_openrouter_events(prompt, cache),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def validate_diet_plan_request(request: DietPlanRequest):
+    if not all([request.name, request.age, request.height_cm, request.weight_kg, request.goal_type]):
+        raise HTTPException(status_code=400, detail="Missing required fields: name, age, height_cm, weight_kg, goal_type")
+
+def diet_plan_user_data(request: DietPlanRequest) -> Dict[str, Any]:
+    """Request fields used to build the diet plan prompt"""
+    return {
+        "name": request.name,
+        "age": request.age,
+        "gender": request.gender,
+        "height_cm": request.height_cm,
+        "weight_kg": request.weight_kg,
+        "goal_type": request.goal_type,
+        "target_weight": request.target_weight,
+        "timeline_weeks": request.timeline_weeks,
+        "allergies": request.allergies,
+        "medical_conditions": request.medical_conditions,
+        "diet_type": request.diet_type,
+        "restrictions": request.restrictions,
+        "meal_frequency": request.meal_frequency,
+        "disliked_foods": request.disliked_foods,
+        "preferred_cuisines": request.preferred_cuisines
+    }
+
 def create_diet_plan_prompt(user_data: Dict[str, Any]) -> str:
     """Create detailed prompt for diet plan generation"""
     return f"""
@@ -216,6 +394,149 @@ def create_diet_plan_prompt(user_data: Dict[str, Any]) -> str:
     Make it motivating and personalized for {user_data.get('name', 'the user')}.
     """
 
+def create_personalized_workout_prompt(request: PersonalizedWorkoutRequest) -> str:
+    """Create coaching prompt for personalized workout plan generation"""
+    return f"""
+You are an experienced, certified personal trainer with 10+ years of coaching clients to achieve their fitness goals. You're known for creating realistic, sustainable programs that get results while keeping clients motivated and injury-free.
+
+**CLIENT PROFILE:**
+- Goal: {request.decision} {request.aim} kg in {request.days} days
+- Current Weight: {request.current_weight} kg  
+- Demographics: {request.gender}, {request.age} years old
+- Available Training Time: {request.exercise_hours} minutes per session
+- Training Frequency: {request.days_per_week} days per week
+- Preferred Workout Style: {request.workout_type}
+- Current Fitness Level: {request.fitness_level}
+- Equipment Access: {request.gym_access}
+- Physical Limitations: {request.injuries}
+
+**YOUR COACHING APPROACH:**
+
+As their dedicated trainer, create a comprehensive {request.days}-day transformation program that speaks directly to them. Use your professional expertise to:
+
+**STRUCTURE YOUR PROGRAM LIKE A TRUE COACH:**
+1. **Opening Assessment & Motivation** - Address their specific goal with encouragement and realistic expectations
+2. **Progressive Training Philosophy** - Explain your methodology for their success
+3. **Daily Workout Breakdown** - Design each day with purpose and progression
+
+**FOR EACH TRAINING DAY, PROVIDE:**
+- **Pre-Workout Prep** (5-10 min dynamic warm-up specific to the day's focus)
+- **Main Training Block** with:
+  - Exercise selection with clear rationale
+  - Precise sets × reps × rest periods
+  - Weight/intensity recommendations based on their level
+  - Form cues and safety reminders
+  - Progression markers ("Increase weight when you can complete all sets with 2 reps in reserve")
+- **Recovery Protocol** (cool-down, stretching, mobility work)
+- **Coach's Daily Note** (motivation, what to expect, key focus points)
+
+**COACHING PRINCIPLES TO FOLLOW:**
+- Speak with authority and confidence, but remain encouraging
+- Adjust intensity appropriately for age, gender, and fitness level
+- Build in progressive overload while respecting their limitations
+- Include recovery strategies and injury prevention
+- Address both physical and mental aspects of their journey
+- Provide alternatives for exercises when needed
+- Give them checkpoints to assess progress
+
+**DELIVERY STYLE:**
+- Use direct, motivational coaching language ("Today we're focusing on...", "Your mission is...", "By the end of this week, you'll feel...")
+- Include specific coaching cues ("Drive through your heels", "Control the negative")
+- Add accountability measures ("Track your weights", "Rate your effort 1-10")
+- Provide troubleshooting tips for common challenges
+
+Remember: You're not just giving them a workout list—you're their coach guiding them through a transformation journey. Make them feel confident, supported, and excited to start each session.
+"""
+
+def create_data_insights_prompt(df: "pd.DataFrame") -> str:
+    """Create performance-analysis prompt from a summary of the uploaded data"""
+    # Prepare data summary for AI
+    preview = df.head(5).to_string()
+    summary = df.describe(include='all').to_string()
+    
+    # Handle correlation matrix safely
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    if len(numeric_cols) > 1:
+        correlation = df[numeric_cols].corr().to_string()
+    else:
+        correlation = "Not enough numeric columns for correlation analysis"
+    
+    missing = df.isnull().sum().to_string()
+    
+    prompt = f"""
+You are a certified Exercise Physiologist and Performance Data Specialist with advanced expertise in biomechanics, training science, and athletic performance analysis. You've spent years helping elite athletes and fitness enthusiasts optimize their training through data-driven insights.
+
+**CLIENT'S WORKOUT DATA ANALYSIS**
+
+**RAW PERFORMANCE DATA:**
+{preview}
+
+**PHYSIOLOGICAL METRICS SUMMARY:**
+{summary}
+
+**MOVEMENT PATTERN CORRELATIONS:**
+{correlation}
+
+**DATA INTEGRITY ASSESSMENT:**
+{missing}
+
+**YOUR EXPERT ANALYSIS APPROACH:**
+
+As their performance analyst, conduct a comprehensive evaluation of their training data using your deep understanding of exercise science. Your analysis should reveal the story their body is telling through the numbers.
+
+**DELIVER YOUR PROFESSIONAL ASSESSMENT:**
+
+**🔬 PERFORMANCE INTELLIGENCE FINDINGS**
+Identify 3 critical discoveries from their data that reveal:
+- **Training Adaptation Patterns**: How their body is responding to stimulus over time
+- **Performance Bottlenecks**: What's limiting their progress or creating plateaus
+- **Recovery & Overload Signatures**: Signs of optimal training stress vs. potential overreaching
+
+For each finding, explain:
+- The physiological significance ("This pattern indicates...")
+- Why it matters for their goals ("This means your body is...")
+- The timeline/progression you observe ("Over the past X weeks...")
+
+**⚡ EVIDENCE-BASED OPTIMIZATION STRATEGIES**
+Provide 3 data-driven interventions that will maximize their results:
+- **Training Variable Adjustments**: Specific modifications to volume, intensity, or frequency
+- **Recovery Protocol Enhancements**: Targeted strategies based on their fatigue patterns  
+- **Progressive Overload Refinements**: How to manipulate training stress for continued adaptation
+
+Each recommendation should include:
+- The scientific rationale ("Research shows that...")
+- Expected timeline for results ("You should see changes within...")
+- Measurable success metrics ("Track improvement by monitoring...")
+
+**📊 VISUAL PERFORMANCE ANALYTICS**
+Recommend 2 powerful data visualizations that will unlock deeper insights:
+- **Primary Analysis Chart**: The most revealing visualization for their specific training pattern
+- **Tracking Dashboard Visual**: The best ongoing monitoring tool for their goals
+
+For each visualization, specify:
+- What metrics to plot and why
+- What patterns to look for
+- How to interpret the results for training decisions
+
+**PROFESSIONAL DELIVERY STANDARDS:**
+- Use exercise science terminology appropriately ("VO2 kinetics", "neuromuscular adaptation", "periodization")
+- Reference training principles when relevant ("progressive overload", "specificity", "supercompensation")
+- Provide confidence levels for your insights ("The data strongly suggests...", "There's a moderate indication that...")
+- Include practical implementation timelines
+- Address potential confounding factors in the data
+- Suggest follow-up metrics to track
+
+**YOUR ANALYTICAL VOICE:**
+- Speak with scientific authority while remaining accessible
+- Use evidence-based language ("The data indicates...", "Analysis reveals...")
+- Provide context for why certain metrics matter
+- Balance technical precision with practical application
+- Show enthusiasm for the insights discovered ("This is particularly interesting because...")
+
+Remember: You're not just reporting numbers—you're translating complex physiological data into actionable intelligence that will transform their training effectiveness. Make them feel like they have a world-class performance team analyzing their every rep.
+"""
+    return prompt
+
 @app.get("/")
 async def root():
     return {"message": "FitTrack API is running!"}
@@ -223,97 +544,139 @@ async def root():
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+@app.post("/api/workouts")
+async def log_workout(workout: WorkoutEntry, user_id: str = DEFAULT_USER):
+    try:
+        saved = await run_in_threadpool(workout_store.add, workout.model_dump(), user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid workout: {str(e)}")
+    return {"message": "Workout logged successfully", "workout": saved}
+
+@app.get("/api/workouts")
+async def get_workouts(
+    limit: int = 10,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    user_id: str = DEFAULT_USER
+):
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    try:
+        workouts = await run_in_threadpool(workout_store.query, user_id, limit, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date range: {str(e)}")
+    return {"workouts": workouts}
+
+@app.get("/api/workouts/streak")
+async def get_workout_streak(user_id: str = DEFAULT_USER):
+    summary = await run_in_threadpool(workout_store.summary, user_id)
+    return {"streak": summary["current_streak"], "longest_streak": summary["longest_streak"]}
+
+@app.get("/api/workouts/summary")
+async def get_workout_summary(user_id: str = DEFAULT_USER):
+    """Streaks and rolling 7/30-day totals, maintained incrementally as workouts are logged or deleted"""
+    return await run_in_threadpool(workout_store.summary, user_id)
+
+@app.delete("/api/workouts/{workout_id}")
+async def delete_workout(workout_id: int, user_id: str = DEFAULT_USER):
+    workout = await run_in_threadpool(workout_store.delete, workout_id, user_id)
+    if workout is None:
+        raise HTTPException(status_code=404, detail="Workout not found")
+    return {"message": "Workout deleted successfully", "workout": workout}
+
+@app.post("/api/workouts/import")
+async def import_workouts(file: Optional[UploadFile] = File(None), user_id: str = DEFAULT_USER):
+    """Bulk-import a workout_log.json upload, or the bundled backend/workout_log.json when no file is sent"""
+    try:
+        if file is None:
+            imported = await run_in_threadpool(workout_store.import_json, WORKOUT_LOG_PATH, user_id)
+        else:
+            entries = json.loads(await file.read())
+            imported = await run_in_threadpool(workout_store.add_many, entries, user_id)
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid workout log: {str(e)}")
+    return {"message": f"Imported {imported} workouts", "imported": imported}
+
 @app.post("/api/predict-weight")
 async def predict_weight(request: WeightPredictionRequest):
     """Predict weight for 1, 2, and 6 months based on user data and goal"""
-    bmr = 10 * request.weight_kg + 6.25 * request.height_cm - 5 * request.age
-    bmr += 5 if request.gender.lower() == "male" else -161
-    activity_multipliers = {
-        "Sedentary": 1.2,
-        "Lightly active": 1.375,
-        "Moderately active": 1.55,
-        "Very active": 1.725,
-        "Super active": 1.9
-    }
-    tdee = bmr * activity_multipliers.get(request.activity_level, 1.2)
-    # Assume a moderate, safe rate: 0.5 kg/week (lose) or 0.25 kg/week (gain)
-    if request.goal_type == "lose":
-        weekly_kg = 0.5
-        sign = -1
-    else:
-        # If not 'lose', default to no weight change or raise error
-        weekly_kg = 0
-        sign = 0
-    calories_per_kg = 7700
-    daily_calorie_change = (weekly_kg * calories_per_kg) / 7
-    def predict_weight_for_days(days):
-        weight_change = sign * (daily_calorie_change * days) / calories_per_kg
-        return round(request.weight_kg + weight_change, 2)
+    # Scalar closed form: a one-profile DataFrame would cost ~70x more and pull in pandas
+    plan = linear_weight_plan(
+        request.weight_kg, request.height_cm, request.age, request.gender, request.activity_level, request.goal_type
+    )
+    tdee = plan["tdee"]
     protein = request.weight_kg * 2
     fat = request.weight_kg * 0.8
     carbs = (tdee - (protein * 4 + fat * 9)) / 4
     return {
         "predictions": {
-            "1_month": predict_weight_for_days(30),
-            "2_months": predict_weight_for_days(60),
-            "6_months": predict_weight_for_days(180)
+            "1_month": round(request.weight_kg + plan["daily_change_kg"] * 30, 2),
+            "2_months": round(request.weight_kg + plan["daily_change_kg"] * 60, 2),
+            "6_months": round(request.weight_kg + plan["daily_change_kg"] * 180, 2)
         },
         "macros": {
             "protein": round(protein, 1),
             "fat": round(fat, 1),
             "carbs": round(carbs, 1)
         },
-        "daily_calories": round(tdee + sign * daily_calorie_change),
+        "daily_calories": round(plan["daily_calories"]),
         "tdee": round(tdee)
     }
 
+@app.post("/api/predict-weight/batch")
+async def predict_weight_batch(request: WeightProjectionRequest):
+    """Daily weight trajectories for a whole cohort in one vectorized pass"""
+    if not 1 <= request.days <= WEIGHT_PROJECTION_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {WEIGHT_PROJECTION_MAX_DAYS}")
+    if request.step_days < 1:
+        raise HTTPException(status_code=400, detail="step_days must be positive")
+    if not request.profiles:
+        raise HTTPException(status_code=400, detail="profiles must not be empty")
+    if len(request.profiles) > WEIGHT_PROJECTION_MAX_PROFILES:
+        raise HTTPException(status_code=413, detail=f"At most {WEIGHT_PROJECTION_MAX_PROFILES} profiles per batch")
+    # Normalized the way project_weights reads it, so "Lose" is accepted here too
+    goals = [normalize_goal(p.goal_type) for p in request.profiles]
+    unknown_goals = set(goals) - set(GOAL_SIGNS)
+    if unknown_goals:
+        raise HTTPException(status_code=400, detail=f"Unsupported goal_type {sorted(unknown_goals)}, expected one of {list(GOAL_SIGNS)}")
+
+    profiles = pd.DataFrame([p.model_dump() for p in request.profiles], columns=list(WeightProjectionProfile.model_fields))
+    profiles["goal_type"] = goals
+    projection = await run_in_threadpool(weight_projection.project_weights, profiles, request.days, request.adaptive)
+    # Every step_days-th day, always ending on the last day even when step_days does not divide days
+    sampled_days = list(range(0, request.days + 1, request.step_days))
+    if sampled_days[-1] != request.days:
+        sampled_days.append(request.days)
+    trajectory = np.round(projection["trajectory"][:, sampled_days].astype(np.float64), 2)
+    return {
+        "days": request.days,
+        "step_days": request.step_days,
+        "trajectory_days": sampled_days,
+        "adaptive": request.adaptive,
+        "projections": [
+            {
+                "tdee": round(float(tdee)),
+                "daily_calories": round(float(calories)),
+                "final_weight": round(float(final), 2),
+                "trajectory": weights.tolist()
+            }
+            for tdee, calories, final, weights in zip(
+                projection["tdee"], projection["daily_calories"], projection["trajectory"][:, -1], trajectory
+            )
+        ]
+    }
+
 # Calorie Calculation Endpoints
 @app.post("/api/calculate-calories")
 async def calculate_calories(request: CalorieCalculationRequest):
     """Calculate calories burned during exercise"""
     
-    if request.heart_rate and request.exercise_type in ["Jogging", "Cycling"]:
-        # Heart rate-based calculation
-        if request.gender == "Male":
-            calories = ((-55.0969 + (0.6309 * request.heart_rate) + 
-                        (0.1988 * request.weight_kg) + (0.2017 * request.age)) / 4.184) * request.duration_mins
-        else:
-            calories = ((-20.4022 + (0.4472 * request.heart_rate) - 
-                        (0.1263 * request.weight_kg) + (0.074 * request.age)) / 4.184) * request.duration_mins
-    else:
-        # MET-based calculation
-        met_values = {
-            "Jogging": 10,
-            "Cycling": 8,
-            "Weight Lifting": {
-                "Light Effort": 3,
-                "Moderate Effort": 4.5,
-                "Vigorous Effort": 6
-            },
-            "Swimming": {
-                "Leisurely swimming": 6,
-                "Backstroke": 4.8,
-                "Breaststroke": 5.3,
-                "Freestyle (slow)": 5.8,
-                "Freestyle (moderate)": 8.3,
-                "Freestyle (fast)": 9.8,
-                "Butterfly": 13.8,
-                "Treading water (moderate)": 3.5,
-                "Treading water (vigorous)": 7,
-            }
-        }
-        
-        if request.exercise_type == "Weight Lifting":
-            met = met_values[request.exercise_type].get(request.intensity, 4.5)
-        elif request.exercise_type == "Swimming":
-            met = met_values[request.exercise_type].get(request.swimming_style, 6)
-        else:
-            met = met_values.get(request.exercise_type, 5)
-        
-        calories = met * request.weight_kg * (request.duration_mins / 60)
+    calories, _ = session_calories(**request.model_dump())
     
     return {
-        "calories_burned": round(calories, 2),
+        "calories_burned": calories,
+        # This endpoint has always reported "heart_rate" whenever one was sent, even for exercises that
+        # fall back to MET; the batch endpoint's methods say which formula was actually used
         "method": "heart_rate" if request.heart_rate else "met",
         "weekly_plan": [
             "Mon/Wed/Fri: Full-body training",
@@ -323,6 +686,38 @@ async def calculate_calories(request: CalorieCalculationRequest):
         ]
     }
 
+@app.post("/api/calculate-calories/batch")
+async def calculate_calories_batch(request: CalorieBatchRequest):
+    """Calories burned for many sessions, or for every row of an uploaded fitness-tracker dataset"""
+    if (request.sessions is None) == (request.dataset_id is None):
+        raise HTTPException(status_code=400, detail="Provide either sessions or a dataset_id")
+    if request.sessions is not None:
+        if len(request.sessions) > CALORIE_BATCH_MAX_SESSIONS:
+            raise HTTPException(status_code=413, detail=f"At most {CALORIE_BATCH_MAX_SESSIONS} sessions per batch")
+        sessions = pd.DataFrame([s.model_dump() for s in request.sessions], columns=list(calorie_engine.SESSION_COLUMNS))
+        met_table = calorie_engine.MET_VALUES
+    else:
+        _, df = await load_dataset(None, request.dataset_id, list(calorie_engine.DATASET_COLUMNS))
+        try:
+            sessions = calorie_engine.dataset_sessions(df)
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=str(e.args[0]))
+        met_table = calorie_engine.DATASET_MET_VALUES
+
+    try:
+        estimates = await run_in_threadpool(calorie_engine.estimate_calories, sessions, met_table)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error calculating calories: {str(e)}")
+    calories = estimates["calories_burned"]
+    return {
+        "dataset_id": request.dataset_id,
+        "count": len(estimates),
+        "total_calories": round(float(calories.sum()), 2),
+        "mean_calories": round(float(calories.mean()), 2) if len(estimates) else 0.0,
+        "calories_burned": calories.tolist(),
+        "methods": estimates["method"].tolist()
+    }
+
 # Diet plan generation endpoint
 @app.post("/api/generate-diet-plan", response_model=DietPlanResponse)
 async def generate_diet_plan(request: DietPlanRequest):
@@ -331,31 +726,14 @@ async def generate_diet_plan(request: DietPlanRequest):
     """
     try:
         # Convert request to dictionary for processing
-        user_data = {
-            "name": request.name,
-            "age": request.age,
-            "gender": request.gender,
-            "height_cm": request.height_cm,
-            "weight_kg": request.weight_kg,
-            "goal_type": request.goal_type,
-            "target_weight": request.target_weight,
-            "timeline_weeks": request.timeline_weeks,
-            "allergies": request.allergies,
-            "medical_conditions": request.medical_conditions,
-            "diet_type": request.diet_type,
-            "restrictions": request.restrictions,
-            "meal_frequency": request.meal_frequency,
-            "disliked_foods": request.disliked_foods,
-            "preferred_cuisines": request.preferred_cuisines
-        }
+        user_data = diet_plan_user_data(request)
         
         # Validate required fields
-        if not all([request.name, request.age, request.height_cm, request.weight_kg, request.goal_type]):
-            raise HTTPException(status_code=400, detail="Missing required fields: name, age, height_cm, weight_kg, goal_type")
+        validate_diet_plan_request(request)
         
         # Generate diet plan using existing OpenRouter function
         diet_plan_prompt = create_diet_plan_prompt(user_data)
-        diet_plan = generate_with_openrouter(diet_plan_prompt)
+        diet_plan = await generate_with_openrouter(diet_plan_prompt, cache=True)
         
         if diet_plan.startswith("❌ Error"):
             raise HTTPException(status_code=500, detail=diet_plan)
@@ -375,310 +753,620 @@ async def generate_diet_plan(request: DietPlanRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate diet plan: {str(e)}")
 
+@app.post("/api/generate-diet-plan/stream")
+async def stream_diet_plan(request: DietPlanRequest):
+    """Stream a personalized diet plan as server-sent events while the model writes it"""
+    validate_diet_plan_request(request)
+    return openrouter_sse_response(create_diet_plan_prompt(diet_plan_user_data(request)), cache=True)
+
 # Data Analysis Endpoints
+@app.post("/api/datasets")
+async def upload_dataset(file: UploadFile = File(...)):
+    """Upload a CSV once and get a dataset_id to reuse across analysis, plot and insight requests"""
+    dataset_id, df = await register_upload(file)
+    return {
+        "dataset_id": dataset_id,
+        "rows": len(df),
+        "columns": len(df.columns),
+        "column_names": df.columns.tolist(),
+        "cached": dataset_id in datasets.dataset_cache,
+        "memory": df.attrs.get("memory")
+    }
+
+@app.get("/api/datasets/stats")
+async def dataset_cache_stats():
+    """Dataset cache occupancy and hit/miss counters, plus the on-disk column store"""
+    return {**datasets.dataset_cache.stats(), "store": await run_in_threadpool(storage.column_store.stats)}
+
 @app.post("/api/analyze-data")
-async def analyze_data(file: UploadFile = File(...)):
-    """Analyze uploaded workout data"""
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="Only CSV files are supported")
+async def analyze_data(file: UploadFile = File(None), dataset_id: str = Form(None), approximate: bool = Form(False)):
+    """Analyze uploaded workout data.
+
+    approximate=true profiles with streaming sketches in bounded memory and reports their error bounds.
+    Uploads profiled that way are not stored, so their response carries no dataset_id; later requests
+    send the file again.
+    """
+    if file is not None and not (dataset_id and (dataset_id in datasets.dataset_cache or dataset_id in storage.column_store)):
+        require_csv_upload(file)
+        # Large (or explicitly approximate) uploads are profiled chunk by chunk instead of being parsed into one DataFrame
+        if approximate or ingest.upload_size(file.file) > STREAMING_PROFILE_THRESHOLD_BYTES:
+            dataset_id = await run_in_threadpool(datasets.compute_dataset_id_from_file, file.file)
+            if dataset_id not in datasets.dataset_cache and dataset_id not in storage.column_store:
+                try:
+                    return await run_in_threadpool(ingest.profile_csv_upload, file.file, ingest.CSV_CHUNK_ROWS, approximate)
+                except Exception as e:
+                    raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+    dataset_id, df = await load_dataset(file, dataset_id)
     
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        
-        # Basic analysis
-        analysis = {
-            "rows": len(df),
-            "columns": len(df.columns),
-            "column_names": df.columns.tolist(),
-            "data_types": df.dtypes.astype(str).to_dict(),
-            "missing_values": df.isnull().sum().to_dict(),
-            "summary_stats": df.describe().to_dict() if len(df.select_dtypes(include=[np.number]).columns) > 0 else {},
-            "sample_data": df.head(5).to_dict('records')
-        }
-        
-        return analysis
+        analysis = await run_in_threadpool(ingest.profile_dataframe, df, approximate)
+        return {"dataset_id": dataset_id, **analysis}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
 
+PLOT_CACHE_CONTROL = "private, no-cache"
+GRAPH_TYPES = ("Line", "Scatter", "Bar", "Histogram", "Box")
+
+def validate_plot_config(df: "pd.DataFrame", config: Dict[str, Any], dataset_id: Optional[str] = None):
+    """Reject plot configs that reference unknown columns or cannot be drawn"""
+    x_axis, y_axis = config["x_axis"], config["y_axis"]
+    if config["graph_type"] not in GRAPH_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported graph_type '{config['graph_type']}', expected one of {list(GRAPH_TYPES)}")
+    if config["stat_mode"] not in aggregation.STAT_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported stat_mode '{config['stat_mode']}', expected one of {list(aggregation.STAT_MODES)}")
+    max_points = config["max_points"]
+    if not isinstance(max_points, int) or (max_points != 0 and not MIN_POINTS <= max_points <= MAX_POINTS_LIMIT):
+        raise HTTPException(status_code=400, detail=f"max_points must be 0 (no downsampling) or between {MIN_POINTS} and {MAX_POINTS_LIMIT}")
+    if config["format"] not in PLOT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{config['format']}', expected one of {list(PLOT_FORMATS)}")
+    if not isinstance(config["dpi"], int) or not PLOT_DPI_RANGE[0] <= config["dpi"] <= PLOT_DPI_RANGE[1]:
+        raise HTTPException(status_code=400, detail=f"dpi must be between {PLOT_DPI_RANGE[0]} and {PLOT_DPI_RANGE[1]}")
+    if x_axis not in df.columns or y_axis not in df.columns:
+        available = storage.column_store.column_names(dataset_id) if dataset_id in storage.column_store else list(df.columns)
+        raise HTTPException(status_code=400, detail=f"Invalid column names: x_axis='{x_axis}', y_axis='{y_axis}', available={available}")
+    x_dtype = df[x_axis].dtype
+    # Parsed uploads store text as categoricals (schema_registry), which count as categorical here too
+    if config["graph_type"] == "Bar" and not (
+        pd.api.types.is_object_dtype(x_dtype) or isinstance(x_dtype, pd.CategoricalDtype) or df[x_axis].nunique() < 50
+    ):
+        raise HTTPException(status_code=400, detail="Bar chart requires categorical X-axis")
+
+async def build_plot_response(
+    request: Request,
+    file: Optional[UploadFile],
+    dataset_id: Optional[str],
+    config: Dict[str, Any],
+    binary: bool = False
+):
+    """Serve a plot from the rendered-plot cache, rendering it on a miss, with ETag revalidation.
+
+    binary=True sends the raw image bytes with their content type instead of a base64 data URL in JSON.
+    """
+    config = normalize_plot_config(config)
+    if not config["x_axis"] or not config["y_axis"]:
+        raise HTTPException(status_code=400, detail="x_axis and y_axis are required")
+    if_none_match = request.headers.get("if-none-match")
+    # A known dataset_id lets us answer a revalidation without touching the dataset at all
+    if dataset_id:
+        etag = f'"{plot_cache_key(dataset_id, config)}"'
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": PLOT_CACHE_CONTROL})
+    dataset_id, df = await load_dataset(file, dataset_id, plot_columns(config))
+    cache_key = plot_cache_key(dataset_id, config)
+    etag = f'"{cache_key}"'
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": PLOT_CACHE_CONTROL})
+    image = plot_cache.get(cache_key)
+    if image is None:
+        try:
+            validate_plot_config(df, config, dataset_id)
+            image = await plotting.plot_renderer.render(df, config)
+        except HTTPException:
+            raise
+        except plotting.PlotQueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except plotting.PlotTimeout as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error generating plot: {str(e)}")
+        plot_cache.put(cache_key, image)
+    headers = {"ETag": etag, "Cache-Control": PLOT_CACHE_CONTROL}
+    media_type = PLOT_FORMATS[config["format"]]
+    if binary:
+        return Response(content=image, media_type=media_type, headers=headers)
+    plot_base64 = base64.b64encode(image).decode()
+    return JSONResponse({"plot": f"data:{media_type};base64,{plot_base64}"}, headers=headers)
+
 @app.post("/api/generate-plot")
-async def generate_plot(file: UploadFile = File(...), plot_config: str = Form(None)):
+async def generate_plot(request: Request, file: UploadFile = File(None), plot_config: str = Form(None), dataset_id: str = Form(None)):
     """Generate plot from uploaded data"""
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="Only CSV files are supported")
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        df.columns = df.columns.str.strip()
         config = json.loads(plot_config) if plot_config else {}
-        x_axis = config.get('x_axis')
-        y_axis = config.get('y_axis')
-        graph_type = config.get('graph_type', 'Line')
-        legend_attr = config.get('legend_attr')
-        stat_mode = config.get('stat_mode', 'Sum')
-        if x_axis: x_axis = x_axis.strip()
-        if y_axis: y_axis = y_axis.strip()
-        if legend_attr: legend_attr = legend_attr.strip()
-        if not x_axis or not y_axis:
-            raise HTTPException(status_code=400, detail="x_axis and y_axis are required")
-        if x_axis not in df.columns or y_axis not in df.columns:
-            raise HTTPException(status_code=400, detail=f"Invalid column names: x_axis='{x_axis}', y_axis='{y_axis}', available={list(df.columns)}")
-        plt.figure(figsize=(10, 6))
-        # Helper for aggregation
-        def aggregate(grouped):
-            if stat_mode == "Sum":
-                return grouped.sum().reset_index()
-            elif stat_mode == "Mean":
-                return grouped.mean().reset_index()
-            elif stat_mode == "Median":
-                return grouped.median().reset_index()
-            else:
-                return grouped.sum().reset_index()
-        if graph_type == "Line":
-            if legend_attr and legend_attr in df.columns:
-                for val in df[legend_attr].unique():
-                    subset = df[df[legend_attr] == val]
-                    grouped = subset.groupby(x_axis)[y_axis]
-                    agg = aggregate(grouped)
-                    plt.plot(agg[x_axis], agg[y_axis], label=str(val))
-                plt.legend(title=legend_attr)
-            else:
-                grouped = df.groupby(x_axis)[y_axis]
-                agg = aggregate(grouped)
-                plt.plot(agg[x_axis], agg[y_axis])
-        elif graph_type == "Scatter":
-            if legend_attr and legend_attr in df.columns:
-                for val in df[legend_attr].unique():
-                    subset = df[df[legend_attr] == val]
-                    grouped = subset.groupby(x_axis)[y_axis]
-                    agg = aggregate(grouped)
-                    plt.scatter(agg[x_axis], agg[y_axis], label=str(val))
-                plt.legend(title=legend_attr)
-            else:
-                grouped = df.groupby(x_axis)[y_axis]
-                agg = aggregate(grouped)
-                plt.scatter(agg[x_axis], agg[y_axis])
-        elif graph_type == "Bar":
-            if df[x_axis].dtype == 'object' or df[x_axis].nunique() < 50:
-                if legend_attr and legend_attr in df.columns:
-                    grouped = df.groupby([x_axis, legend_attr])[y_axis]
-                    agg = aggregate(grouped)
-                    pivot = agg.pivot(index=x_axis, columns=legend_attr, values=y_axis).fillna(0)
-                    x_vals = list(pivot.index)
-                    legend_vals = list(pivot.columns)
-                    x_indices = np.arange(len(x_vals))
-                    bar_width = 0.8 / max(len(legend_vals), 1)
-                    for i, lval in enumerate(legend_vals):
-                        y = pivot[lval].values
-                        plt.bar(x_indices + i*bar_width, y, width=bar_width, label=str(lval))
-                    plt.xticks(x_indices + bar_width*(len(legend_vals)-1)/2, x_vals, rotation=45)
-                    plt.legend(title=legend_attr)
-                else:
-                    grouped = df.groupby(x_axis)[y_axis]
-                    agg = aggregate(grouped)
-                    plt.bar(agg[x_axis], agg[y_axis])
-                    plt.xticks(rotation=45)
-            else:
-                raise HTTPException(status_code=400, detail="Bar chart requires categorical X-axis")
-        elif graph_type == "Histogram":
-            if legend_attr and legend_attr in df.columns:
-                for val in df[legend_attr].unique():
-                    subset = df[df[legend_attr] == val]
-                    plt.hist(subset[y_axis], bins=20, alpha=0.6, label=str(val))
-                plt.legend(title=legend_attr)
-            else:
-                plt.hist(df[y_axis], bins=20)
-        elif graph_type == "Box":
-            plt.boxplot(df[y_axis])
-            plt.xticks([1], [y_axis])
-        plt.xlabel(x_axis)
-        plt.ylabel(y_axis)
-        plt.title(f"{graph_type} Plot of {y_axis} vs {x_axis} ({stat_mode})")
-        plt.tight_layout()
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        plot_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
-        return {"plot": f"data:image/png;base64,{plot_base64}"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error generating plot: {str(e)}")
+    return await build_plot_response(request, file, dataset_id, config)
 
-# AI Integration Endpoints
-@app.post("/api/ai-insights")
-async def generate_ai_insights(request: AIInsightRequest):
-    """Generate AI insights using OpenRouter"""
+@app.get("/api/generate-plot")
+async def get_plot(
+    request: Request,
+    dataset_id: str,
+    x_axis: str,
+    y_axis: str,
+    graph_type: str = "Line",
+    legend_attr: Optional[str] = None,
+    stat_mode: str = "Sum",
+    max_points: Optional[int] = None,
+    format: str = "png",
+    dpi: Optional[int] = None
+):
+    """Generate plot for an uploaded dataset; cacheable by the browser via ETag/If-None-Match"""
+    config = {
+        "x_axis": x_axis,
+        "y_axis": y_axis,
+        "graph_type": graph_type,
+        "legend_attr": legend_attr,
+        "stat_mode": stat_mode,
+        "max_points": max_points,
+        "format": format,
+        "dpi": dpi
+    }
+    return await build_plot_response(request, None, dataset_id, config)
+
+@app.post("/api/generate-plot/image")
+async def generate_plot_image(request: Request, file: UploadFile = File(None), plot_config: str = Form(None), dataset_id: str = Form(None)):
+    """Generate plot from uploaded data and return the raw image bytes"""
     try:
-        insights = generate_with_openrouter(request.prompt)
-        return {"insights": insights}
+        config = json.loads(plot_config) if plot_config else {}
     except Exception as e:
-        return {"error": f"AI service error: {str(e)}"}
+        raise HTTPException(status_code=400, detail=f"Error generating plot: {str(e)}")
+    return await build_plot_response(request, file, dataset_id, config, binary=True)
 
-@app.post("/api/ai-insights/data")
-async def generate_ai_insights_from_data(file: UploadFile = File(...)):
-    """Generate AI insights from uploaded CSV data"""
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="Only CSV files are supported")
-    
+@app.get("/api/generate-plot/image")
+async def get_plot_image(
+    request: Request,
+    dataset_id: str,
+    x_axis: str,
+    y_axis: str,
+    graph_type: str = "Line",
+    legend_attr: Optional[str] = None,
+    stat_mode: str = "Sum",
+    max_points: Optional[int] = None,
+    format: str = "png",
+    dpi: Optional[int] = None
+):
+    """Raw plot image for an uploaded dataset, usable directly as an <img> src and revalidated via ETag"""
+    config = {
+        "x_axis": x_axis,
+        "y_axis": y_axis,
+        "graph_type": graph_type,
+        "legend_attr": legend_attr,
+        "stat_mode": stat_mode,
+        "max_points": max_points,
+        "format": format,
+        "dpi": dpi
+    }
+    return await build_plot_response(request, None, dataset_id, config, binary=True)
+
+async def build_series_response(file: Optional[UploadFile], dataset_id: Optional[str], config: Dict[str, Any]):
+    """Aggregate plot series as compact JSON so the client can draw the chart itself"""
+    config = normalize_plot_config(config)
+    if not config["x_axis"] or not config["y_axis"]:
+        raise HTTPException(status_code=400, detail="x_axis and y_axis are required")
+    dataset_id, df = await load_dataset(file, dataset_id, plot_columns(config))
+    validate_plot_config(df, config, dataset_id)
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        
-        # Prepare data summary for AI
-        preview = df.head(5).to_string()
-        summary = df.describe(include='all').to_string()
-        
-        # Handle correlation matrix safely
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        if len(numeric_cols) > 1:
-            correlation = df[numeric_cols].corr().to_string()
-        else:
-            correlation = "Not enough numeric columns for correlation analysis"
-        
-        missing = df.isnull().sum().to_string()
-        
-        prompt = f"""
-You are a certified Exercise Physiologist and Performance Data Specialist with advanced expertise in biomechanics, training science, and athletic performance analysis. You've spent years helping elite athletes and fitness enthusiasts optimize their training through data-driven insights.
+        series = await run_in_threadpool(aggregation.aggregate_series, df, config)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error aggregating plot series: {str(e)}")
+    series["dataset_id"] = dataset_id
+    return series
 
-**CLIENT'S WORKOUT DATA ANALYSIS**
+@app.post("/api/plot-series")
+async def generate_plot_series(file: UploadFile = File(None), plot_config: str = Form(None), dataset_id: str = Form(None)):
+    """Aggregated plot series for uploaded data, without server-side image rendering"""
+    try:
+        config = json.loads(plot_config) if plot_config else {}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error aggregating plot series: {str(e)}")
+    return await build_series_response(file, dataset_id, config)
 
-**RAW PERFORMANCE DATA:**
-{preview}
+@app.get("/api/plot-series")
+async def get_plot_series(
+    dataset_id: str,
+    x_axis: str,
+    y_axis: str,
+    graph_type: str = "Line",
+    legend_attr: Optional[str] = None,
+    stat_mode: str = "Sum",
+    max_points: Optional[int] = None
+):
+    """Aggregated plot series for an uploaded dataset"""
+    config = {
+        "x_axis": x_axis,
+        "y_axis": y_axis,
+        "graph_type": graph_type,
+        "legend_attr": legend_attr,
+        "stat_mode": stat_mode,
+        "max_points": max_points
+    }
+    return await build_series_response(None, dataset_id, config)
 
-**PHYSIOLOGICAL METRICS SUMMARY:**
-{summary}
+@app.get("/api/plots/stats")
+async def plot_cache_stats():
+    """Rendered-plot cache occupancy and hit/miss counters"""
+    return plot_cache.stats()
 
-**MOVEMENT PATTERN CORRELATIONS:**
-{correlation}
+def replay_dataset_appends(dataset_id: str, target):
+    """Fold rows appended through any worker (or before target was last rebuilt) into a cube or cohort index.
 
-**DATA INTEGRITY ASSESSMENT:**
-{missing}
+    Appends are read back from the column store, so a restarted or later worker sees every one of them.
+    """
+    with target.log_lock:
+        for seq in storage.column_store.appended(dataset_id, target.log_seq):
+            target.append(storage.column_store.load_append(dataset_id, seq), seq)
 
-**YOUR EXPERT ANALYSIS APPROACH:**
+async def load_cube(dataset_id: str):
+    """The dataset's rollup cube, built from the cached DataFrame on first use and kept up to date with appends"""
+    cube = cubes.cube_registry.get(dataset_id)
+    if cube is None:
+        _, df = await load_dataset(None, dataset_id)
+        try:
+            cube = await run_in_threadpool(cubes.cube_registry.build, dataset_id, df)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error building cube: {str(e)}")
+    try:
+        await run_in_threadpool(replay_dataset_appends, dataset_id, cube)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error replaying cube appends: {str(e)}")
+    return cube
 
-As their performance analyst, conduct a comprehensive evaluation of their training data using your deep understanding of exercise science. Your analysis should reveal the story their body is telling through the numbers.
+@app.post("/api/cube/query")
+async def query_cube(request: CubeQueryRequest):
+    """Grouped Count/Sum/Mean/Variance/Min/Max answered from the precomputed cube"""
+    cube = await load_cube(request.dataset_id)
+    started = time.perf_counter()
+    try:
+        cells = cube.query(request.measure, request.stat, request.group_by, request.filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "dataset_id": request.dataset_id,
+        "measure": request.measure,
+        "stat": request.stat,
+        "group_by": request.group_by,
+        "filters": request.filters,
+        "cells": cells,
+        "query_time_us": round((time.perf_counter() - started) * 1e6, 1)
+    }
 
-**DELIVER YOUR PROFESSIONAL ASSESSMENT:**
+@app.get("/api/cube/{dataset_id}")
+async def describe_cube(dataset_id: str):
+    cube = await load_cube(dataset_id)
+    return {"dataset_id": dataset_id, **cube.describe()}
 
-**🔬 PERFORMANCE INTELLIGENCE FINDINGS**
-Identify 3 critical discoveries from their data that reveal:
-- **Training Adaptation Patterns**: How their body is responding to stimulus over time
-- **Performance Bottlenecks**: What's limiting their progress or creating plateaus
-- **Recovery & Overload Signatures**: Signs of optimal training stress vs. potential overreaching
+@app.post("/api/cube/{dataset_id}/append")
+async def append_to_cube(dataset_id: str, file: UploadFile = File(...)):
+    """Fold newly appended CSV rows into an existing cube incrementally.
 
-For each finding, explain:
-- The physiological significance ("This pattern indicates...")
-- Why it matters for their goals ("This means your body is...")
-- The timeline/progression you observe ("Over the past X weeks...")
+    The rows are stored next to the dataset in the column store, so every worker's cube (and any
+    cube rebuilt later, even after a restart) folds them in too.
+    """
+    require_csv_upload(file)
+    cube = await load_cube(dataset_id)
+    try:
+        df = await run_in_threadpool(ingest.read_csv_upload, file.file)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+    missing = cube.missing_columns(df)
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Appended rows are missing columns: {missing}")
+    try:
+        await run_in_threadpool(storage.column_store.append, dataset_id, df)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dataset not found, please upload the file again")
+    cube = await load_cube(dataset_id)
+    return {"dataset_id": dataset_id, "appended_rows": len(df), "rows": cube.rows}
 
-**⚡ EVIDENCE-BASED OPTIMIZATION STRATEGIES**
-Provide 3 data-driven interventions that will maximize their results:
-- **Training Variable Adjustments**: Specific modifications to volume, intensity, or frequency
-- **Recovery Protocol Enhancements**: Targeted strategies based on their fatigue patterns  
-- **Progressive Overload Refinements**: How to manipulate training stress for continued adaptation
+reference_dataset_id: Optional[str] = None
 
-Each recommendation should include:
-- The scientific rationale ("Research shows that...")
-- Expected timeline for results ("You should see changes within...")
-- Measurable success metrics ("Track improvement by monitoring...")
+def register_reference_dataset() -> str:
+    """Store the reference CSV in the column store (once per content hash) and return its dataset_id"""
+    with open(COHORT_REFERENCE_CSV, 'rb') as f:
+        dataset_id = datasets.compute_dataset_id_from_file(f)
+        if dataset_id not in storage.column_store:
+            storage.column_store.save(dataset_id, ingest.read_csv_upload(f))
+    return dataset_id
 
-**📊 VISUAL PERFORMANCE ANALYTICS**
-Recommend 2 powerful data visualizations that will unlock deeper insights:
-- **Primary Analysis Chart**: The most revealing visualization for their specific training pattern
-- **Tracking Dashboard Visual**: The best ongoing monitoring tool for their goals
+async def load_cohort_index(dataset_id: Optional[str]):
+    """(dataset_id, cohort index), defaulting to the reference dataset; built on first use and kept up to date with appends"""
+    global reference_dataset_id
+    if not dataset_id:
+        # Stored again if the column store evicted it
+        if reference_dataset_id is None or reference_dataset_id not in storage.column_store:
+            try:
+                reference_dataset_id = await run_in_threadpool(register_reference_dataset)
+            except OSError as e:
+                raise HTTPException(status_code=503, detail=f"Reference dataset unavailable: {str(e)}")
+        dataset_id = reference_dataset_id
+    index = cohorts.cohort_registry.get(dataset_id)
+    if index is None:
+        _, df = await load_dataset(None, dataset_id)
+        try:
+            index = await run_in_threadpool(cohorts.cohort_registry.build, dataset_id, df)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error building cohort index: {str(e)}")
+    try:
+        await run_in_threadpool(replay_dataset_appends, dataset_id, index)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error replaying dataset appends: {str(e)}")
+    return dataset_id, index
 
-For each visualization, specify:
-- What metrics to plot and why
-- What patterns to look for
-- How to interpret the results for training decisions
+@app.get("/api/cohorts")
+async def describe_cohorts(dataset_id: Optional[str] = None):
+    """Metrics, age bands and cohort sizes of a dataset's cohort index (the reference dataset by default)"""
+    dataset_id, index = await load_cohort_index(dataset_id)
+    return {"dataset_id": dataset_id, **index.describe()}
 
-**PROFESSIONAL DELIVERY STANDARDS:**
-- Use exercise science terminology appropriately ("VO2 kinetics", "neuromuscular adaptation", "periodization")
-- Reference training principles when relevant ("progressive overload", "specificity", "supercompensation")
-- Provide confidence levels for your insights ("The data strongly suggests...", "There's a moderate indication that...")
-- Include practical implementation timelines
-- Address potential confounding factors in the data
-- Suggest follow-up metrics to track
+@app.post("/api/cohorts/percentiles")
+async def cohort_percentiles(request: CohortPercentileRequest):
+    """Where each user ranks on each metric among people of the same gender, age band and workout type"""
+    if len(request.users) > COHORT_BATCH_MAX_USERS:
+        raise HTTPException(status_code=413, detail=f"At most {COHORT_BATCH_MAX_USERS} users per batch")
+    dataset_id, index = await load_cohort_index(request.dataset_id)
+    unknown = sorted({m for u in request.users for m in u.metrics} - set(index.metrics))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown metrics {unknown}, expected some of {index.metrics}")
+    users = [u.model_dump() for u in request.users]
+    started = time.perf_counter()
+    if len(users) <= COHORT_INLINE_MAX_USERS:
+        results = index.percentiles(users)
+    else:
+        results = await run_in_threadpool(index.percentiles, users)
+    return {
+        "dataset_id": dataset_id,
+        "results": results,
+        "query_time_us": round((time.perf_counter() - started) * 1e6, 1)
+    }
 
-**YOUR ANALYTICAL VOICE:**
-- Speak with scientific authority while remaining accessible
-- Use evidence-based language ("The data indicates...", "Analysis reveals...")
-- Provide context for why certain metrics matter
-- Balance technical precision with practical application
-- Show enthusiasm for the insights discovered ("This is particularly interesting because...")
+@app.post("/api/cohorts/{dataset_id}/append")
+async def append_to_cohorts(dataset_id: str, file: UploadFile = File(...)):
+    """Merge newly added CSV rows into the cohorts they belong to, leaving every other cohort untouched.
 
-Remember: You're not just reporting numbers—you're translating complex physiological data into actionable intelligence that will transform their training effectiveness. Make them feel like they have a world-class performance team analyzing their every rep.
-"""
-        
-        insights = generate_with_openrouter(prompt)
+    Like cube appends, the rows are stored next to the dataset in the column store, so every worker's
+    cohort index and rollup cube picks them up.
+    """
+    require_csv_upload(file)
+    _, index = await load_cohort_index(dataset_id)
+    try:
+        df = await run_in_threadpool(ingest.read_csv_upload, file.file)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+    # Every column of the dataset, so the rollup cube can fold the same rows in as well
+    missing = [c for c in storage.column_store.column_names(dataset_id) if c not in df.columns]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Appended rows are missing columns: {missing}")
+    try:
+        await run_in_threadpool(storage.column_store.append, dataset_id, df)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dataset not found, please upload the file again")
+    _, index = await load_cohort_index(dataset_id)
+    return {"dataset_id": dataset_id, "appended_rows": len(df), "rows": index.rows}
+
+# AI Integration Endpoints
+@app.post("/api/ai-insights")
+async def generate_ai_insights(request: AIInsightRequest):
+    """Generate AI insights using OpenRouter"""
+    try:
+        insights = await generate_with_openrouter(request.prompt)
+        return {"insights": insights}
+    except Exception as e:
+        return {"error": f"AI service error: {str(e)}"}
+
+@app.post("/api/ai-insights/stream")
+async def stream_ai_insights(request: AIInsightRequest):
+    """Stream AI insights as server-sent events"""
+    return openrouter_sse_response(request.prompt)
+
+@app.post("/api/ai-insights/data")
+async def generate_ai_insights_from_data(file: UploadFile = File(None), dataset_id: str = Form(None)):
+    """Generate AI insights from uploaded CSV data"""
+    dataset_id, df = await load_dataset(file, dataset_id)
+    
+    try:
+        prompt = await run_in_threadpool(create_data_insights_prompt, df)
+        insights = await generate_with_openrouter(prompt, cache=True)
         return {"insights": insights}
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
 
+@app.get("/api/llm-cache/stats")
+async def llm_cache_stats():
+    """LLM response cache size and hit/miss/coalesced counters"""
+    return llm_cache.stats()
+
 # Personalized Workout Plan Endpoints
 @app.post("/api/personalized-workout")
 async def generate_personalized_workout(request: PersonalizedWorkoutRequest):
     """Generate personalized workout plan using AI"""
     
-    prompt = f"""
-You are an experienced, certified personal trainer with 10+ years of coaching clients to achieve their fitness goals. You're known for creating realistic, sustainable programs that get results while keeping clients motivated and injury-free.
+    prompt = create_personalized_workout_prompt(request)
+    
+    try:
+        workout_plan = await generate_with_openrouter(prompt, cache=True)
+        return {"workout_plan": workout_plan}
+    except Exception as e:
+        return {"error": f"Error generating workout plan: {str(e)}"}
 
-**CLIENT PROFILE:**
-- Goal: {request.decision} {request.aim} kg in {request.days} days
-- Current Weight: {request.current_weight} kg  
-- Demographics: {request.gender}, {request.age} years old
-- Available Training Time: {request.exercise_hours} minutes per session
-- Training Frequency: {request.days_per_week} days per week
-- Preferred Workout Style: {request.workout_type}
-- Current Fitness Level: {request.fitness_level}
-- Equipment Access: {request.gym_access}
-- Physical Limitations: {request.injuries}
+@app.post("/api/personalized-workout/stream")
+async def stream_personalized_workout(request: PersonalizedWorkoutRequest):
+    """Stream a personalized workout plan as server-sent events while the model writes it"""
+    return openrouter_sse_response(create_personalized_workout_prompt(request), cache=True)
 
-**YOUR COACHING APPROACH:**
+# Background Job Endpoints
+async def run_llm_text_job(prompt: str, field: str) -> Dict[str, Any]:
+    text = await generate_with_openrouter(prompt, cache=True)
+    if text.startswith("❌ Error"):
+        raise RuntimeError(text)
+    return {field: text}
 
-As their dedicated trainer, create a comprehensive {request.days}-day transformation program that speaks directly to them. Use your professional expertise to:
+def job_accepted_response(job: Job) -> JSONResponse:
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job.id, "status": job.status, "status_url": f"/api/jobs/{job.id}"},
+        headers={"Location": f"/api/jobs/{job.id}"}
+    )
 
-**STRUCTURE YOUR PROGRAM LIKE A TRUE COACH:**
-1. **Opening Assessment & Motivation** - Address their specific goal with encouragement and realistic expectations
-2. **Progressive Training Philosophy** - Explain your methodology for their success
-3. **Daily Workout Breakdown** - Design each day with purpose and progression
+async def submit_job(kind: str, run) -> JSONResponse:
+    try:
+        return job_accepted_response(await job_queue.submit(kind, run))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-**FOR EACH TRAINING DAY, PROVIDE:**
-- **Pre-Workout Prep** (5-10 min dynamic warm-up specific to the day's focus)
-- **Main Training Block** with:
-  - Exercise selection with clear rationale
-  - Precise sets × reps × rest periods
-  - Weight/intensity recommendations based on their level
-  - Form cues and safety reminders
-  - Progression markers ("Increase weight when you can complete all sets with 2 reps in reserve")
-- **Recovery Protocol** (cool-down, stretching, mobility work)
-- **Coach's Daily Note** (motivation, what to expect, key focus points)
+@app.post("/api/jobs/diet-plan", status_code=202)
+async def submit_diet_plan_job(request: DietPlanRequest):
+    """Queue diet plan generation and return a job ID immediately"""
+    validate_diet_plan_request(request)
 
-**COACHING PRINCIPLES TO FOLLOW:**
-- Speak with authority and confidence, but remain encouraging
-- Adjust intensity appropriately for age, gender, and fitness level
-- Build in progressive overload while respecting their limitations
-- Include recovery strategies and injury prevention
-- Address both physical and mental aspects of their journey
-- Provide alternatives for exercises when needed
-- Give them checkpoints to assess progress
+    async def run():
+        response = await generate_diet_plan(request)
+        return response.model_dump()
+    return await submit_job("diet-plan", run)
 
-**DELIVERY STYLE:**
-- Use direct, motivational coaching language ("Today we're focusing on...", "Your mission is...", "By the end of this week, you'll feel...")
-- Include specific coaching cues ("Drive through your heels", "Control the negative")
-- Add accountability measures ("Track your weights", "Rate your effort 1-10")
-- Provide troubleshooting tips for common challenges
+@app.post("/api/jobs/personalized-workout", status_code=202)
+async def submit_personalized_workout_job(request: PersonalizedWorkoutRequest):
+    """Queue workout plan generation and return a job ID immediately"""
+    prompt = create_personalized_workout_prompt(request)
+    return await submit_job("personalized-workout", lambda: run_llm_text_job(prompt, "workout_plan"))
 
-Remember: You're not just giving them a workout list—you're their coach guiding them through a transformation journey. Make them feel confident, supported, and excited to start each session.
-"""
-    
+@app.post("/api/jobs/ai-insights-data", status_code=202)
+async def submit_data_insights_job(file: UploadFile = File(None), dataset_id: str = Form(None)):
+    """Queue AI insights for uploaded CSV data and return a job ID immediately"""
+    dataset_id, df = await load_dataset(file, dataset_id)
     try:
-        workout_plan = generate_with_openrouter(prompt)
-        return {"workout_plan": workout_plan}
+        prompt = await run_in_threadpool(create_data_insights_prompt, df)
     except Exception as e:
-        return {"error": f"Error generating workout plan: {str(e)}"}
+        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+    return await submit_job("ai-insights-data", lambda: run_llm_text_job(prompt, "insights"))
+
+@app.get("/api/jobs/stats")
+async def job_queue_stats():
+    """Job counts by status and worker configuration"""
+    return job_queue.stats()
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """Job status, with the result once finished. wait > 0 long-polls for up to that many seconds."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or its result has expired")
+    deadline = time.monotonic() + min(max(wait, 0), JOB_MAX_WAIT_S)
+    while not job.done and time.monotonic() < deadline:
+        await job.wait_for_change(deadline - time.monotonic())
+    return job.to_dict()
+
+@app.websocket("/ws/jobs/{job_id}")
+async def job_updates(websocket: WebSocket, job_id: str):
+    """Push job status changes until the job finishes, then close"""
+    await websocket.accept()
+    job = job_queue.get(job_id)
+    if job is None:
+        await websocket.send_json({"job_id": job_id, "status": "not_found"})
+        await websocket.close(code=1008)
+        return
+    try:
+        await websocket.send_json(job.to_dict())
+        while not job.done:
+            await job.wait_for_change()
+            await websocket.send_json(job.to_dict())
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+@app.post("/api/routes/calculate-distance")
+async def calculate_route_distance(points: List[RoutePoint]):
+    distance_km = routes.path_distance_km(
+        np.fromiter((p.latitude for p in points), dtype=np.float64, count=len(points)),
+        np.fromiter((p.longitude for p in points), dtype=np.float64, count=len(points))
+    )
+    return {"distance_km": round(distance_km, 4)}
+
+async def call_route_tracker(method, *args):
+    """Run a route tracker method, off the event loop when it reads and writes a shared state backend"""
+    if routes.route_tracker.state is None:
+        return method(*args)
+    return await run_in_threadpool(method, *args)
+
+@app.get("/api/routes/stats")
+async def route_stats():
+    return await call_route_tracker(routes.route_tracker.stats)
+
+@app.post("/api/routes/{session_id}/add-point")
+async def add_route_point(session_id: str, point: RoutePoint):
+    try:
+        stats = await call_route_tracker(
+            routes.route_tracker.add_point, session_id, point.latitude, point.longitude, point.timestamp
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid route point: {str(e)}")
+    return {"message": "Point added successfully", **stats}
+
+@app.get("/api/routes/{session_id}")
+async def get_route(session_id: str):
+    session = await call_route_tracker(routes.route_tracker.get, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Route session not found")
+    return {"points": session.points(), **session.stats()}
+
+@app.delete("/api/routes/{session_id}")
+async def clear_route(session_id: str):
+    if not await call_route_tracker(routes.route_tracker.clear, session_id):
+        raise HTTPException(status_code=404, detail="Route session not found")
+    return {"message": "Route cleared successfully"}
+
+@app.websocket("/ws/route/{session_id}")
+async def track_route(websocket: WebSocket, session_id: str):
+    """Receive GPS fixes as JSON and reply to each with the updated distance, speed and pace"""
+    await websocket.accept()
+    try:
+        while True:
+            data = await websocket.receive_json()
+            try:
+                point = RoutePoint(**data)
+                stats = await call_route_tracker(
+                    routes.route_tracker.add_point, session_id, point.latitude, point.longitude, point.timestamp
+                )
+            except (ValueError, TypeError) as e:
+                await websocket.send_json({"session_id": session_id, "error": f"Invalid route point: {str(e)}"})
+                continue
+            await websocket.send_json(stats)
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/api/subsystems")
+async def subsystems():
+    """Import time of each lazily loaded subsystem, null for those this worker has not needed yet"""
+    return subsystem_status()
+
+@app.get("/api/metrics")
+async def prometheus_metrics():
+    """Per-route latency histograms and status counts, hot-path phase timings and event-loop lag of this worker"""
+    return Response(content=metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/api/state/stats")
+async def shared_state_stats():
+    """Which shared-state backend this worker uses, and the worker's pid"""
+    return {"pid": os.getpid(), **shared_state.stats()}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # API_WORKERS=4 python main.py serves from four processes. Workers re-import this module, so the
+    # backend they share is chosen through the environment: SQLite unless explicitly set otherwise.
+    workers = int(os.getenv("API_WORKERS", "1"))
+    if workers > 1:
+        os.environ.setdefault("SHARED_STATE_BACKEND", "sqlite")
+        if os.environ["SHARED_STATE_BACKEND"] == "memory":
+            raise SystemExit("API_WORKERS > 1 needs a shared backend, set SHARED_STATE_BACKEND=sqlite")
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
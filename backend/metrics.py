@@ -0,0 +1,237 @@
+# backend/metrics.py - In-process request, hot-path phase and event-loop lag metrics in Prometheus text format
+import asyncio
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Requests that matched no route share one label, so random paths cannot blow up the series count
+UNMATCHED_ROUTE = "unmatched"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = labels + ((extra,) if extra else ())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """Fixed-bucket histogram per label set; observe() costs a bisect and two additions under a lock"""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series: Dict[Labels, List[float]] = {}  # per-bucket counts (last one is +Inf), then the sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Labels = ()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(labels)} {value}" for labels, value in snapshot)
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, value: float, labels: Labels = ()):
+        with self._lock:
+            self._values[labels] = value
+
+    def set_max(self, value: float, labels: Labels = ()):
+        with self._lock:
+            self._values[labels] = max(self._values.get(labels, value), value)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class MetricsRegistry:
+    """Every metric the API exports; one per process"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.request_duration = Histogram(
+            "http_request_duration_seconds", "Time from receiving a request to sending its last body byte, by route")
+        self.requests = Counter("http_requests_total", "Completed requests by route and status code")
+        self.in_flight = Gauge("http_requests_in_flight", "Requests currently being handled")
+        self.phase_duration = Histogram(
+            "phase_duration_seconds", "Time spent in named hot-path phases (csv_parse, groupby, render, savefig, llm_call)")
+        self.loop_lag = Histogram(
+            "event_loop_lag_seconds", "How late the event loop woke a periodic sleeper; high values mean blocking code on the loop",
+            LOOP_LAG_BUCKETS)
+        self.loop_lag_max = Gauge("event_loop_lag_max_seconds", "Largest event-loop lag seen since startup")
+        self.uptime = Gauge("process_uptime_seconds", "Seconds since this worker process started")
+        self.in_flight.set(0)
+
+    def request_started(self):
+        self.in_flight.inc()
+
+    def request_finished(self, method: str, route: str, status: int, duration_s: float):
+        self.in_flight.inc(amount=-1)
+        labels = (("method", method), ("route", route))
+        self.request_duration.observe(duration_s, labels)
+        self.requests.inc(labels + (("status", str(status)),))
+
+    def observe_loop_lag(self, lag_s: float):
+        self.loop_lag.observe(lag_s)
+        self.loop_lag_max.set_max(lag_s)
+
+    def render(self) -> str:
+        self.uptime.set(round(time.time() - self.started_at, 3))
+        lines = []
+        for metric in (self.request_duration, self.requests, self.in_flight, self.phase_duration,
+                       self.loop_lag, self.loop_lag_max, self.uptime):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# Set while a plot worker process renders, so its phase timings travel back with the image
+_captured_phases: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("captured_phases", default=None)
+
+
+def record_phase(name: str, duration_s: float):
+    captured = _captured_phases.get()
+    if captured is not None:
+        captured.append((name, duration_s))
+    else:
+        metrics.phase_duration.observe(duration_s, (("phase", name),))
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the enclosed block as one observation of a named phase"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - started)
+
+
+@contextmanager
+def capture_phases() -> Iterator[List[Tuple[str, float]]]:
+    """Collect phase timings into a list instead of this process's registry (for work done in another process)"""
+    captured: List[Tuple[str, float]] = []
+    token = _captured_phases.set(captured)
+    try:
+        yield captured
+    finally:
+        _captured_phases.reset(token)
+
+
+class LoopLagSampler:
+    """Sleeps interval_s at a time and records how much later than requested the event loop woke it up"""
+
+    def __init__(self, interval_s: float, registry: MetricsRegistry = metrics):
+        self.interval_s = interval_s
+        self.registry = registry
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None and self.interval_s > 0:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval_s)
+            self.registry.observe_loop_lag(max(loop.time() - started - self.interval_s, 0.0))
+
+
+class MetricsMiddleware:
+    """Per-route latency, status and in-flight accounting for HTTP requests.
+
+    The route label is the matched path template (scope["route"], set by the router), never the raw path.
+    Streamed responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        self.registry.request_started()
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            self.registry.request_finished(
+                scope["method"], getattr(route, "path", UNMATCHED_ROUTE), status, time.perf_counter() - started
+            )
+
+
+# METRICS_LOOP_LAG_INTERVAL_S=0 turns the sampler off
+loop_lag_sampler = LoopLagSampler(float(os.getenv("METRICS_LOOP_LAG_INTERVAL_S", "0.5")))
@@ -0,0 +1,91 @@
+# backend/openrouter_stub.py - Local stand-in for the OpenRouter chat completions API with configurable latency
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+STUB_REPLY = (
+    "Stay consistent: three strength sessions and two cardio sessions a week, "
+    "protein with every meal, and at least seven hours of sleep."
+)
+
+
+def create_stub_app(latency_s: float = 0.2, jitter_s: float = 0.0, chunks: int = 8,
+                    chunk_delay_s: float = 0.0, error_rate: float = 0.0, seed: int = 0) -> Starlette:
+    """Answer POST /v1/chat/completions after latency_s (+- jitter_s), streamed or not like the real API.
+
+    error_rate is the fraction of requests answered with HTTP 503, to exercise the client's retries.
+    """
+    rng = random.Random(seed)
+    counters = {"requests": 0, "errors": 0}
+
+    def delay() -> float:
+        return max(latency_s + rng.uniform(-jitter_s, jitter_s), 0.0)
+
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        counters["requests"] += 1
+        if rng.random() < error_rate:
+            counters["errors"] += 1
+            await asyncio.sleep(delay())
+            return JSONResponse({"error": {"message": "stub overloaded", "code": 503}}, status_code=503)
+        completion_id = f"stub-{uuid.uuid4().hex[:12]}"
+        model = payload.get("model", "stub")
+        if not payload.get("stream"):
+            await asyncio.sleep(delay())
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": STUB_REPLY}, "finish_reason": "stop"}],
+            })
+
+        async def events():
+            # latency_s is the time to the first token; chunk_delay_s spaces out the rest
+            await asyncio.sleep(delay())
+            words = STUB_REPLY.split(" ")
+            size = max(len(words) // max(chunks, 1), 1)
+            for i in range(0, len(words), size):
+                if i:
+                    await asyncio.sleep(chunk_delay_s)
+                text = " ".join(words[i:i + size]) + (" " if i + size < len(words) else "")
+                chunk = {"id": completion_id, "model": model, "choices": [{"index": 0, "delta": {"content": text}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def stats(request: Request):
+        return JSONResponse(counters)
+
+    return Starlette(routes=[
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/stats", stats),
+    ])
+
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Serve a fake OpenRouter API; point OPENROUTER_BASE_URL at http://HOST:PORT/v1")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--chunks", type=int, default=8)
+    parser.add_argument("--chunk-delay-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_stub_app(args.latency_ms / 1000, args.jitter_ms / 1000, args.chunks,
+                        args.chunk_delay_ms / 1000, args.error_rate, args.seed),
+        host=args.host, port=args.port, log_level="warning",
+    )
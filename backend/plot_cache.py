@@ -0,0 +1,108 @@
+# backend/plot_cache.py - Rendered-plot cache keyed by dataset hash plus normalized plot config
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Output formats and the content type each one is served with
+PLOT_FORMATS = {"png": "image/png", "webp": "image/webp", "svg": "image/svg+xml"}
+DEFAULT_PLOT_DPI = 150
+PLOT_DPI_RANGE = (50, 300)
+# Line/Scatter downsampling budget per series (see downsampling.py); 0 turns it off
+DEFAULT_MAX_POINTS = int(os.getenv("PLOT_MAX_POINTS", "2000"))
+MAX_POINTS_LIMIT = 100000
+# LTTB always keeps the first and last point and needs at least one bucket between them
+MIN_POINTS = 3
+
+PLOT_CONFIG_DEFAULTS = {
+    "graph_type": "Line",
+    "legend_attr": None,
+    "stat_mode": "Sum",
+    "format": "png",
+}
+
+
+def normalize_plot_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip column names and fill defaults so equivalent requests share one cache entry"""
+    normalized = {}
+    for field in ("x_axis", "y_axis", "graph_type", "legend_attr", "stat_mode", "format"):
+        value = config.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        normalized[field] = value or PLOT_CONFIG_DEFAULTS.get(field)
+    if isinstance(normalized["format"], str):
+        normalized["format"] = normalized["format"].lower()
+    # max_points=0 explicitly turns downsampling off, so it must not fall back to the default
+    for field, default in (("max_points", DEFAULT_MAX_POINTS), ("dpi", DEFAULT_PLOT_DPI)):
+        value = config.get(field)
+        try:
+            normalized[field] = default if value is None or value == "" else int(value)
+        except (TypeError, ValueError):
+            normalized[field] = value
+    return normalized
+
+
+def plot_cache_key(dataset_id: str, config: Dict[str, Any]) -> str:
+    """Stable key for a rendered plot; also used as its ETag"""
+    payload = json.dumps({"dataset_id": dataset_id, "config": config}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value covers the given ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class PlotCache:
+    """LRU cache of rendered image bytes bounded by their total size"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key: str, image: bytes):
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= len(self._entries.pop(key))
+            while self._entries and self._total_bytes + len(image) > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+                self.evictions += 1
+            self._entries[key] = image
+            self._total_bytes += len(image)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "plots": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+plot_cache = PlotCache(int(float(os.getenv("PLOT_CACHE_MAX_MB", "64")) * 1024 * 1024))
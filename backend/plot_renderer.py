@@ -0,0 +1,185 @@
+# backend/plot_renderer.py - Process-pool plot rendering with the object-oriented Figure API
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from aggregation import aggregate_series
+from metrics import capture_phases, phase, record_phase
+from plot_cache import PLOT_CONFIG_DEFAULTS, DEFAULT_PLOT_DPI
+
+
+class PlotQueueFull(Exception):
+    """Raised when too many plot renders are already queued or running"""
+
+
+class PlotTimeout(Exception):
+    """Raised when a plot render does not finish within the configured timeout"""
+
+
+def draw_series(series: Dict[str, Any]) -> Figure:
+    """Draw the output of aggregation.aggregate_series onto a new Figure"""
+    x_axis = series["x_axis"]
+    y_axis = series["y_axis"]
+    graph_type = series["graph_type"]
+    legend_attr = series["legend_attr"]
+    stat_mode = series["stat_mode"]
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    if graph_type in ("Line", "Scatter"):
+        for s in series["series"]:
+            if graph_type == "Line":
+                ax.plot(s["x"], s["y"], label=s["name"])
+            else:
+                # Grid-binned points are sized by how many rows each one stands for
+                sizes = 6 + 40 * np.sqrt(np.asarray(s["counts"]) / max(s["counts"])) if "counts" in s else None
+                ax.scatter(s["x"], s["y"], s=sizes, label=s["name"])
+        if legend_attr:
+            ax.legend(title=legend_attr)
+    elif graph_type == "Bar":
+        if legend_attr:
+            # Align every legend series on the union of x values, missing bars count as 0
+            x_vals = sorted({x for s in series["series"] for x in s["x"]})
+            x_indices = np.arange(len(x_vals))
+            position = {x: i for i, x in enumerate(x_vals)}
+            bar_width = 0.8 / max(len(series["series"]), 1)
+            for i, s in enumerate(series["series"]):
+                heights = np.zeros(len(x_vals))
+                heights[[position[x] for x in s["x"]]] = [0 if y is None else y for y in s["y"]]
+                ax.bar(x_indices + i*bar_width, heights, width=bar_width, label=s["name"])
+            ax.set_xticks(x_indices + bar_width*(len(series["series"])-1)/2)
+            ax.set_xticklabels([str(v) for v in x_vals], rotation=45)
+            ax.legend(title=legend_attr)
+        else:
+            s = series["series"][0]
+            ax.bar(s["x"], s["y"])
+            ax.tick_params(axis='x', labelrotation=45)
+    elif graph_type == "Histogram":
+        edges = series["bin_edges"]
+        for s in series["series"]:
+            ax.hist(edges[:-1], bins=edges, weights=s["counts"], alpha=0.6 if legend_attr else 1.0, label=s["name"])
+        if legend_attr:
+            ax.legend(title=legend_attr)
+    elif graph_type == "Box":
+        ax.bxp([series["box"]], showmeans=False)
+        ax.set_xticks([1])
+        ax.set_xticklabels([y_axis])
+    ax.set_xlabel(x_axis)
+    ax.set_ylabel(y_axis)
+    ax.set_title(f"{graph_type} Plot of {y_axis} vs {x_axis} ({stat_mode})")
+    fig.tight_layout()
+    return fig
+
+
+def render_plot(df: pd.DataFrame, config: Dict[str, Any]) -> bytes:
+    """Aggregate and render a plot to image bytes in config["format"] at config["dpi"].
+    Runs inside a worker process, so it must not touch pyplot state."""
+    series = aggregate_series(df, config)
+    with phase("render"):
+        fig = draw_series(series)
+    buffer = BytesIO()
+    with phase("savefig"):
+        fig.savefig(
+            buffer,
+            format=config.get("format") or PLOT_CONFIG_DEFAULTS["format"],
+            dpi=config.get("dpi") or DEFAULT_PLOT_DPI,
+            bbox_inches='tight',
+        )
+    return buffer.getvalue()
+
+
+def _render_in_worker(df: pd.DataFrame, config: Dict[str, Any]) -> Tuple[bytes, List[Tuple[str, float]]]:
+    """render_plot plus its phase timings, which the parent records since the worker's own metrics are never read"""
+    with capture_phases() as timings:
+        image = render_plot(df, config)
+    return image, timings
+
+
+def _warm_worker():
+    """Pay the matplotlib import and font cache cost once per worker, not on the first request"""
+    Figure(figsize=(1, 1)).savefig(BytesIO(), format='png')
+
+
+class PlotRenderer:
+    """Runs render_plot in a process pool with a queue-depth limit and a per-render timeout"""
+
+    def __init__(self, pool_size: int, max_queue: int, timeout_s: float, start_method: str = "spawn"):
+        self.pool_size = max(1, pool_size)
+        self.max_queue = max(1, max_queue)
+        self.timeout_s = timeout_s
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Renders submitted to the pool and not yet finished there, including ones whose caller timed out
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.pool_size,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_warm_worker,
+            )
+        return self._pool
+
+    def _release(self, _future: Optional[Future]):
+        # Called from the pool's management thread once the worker is done with the render
+        with self._in_flight_lock:
+            self._in_flight -= 1
+
+    async def render(self, df: pd.DataFrame, config: Dict[str, Any]) -> bytes:
+        """Render a plot without blocking the event loop.
+
+        Only the columns the plot needs are shipped to the worker process. A render that times out
+        keeps its queue slot until the worker actually finishes it, so slow renders cannot pile up
+        behind the max_queue limit.
+        """
+        columns = [c for c in dict.fromkeys([config["x_axis"], config["y_axis"], config.get("legend_attr")]) if c in df.columns]
+        with self._in_flight_lock:
+            if self._in_flight >= self.max_queue:
+                raise PlotQueueFull(f"Plot queue is full ({self.max_queue} renders pending), try again shortly")
+            self._in_flight += 1
+        try:
+            future = self._get_pool().submit(_render_in_worker, df[columns], config)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        try:
+            # Cancelling the wrapper on timeout only cancels renders that have not started yet
+            image, timings = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout_s)
+        except asyncio.TimeoutError:
+            raise PlotTimeout(f"Plot rendering exceeded {self.timeout_s:g}s")
+        except BrokenProcessPool:
+            # A crashed worker poisons the whole pool; start a fresh one on the next request
+            self.shutdown()
+            raise
+        for name, duration_s in timings:
+            record_phase(name, duration_s)
+        return image
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+plot_renderer = PlotRenderer(
+    pool_size=int(os.getenv("PLOT_POOL_SIZE", str(min(4, os.cpu_count() or 1)))),
+    max_queue=int(os.getenv("PLOT_MAX_QUEUE", "32")),
+    timeout_s=float(os.getenv("PLOT_TIMEOUT_S", "30")),
+    start_method=os.getenv("PLOT_POOL_START_METHOD", "spawn"),
+)
@@ -0,0 +1,252 @@
+# backend/rollup_cube.py - Precomputed rollup cube (count, sum, sum of squares, min, max) for grouped dashboard queries
+import os
+import threading
+from collections import OrderedDict
+from itertools import combinations
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+CUBE_STATS = ("Count", "Sum", "Mean", "Variance", "Min", "Max")
+MAX_DIMENSION_CARDINALITY = 50
+
+# Bands derived from numeric columns so they can be used as dimensions
+DERIVED_DIMENSIONS = {
+    "Age Band": ("Age", [0, 30, 40, 50, 60, np.inf], ["<30", "30-39", "40-49", "50-59", "60+"]),
+}
+DECLARED_DIMENSIONS = (
+    "Workout Type", "Gender", "Workout Intensity", "Age Band", "Mood Before Workout", "Mood After Workout",
+)
+
+
+def cube_dimensions(df: pd.DataFrame) -> List[str]:
+    """Declared dimensions present in the data, plus any other low-cardinality text column"""
+    dimensions = [
+        name for name in DECLARED_DIMENSIONS
+        if name in df.columns or (name in DERIVED_DIMENSIONS and DERIVED_DIMENSIONS[name][0] in df.columns)
+    ]
+    for column in df.columns:
+        if column not in dimensions and not pd.api.types.is_numeric_dtype(df[column]) \
+                and df[column].nunique() <= MAX_DIMENSION_CARDINALITY:
+            dimensions.append(column)
+    return dimensions
+
+
+def cube_measures(df: pd.DataFrame) -> List[str]:
+    return [
+        column for column in df.select_dtypes(include=[np.number]).columns
+        if not column.strip().lower().endswith("id")
+    ]
+
+
+class Cuboid:
+    """Aggregates for one combination of dimensions: one row per cell, one column per measure"""
+
+    def __init__(self, dimensions: Tuple[str, ...], keys: List[tuple], count, total, total_sq, minimum, maximum):
+        self.dimensions = dimensions
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.count = count
+        self.sum = total
+        self.sum_sq = total_sq
+        self.min = minimum
+        self.max = maximum
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, dimensions: Tuple[str, ...], measures: List[str]) -> "Cuboid":
+        # float64 so sums of squares cannot overflow the compact integer dtypes of loaded datasets
+        values = df[measures].astype(np.float64)
+        if dimensions:
+            grouped = values.groupby([df[d] for d in dimensions], observed=True, sort=True)
+            squares = (values ** 2).groupby([df[d] for d in dimensions], observed=True, sort=True).sum()
+            count, total, minimum, maximum = grouped.count(), grouped.sum(), grouped.min(), grouped.max()
+            keys = [key if isinstance(key, tuple) else (key,) for key in count.index]
+            arrays = [frame.to_numpy(dtype=np.float64) for frame in (count, total, squares, minimum, maximum)]
+        else:
+            keys = [()]
+            arrays = [
+                values.count().to_numpy(dtype=np.float64)[None, :],
+                values.sum().to_numpy(dtype=np.float64)[None, :],
+                (values ** 2).sum().to_numpy(dtype=np.float64)[None, :],
+                values.min().to_numpy(dtype=np.float64)[None, :],
+                values.max().to_numpy(dtype=np.float64)[None, :],
+            ]
+        return cls(dimensions, keys, *arrays)
+
+    def merge(self, other: "Cuboid"):
+        """Fold another cuboid over the same dimensions and measures into this one"""
+        new_keys = [key for key in other.keys if key not in self.index]
+        if new_keys:
+            width = self.count.shape[1]
+            pad = np.zeros((len(new_keys), width))
+            self.count = np.vstack([self.count, pad])
+            self.sum = np.vstack([self.sum, pad])
+            self.sum_sq = np.vstack([self.sum_sq, pad])
+            self.min = np.vstack([self.min, np.full((len(new_keys), width), np.nan)])
+            self.max = np.vstack([self.max, np.full((len(new_keys), width), np.nan)])
+            for key in new_keys:
+                self.index[key] = len(self.keys)
+                self.keys.append(key)
+        rows = np.array([self.index[key] for key in other.keys])
+        self.count[rows] += other.count
+        self.sum[rows] += other.sum
+        self.sum_sq[rows] += other.sum_sq
+        self.min[rows] = np.fmin(self.min[rows], other.min)
+        self.max[rows] = np.fmax(self.max[rows], other.max)
+
+
+class RollupCube:
+    """Every combination of up to max_dimensions dimensions, precomputed so grouped queries never touch rows"""
+
+    def __init__(self, df: pd.DataFrame, max_dimensions: int = 3):
+        self.max_dimensions = max_dimensions
+        df = self._with_derived(df)
+        self.dimensions = cube_dimensions(df)
+        self.measures = cube_measures(df)
+        self.rows = len(df)
+        # Sequence number of the last stored append folded into this cube; replays hold log_lock
+        self.log_seq = 0
+        self.log_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.cuboids: Dict[FrozenSet[str], Cuboid] = self._build_cuboids(df)
+
+    @staticmethod
+    def _with_derived(df: pd.DataFrame) -> pd.DataFrame:
+        derived = {
+            name: pd.cut(df[source], bins=bins, labels=labels, right=False).astype(str)
+            for name, (source, bins, labels) in DERIVED_DIMENSIONS.items() if source in df.columns
+        }
+        return df.assign(**derived) if derived else df
+
+    def _build_cuboids(self, df: pd.DataFrame) -> Dict[FrozenSet[str], Cuboid]:
+        cuboids = {}
+        for size in range(self.max_dimensions + 1):
+            for dimensions in combinations(self.dimensions, size):
+                cuboids[frozenset(dimensions)] = Cuboid.build(df, dimensions, self.measures)
+        return cuboids
+
+    def missing_columns(self, df: pd.DataFrame) -> List[str]:
+        """Cube columns that appended rows lack; derived dimensions only need their source column"""
+        columns = set(df.columns) | {name for name, (source, _, _) in DERIVED_DIMENSIONS.items() if source in df.columns}
+        return [c for c in self.dimensions + self.measures if c not in columns]
+
+    def append(self, df: pd.DataFrame, seq: Optional[int] = None) -> int:
+        """Fold newly appended rows into every cuboid without recomputing the existing ones.
+
+        With a log sequence number, an entry this cube has already folded in is skipped.
+        """
+        missing = self.missing_columns(df)
+        if missing:
+            raise KeyError(f"Appended rows are missing columns: {missing}")
+        df = self._with_derived(df)
+        delta = self._build_cuboids(df)
+        with self._lock:
+            if seq is not None:
+                if seq <= self.log_seq:
+                    return self.rows
+                self.log_seq = seq
+            for key, cuboid in delta.items():
+                self.cuboids[key].merge(cuboid)
+            self.rows += len(df)
+        return self.rows
+
+    def query(
+        self,
+        measure: str,
+        stat: str,
+        group_by: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Answer stat(measure) grouped by some dimensions and filtered on others, from the cube alone"""
+        group_by = list(group_by or [])
+        filters = dict(filters or {})
+        if stat not in CUBE_STATS:
+            raise ValueError(f"Unsupported stat '{stat}', expected one of {list(CUBE_STATS)}")
+        if measure not in self.measures:
+            raise ValueError(f"Unknown measure '{measure}', expected one of {self.measures}")
+        unknown = [d for d in group_by + list(filters) if d not in self.dimensions]
+        if unknown:
+            raise ValueError(f"Unknown dimensions {unknown}, expected some of {self.dimensions}")
+        cuboid = self.cuboids.get(frozenset(group_by) | frozenset(filters))
+        if cuboid is None:
+            raise ValueError(f"At most {self.max_dimensions} distinct dimensions per query are precomputed")
+
+        column = self.measures.index(measure)
+        positions = {d: cuboid.dimensions.index(d) for d in group_by + list(filters)}
+        with self._lock:
+            cells = []
+            for key, row in cuboid.index.items():
+                if any(str(key[positions[d]]) != str(v) for d, v in filters.items()):
+                    continue
+                count = cuboid.count[row, column]
+                if count == 0:
+                    continue
+                cell = {d: _to_python(key[positions[d]]) for d in group_by}
+                cell["count"] = int(count)
+                cell["value"] = self._stat(cuboid, row, column, stat)
+                cells.append(cell)
+        return cells
+
+    @staticmethod
+    def _stat(cuboid: Cuboid, row: int, column: int, stat: str) -> Optional[float]:
+        n, total = cuboid.count[row, column], cuboid.sum[row, column]
+        if stat == "Count":
+            return float(n)
+        if stat == "Sum":
+            return float(total)
+        if stat == "Mean":
+            return float(total / n)
+        if stat == "Variance":
+            # Sample variance from the running moments; None for single-row cells
+            return float(max(cuboid.sum_sq[row, column] - total * total / n, 0.0) / (n - 1)) if n > 1 else None
+        if stat == "Min":
+            return float(cuboid.min[row, column])
+        return float(cuboid.max[row, column])
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "dimensions": self.dimensions,
+            "measures": self.measures,
+            "stats": list(CUBE_STATS),
+            "max_dimensions": self.max_dimensions,
+            "cuboids": len(self.cuboids),
+            "cells": sum(len(c.keys) for c in self.cuboids.values()),
+        }
+
+
+def _to_python(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class CubeRegistry:
+    """Cubes keyed by dataset_id, least recently used dropped beyond max_cubes"""
+
+    def __init__(self, max_cubes: int, max_dimensions: int):
+        self.max_cubes = max_cubes
+        self.max_dimensions = max_dimensions
+        self._cubes: "OrderedDict[str, RollupCube]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dataset_id: str) -> Optional[RollupCube]:
+        with self._lock:
+            cube = self._cubes.get(dataset_id)
+            if cube is not None:
+                self._cubes.move_to_end(dataset_id)
+            return cube
+
+    def build(self, dataset_id: str, df: pd.DataFrame) -> RollupCube:
+        cube = RollupCube(df, self.max_dimensions)
+        with self._lock:
+            self._cubes[dataset_id] = cube
+            self._cubes.move_to_end(dataset_id)
+            while len(self._cubes) > self.max_cubes:
+                self._cubes.popitem(last=False)
+        return cube
+
+
+cube_registry = CubeRegistry(
+    max_cubes=int(os.getenv("CUBE_MAX_DATASETS", "8")),
+    max_dimensions=int(os.getenv("CUBE_MAX_DIMENSIONS", "3")),
+)
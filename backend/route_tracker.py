@@ -0,0 +1,237 @@
+# backend/route_tracker.py - Live GPS route sessions with ring-buffered points and incremental distance/pace
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from shared_state import StateBackend, shared_state
+
+# Same mean earth radius as geopy.distance.great_circle, so distances agree with it
+EARTH_RADIUS_KM = 6371.009
+INITIAL_BUFFER_POINTS = 256
+ROUTE_LOG_NAMESPACE = "route_points"
+# How often a worker sweeps idle route logs out of the shared state
+LOG_EXPIRY_INTERVAL_S = 60.0
+
+
+def parse_timestamp(value: str) -> float:
+    """ISO-8601 timestamp (a trailing Z is accepted) to epoch seconds"""
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value).timestamp()
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def path_distance_km(latitudes: np.ndarray, longitudes: np.ndarray) -> float:
+    """Total haversine length of a polyline, vectorized over all segments"""
+    if len(latitudes) < 2:
+        return 0.0
+    phi = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lam = np.radians(np.asarray(longitudes, dtype=np.float64))
+    a = np.sin(np.diff(phi) / 2) ** 2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(np.diff(lam) / 2) ** 2
+    return float(np.sum(2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))))
+
+
+class RouteSession:
+    """One tracked route: the latest `capacity` fixes in flat float64 arrays (24 bytes per fix) plus running totals over all fixes"""
+
+    def __init__(self, session_id: str, capacity: int):
+        self.session_id = session_id
+        self.capacity = capacity
+        initial = min(capacity, INITIAL_BUFFER_POINTS)
+        self._latitudes = np.empty(initial, dtype=np.float64)
+        self._longitudes = np.empty(initial, dtype=np.float64)
+        self._times = np.empty(initial, dtype=np.float64)
+        self._head = 0  # index the next point is written to
+        self._size = 0
+        self.total_points = 0
+        self.distance_km = 0.0
+        self.started_at: Optional[float] = None
+        self.last_segment_km = 0.0
+        self.last_segment_s = 0.0
+        self.last_seen = time.monotonic()
+        # Position in the shared point log this session has replayed up to (multi-worker mode)
+        self.log_first: Optional[int] = None
+        self.log_seq = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._latitudes.nbytes + self._longitudes.nbytes + self._times.nbytes
+
+    def _grow(self):
+        # Buffers double until they reach capacity; before that the ring has not wrapped, so order is preserved
+        size = min(self.capacity, 2 * len(self._times))
+        self._latitudes = np.resize(self._latitudes, size)
+        self._longitudes = np.resize(self._longitudes, size)
+        self._times = np.resize(self._times, size)
+        self._head = self._size
+
+    def validate(self, latitude: float, longitude: float, timestamp: float):
+        """Raise ValueError if the fix could not be appended"""
+        if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0):
+            raise ValueError("Latitude must be within [-90, 90] and longitude within [-180, 180]")
+        if self._size and timestamp < self._times[self._head - 1]:
+            raise ValueError("Route points must be sent in chronological order")
+
+    def add(self, latitude: float, longitude: float, timestamp: float) -> Dict[str, Any]:
+        """Append a fix and update distance in amortized O(1); returns the updated statistics"""
+        self.validate(latitude, longitude, timestamp)
+        if self._size:
+            last = self._head - 1
+            self.last_segment_km = haversine_km(self._latitudes[last], self._longitudes[last], latitude, longitude)
+            self.last_segment_s = timestamp - self._times[last]
+            self.distance_km += self.last_segment_km
+        else:
+            self.started_at = timestamp
+        if self._size == len(self._times) < self.capacity:
+            self._grow()
+        self._latitudes[self._head] = latitude
+        self._longitudes[self._head] = longitude
+        self._times[self._head] = timestamp
+        self._head = (self._head + 1) % len(self._times)
+        self._size = min(self._size + 1, self.capacity)
+        self.total_points += 1
+        self.last_seen = time.monotonic()
+        return self.stats()
+
+    def _ordered(self, values: np.ndarray) -> np.ndarray:
+        if self._size < self.capacity:
+            return values[:self._size]
+        return np.concatenate((values[self._head:], values[:self._head]))
+
+    def points(self) -> List[Dict[str, Any]]:
+        """Retained fixes, oldest first"""
+        return [
+            {
+                "latitude": float(lat),
+                "longitude": float(lon),
+                "timestamp": datetime.fromtimestamp(t, tz=timezone.utc).isoformat(),
+            }
+            for lat, lon, t in zip(
+                self._ordered(self._latitudes), self._ordered(self._longitudes), self._ordered(self._times)
+            )
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed_s = 0.0
+        if self._size:
+            elapsed_s = self._times[self._head - 1] - self.started_at
+        return {
+            "session_id": self.session_id,
+            "total_points": self.total_points,
+            "distance_km": round(self.distance_km, 4),
+            "elapsed_s": round(elapsed_s, 1),
+            "avg_speed_kmh": round(self.distance_km / elapsed_s * 3600, 2) if elapsed_s > 0 else 0.0,
+            "current_speed_kmh": round(self.last_segment_km / self.last_segment_s * 3600, 2) if self.last_segment_s > 0 else 0.0,
+            "pace_min_per_km": round(elapsed_s / 60 / self.distance_km, 2) if self.distance_km > 0 else None,
+        }
+
+
+class RouteTracker:
+    """Active route sessions, kept in last-activity order so idle ones are evicted from the front.
+
+    With a shared state backend every fix is appended to a shared per-route log first, and each
+    worker's ring buffer is a local replay of that log, caught up on every access.
+    """
+
+    def __init__(self, max_points: int, idle_timeout_s: float, state: Optional[StateBackend] = None):
+        self.max_points = max_points
+        self.idle_timeout_s = idle_timeout_s
+        self.state = state if state is not None and state.shared else None
+        self._sessions: "OrderedDict[str, RouteSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_log_expiry = 0.0
+        self.evictions = 0
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        cutoff = now - self.idle_timeout_s
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_seen >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+        if self.state is not None and now >= self._next_log_expiry:
+            self._next_log_expiry = now + LOG_EXPIRY_INTERVAL_S
+            self.state.expire_logs(ROUTE_LOG_NAMESPACE, self.idle_timeout_s)
+
+    def _sync(self, session_id: str) -> Optional[RouteSession]:
+        """Replay fixes other workers appended since this worker last looked"""
+        session = self._sessions.get(session_id)
+        first, entries = self.state.read_log(ROUTE_LOG_NAMESPACE, session_id, session.log_seq if session else 0)
+        if first is None:
+            # Cleared or expired elsewhere
+            self._sessions.pop(session_id, None)
+            return None
+        if session is None or session.log_first != first:
+            # Sequence numbers are never reused, so a restarted log is entirely newer than log_seq
+            session = self._sessions[session_id] = RouteSession(session_id, self.max_points)
+            session.log_first = first
+        for seq, (latitude, longitude, timestamp) in entries:
+            try:
+                session.add(latitude, longitude, timestamp)
+            except ValueError:
+                pass  # two workers raced with out-of-order fixes; the later one is dropped everywhere
+            session.log_seq = seq
+        session.last_seen = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def get(self, session_id: str) -> Optional[RouteSession]:
+        with self._lock:
+            self._evict_idle()
+            if self.state is not None:
+                return self._sync(session_id)
+            return self._sessions.get(session_id)
+
+    def add_point(self, session_id: str, latitude: float, longitude: float, timestamp: str) -> Dict[str, Any]:
+        seconds = parse_timestamp(timestamp)
+        with self._lock:
+            self._evict_idle()
+            if self.state is not None:
+                (self._sync(session_id) or RouteSession(session_id, self.max_points)).validate(latitude, longitude, seconds)
+                self.state.append(ROUTE_LOG_NAMESPACE, session_id, [latitude, longitude, seconds])
+                return self._sync(session_id).stats()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = RouteSession(session_id, self.max_points)
+            stats = session.add(latitude, longitude, seconds)
+            self._sessions.move_to_end(session_id)
+            return stats
+
+    def clear(self, session_id: str) -> bool:
+        with self._lock:
+            cleared = self.state.delete_log(ROUTE_LOG_NAMESPACE, session_id) if self.state is not None else False
+            return self._sessions.pop(session_id, None) is not None or cleared
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict_idle()
+            return {
+                "sessions": len(self._sessions),
+                "max_points": self.max_points,
+                "idle_timeout_s": self.idle_timeout_s,
+                "buffer_bytes": sum(s.nbytes for s in self._sessions.values()),
+                "evictions": self.evictions,
+                "shared_state": self.state.kind if self.state is not None else None,
+            }
+
+
+route_tracker = RouteTracker(
+    max_points=int(os.getenv("ROUTE_MAX_POINTS", "20000")),
+    idle_timeout_s=float(os.getenv("ROUTE_IDLE_TIMEOUT_S", "1800")),
+    state=shared_state,
+)
@@ -0,0 +1,101 @@
+# backend/schema_registry.py - Known CSV schemas and compact dtypes (categoricals, downcast numerics) for parsed chunks
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Text columns with at most this share of distinct values become categoricals even without a schema
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+class CsvSchema:
+    """Column dtypes for a recognized CSV format: enum columns as categoricals, integers at a fixed width"""
+
+    def __init__(self, name: str, categories: List[str], integers: Dict[str, str]):
+        self.name = name
+        self.categories = categories
+        self.integers = integers
+
+    @property
+    def columns(self) -> List[str]:
+        return self.categories + list(self.integers)
+
+    def matches(self, columns) -> bool:
+        return set(self.columns).issubset(columns)
+
+
+FITNESS_TRACKER_SCHEMA = CsvSchema(
+    "workout_fitness_tracker",
+    categories=["Gender", "Workout Type", "Workout Intensity", "Mood Before Workout", "Mood After Workout"],
+    integers={
+        "User ID": "int32",
+        "Age": "int16",
+        "Height (cm)": "int16",
+        "Weight (kg)": "int16",
+        "Workout Duration (mins)": "int16",
+        "Calories Burned": "int16",
+        "Heart Rate (bpm)": "int16",
+        "Steps Taken": "int32",
+        "Daily Calories Intake": "int16",
+        "Resting Heart Rate (bpm)": "int16",
+    },
+)
+
+SCHEMAS: List[CsvSchema] = [FITNESS_TRACKER_SCHEMA]
+
+
+def register_schema(schema: CsvSchema):
+    SCHEMAS.append(schema)
+
+
+def detect_schema(columns) -> Optional[CsvSchema]:
+    """First registered schema whose columns are all present"""
+    return next((schema for schema in SCHEMAS if schema.matches(columns)), None)
+
+
+def _fits(values: pd.Series, dtype: str) -> bool:
+    info = np.iinfo(dtype)
+    return not values.isnull().any() and info.min <= values.min() <= values.max() <= info.max
+
+
+def _compact_float(values: pd.Series) -> pd.Series:
+    # float32 only when every value survives the round trip, so summaries never show float32 noise
+    narrowed = values.astype(np.float32)
+    if np.array_equal(narrowed.to_numpy(dtype=np.float64), values.to_numpy(), equal_nan=True):
+        return narrowed
+    return values
+
+
+def compact_chunk(chunk: pd.DataFrame, schema: Optional[CsvSchema] = None) -> pd.DataFrame:
+    """Narrow a parsed chunk's dtypes without changing any value.
+
+    Schema enums become categoricals and schema integers their declared width (when every value fits).
+    Other columns are downcast generically: integers to the smallest width, lossless floats to float32,
+    and low-cardinality text to categoricals.
+    """
+    compacted = {}
+    for column in chunk.columns:
+        values = chunk[column]
+        dtype = values.dtype
+        if schema is not None and column in schema.categories:
+            compacted[column] = values.astype("category")
+        elif schema is not None and column in schema.integers and pd.api.types.is_integer_dtype(dtype) \
+                and _fits(values, schema.integers[column]):
+            compacted[column] = values.astype(schema.integers[column])
+        elif pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            compacted[column] = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(dtype):
+            compacted[column] = _compact_float(values)
+        elif dtype == object and len(values) and values.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(values):
+            compacted[column] = values.astype("category")
+    return chunk.assign(**compacted) if compacted else chunk
+
+
+def concat_column(pieces: List[pd.Series]) -> pd.Series:
+    """Concatenate one column's chunks; categorical pieces get one sorted category set so the result stays categorical"""
+    if len(pieces) == 1:
+        return pieces[0]
+    if all(isinstance(piece.dtype, pd.CategoricalDtype) for piece in pieces):
+        unified = pd.CategoricalDtype(sorted(set().union(*(piece.cat.categories for piece in pieces)), key=str))
+        pieces = [piece.astype(unified) for piece in pieces]
+    return pd.concat(pieces, ignore_index=True)
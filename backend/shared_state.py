@@ -0,0 +1,270 @@
+# backend/shared_state.py - State shared by every API worker process: expiring key/value entries and append-only logs
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+LogEntries = List[Tuple[int, Any]]
+
+
+class StateBackend:
+    """Interface for shared state. Values and log items must be JSON-serializable.
+
+    Log sequence numbers increase across the whole backend and are never reused, so a reader
+    can remember the last one it applied and ask only for newer entries.
+    """
+
+    kind = "base"
+    # Whether other processes see writes; a process-local backend lets callers skip the bookkeeping
+    shared = False
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def put(self, namespace: str, key: str, value: Any, ttl_s: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> bool:
+        raise NotImplementedError
+
+    def append(self, namespace: str, key: str, item: Any) -> int:
+        """Append to a log, returning the new entry's sequence number"""
+        raise NotImplementedError
+
+    def read_log(self, namespace: str, key: str, after_seq: int = 0) -> Tuple[Optional[int], LogEntries]:
+        """(first sequence number still in the log or None if there is no log, entries after after_seq)"""
+        raise NotImplementedError
+
+    def delete_log(self, namespace: str, key: str) -> bool:
+        raise NotImplementedError
+
+    def expire_logs(self, namespace: str, idle_s: float) -> int:
+        """Drop logs not appended to for idle_s seconds; returns how many were dropped"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryStateBackend(StateBackend):
+    """In-process default: correct for a single worker, invisible to any other process"""
+
+    kind = "memory"
+
+    def __init__(self):
+        self._values: Dict[Tuple[str, str], Tuple[Any, Optional[float]]] = {}
+        self._logs: Dict[Tuple[str, str], LogEntries] = defaultdict(list)
+        self._log_updated: Dict[Tuple[str, str], float] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._values.get((namespace, key))
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._values[(namespace, key)]
+                return None
+            return value
+
+    def put(self, namespace: str, key: str, value: Any, ttl_s: Optional[float] = None):
+        with self._lock:
+            self._values[(namespace, key)] = (value, time.time() + ttl_s if ttl_s is not None else None)
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            return self._values.pop((namespace, key), None) is not None
+
+    def append(self, namespace: str, key: str, item: Any) -> int:
+        with self._lock:
+            self._seq += 1
+            self._logs[(namespace, key)].append((self._seq, item))
+            self._log_updated[(namespace, key)] = time.time()
+            return self._seq
+
+    def read_log(self, namespace: str, key: str, after_seq: int = 0) -> Tuple[Optional[int], LogEntries]:
+        with self._lock:
+            entries = self._logs.get((namespace, key))
+            if not entries:
+                return None, []
+            return entries[0][0], [entry for entry in entries if entry[0] > after_seq]
+
+    def delete_log(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            self._log_updated.pop((namespace, key), None)
+            return self._logs.pop((namespace, key), None) is not None
+
+    def expire_logs(self, namespace: str, idle_s: float) -> int:
+        cutoff = time.time() - idle_s
+        with self._lock:
+            expired = [k for k, updated in self._log_updated.items() if k[0] == namespace and updated < cutoff]
+            for k in expired:
+                del self._log_updated[k]
+                self._logs.pop(k, None)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": self.kind, "values": len(self._values), "logs": len(self._logs)}
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state_values (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_state_values_expiry ON state_values (expires_at);
+CREATE TABLE IF NOT EXISTS state_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    item TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_state_log_key ON state_log (namespace, key, seq);
+CREATE TABLE IF NOT EXISTS state_log_heads (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+"""
+
+
+class SQLiteStateBackend(StateBackend):
+    """One SQLite file in WAL mode shared by every worker; writes take the lock up front (BEGIN IMMEDIATE)"""
+
+    kind = "sqlite"
+    shared = True
+
+    def __init__(self, path: str, busy_timeout_s: float = 30.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=busy_timeout_s, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SQLITE_SCHEMA)
+
+    def _write(self, operation):
+        """Run operation in a write transaction. Caller holds self._lock; the connection is in autocommit
+        mode, so BEGIN IMMEDIATE queues behind other workers' writers instead of failing on a stale snapshot."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = operation()
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return result
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM state_values WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (namespace, key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, namespace: str, key: str, value: Any, ttl_s: Optional[float] = None):
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            def operation():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO state_values (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (namespace, key, payload, now + ttl_s if ttl_s is not None else None)
+                )
+                self._conn.execute("DELETE FROM state_values WHERE expires_at < ?", (now,))
+            self._write(operation)
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            return self._write(lambda: self._conn.execute(
+                "DELETE FROM state_values WHERE namespace = ? AND key = ?", (namespace, key)
+            ).rowcount > 0)
+
+    def append(self, namespace: str, key: str, item: Any) -> int:
+        payload = json.dumps(item)
+        with self._lock:
+            def operation():
+                seq = self._conn.execute(
+                    "INSERT INTO state_log (namespace, key, item) VALUES (?, ?, ?)", (namespace, key, payload)
+                ).lastrowid
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO state_log_heads (namespace, key, updated_at) VALUES (?, ?, ?)",
+                    (namespace, key, time.time())
+                )
+                return seq
+            return self._write(operation)
+
+    def read_log(self, namespace: str, key: str, after_seq: int = 0) -> Tuple[Optional[int], LogEntries]:
+        with self._lock:
+            # One read transaction, so the first sequence number and the entries come from the same snapshot
+            self._conn.execute("BEGIN")
+            try:
+                first = self._conn.execute(
+                    "SELECT MIN(seq) FROM state_log WHERE namespace = ? AND key = ?", (namespace, key)
+                ).fetchone()[0]
+                rows = self._conn.execute(
+                    "SELECT seq, item FROM state_log WHERE namespace = ? AND key = ? AND seq > ? ORDER BY seq",
+                    (namespace, key, after_seq)
+                ).fetchall() if first is not None else []
+            finally:
+                self._conn.execute("COMMIT")
+        return first, [(seq, json.loads(item)) for seq, item in rows]
+
+    def delete_log(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            def operation():
+                self._conn.execute("DELETE FROM state_log_heads WHERE namespace = ? AND key = ?", (namespace, key))
+                return self._conn.execute(
+                    "DELETE FROM state_log WHERE namespace = ? AND key = ?", (namespace, key)
+                ).rowcount > 0
+            return self._write(operation)
+
+    def expire_logs(self, namespace: str, idle_s: float) -> int:
+        cutoff = time.time() - idle_s
+        with self._lock:
+            def operation():
+                keys = [row[0] for row in self._conn.execute(
+                    "SELECT key FROM state_log_heads WHERE namespace = ? AND updated_at < ?", (namespace, cutoff)
+                )]
+                for key in keys:
+                    self._conn.execute("DELETE FROM state_log WHERE namespace = ? AND key = ?", (namespace, key))
+                    self._conn.execute("DELETE FROM state_log_heads WHERE namespace = ? AND key = ?", (namespace, key))
+                return len(keys)
+            return self._write(operation)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            values = self._conn.execute("SELECT COUNT(*) FROM state_values").fetchone()[0]
+            logs = self._conn.execute("SELECT COUNT(*) FROM state_log_heads").fetchone()[0]
+        return {"backend": self.kind, "path": self.path, "values": values, "logs": logs}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_state_backend(kind: str, path: str) -> StateBackend:
+    if kind == "memory":
+        return MemoryStateBackend()
+    if kind == "sqlite":
+        return SQLiteStateBackend(path)
+    raise ValueError(f"Unknown SHARED_STATE_BACKEND '{kind}', expected 'memory' or 'sqlite'")
+
+
+shared_state = create_state_backend(
+    os.getenv("SHARED_STATE_BACKEND", "memory"),
+    os.getenv("SHARED_STATE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "shared_state.db")),
+)
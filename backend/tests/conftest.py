@@ -0,0 +1,12 @@
+# backend/tests/conftest.py - Import backend modules as the API does, with every on-disk store in a scratch directory
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_scratch = tempfile.mkdtemp(prefix="smartworkout-tests-")
+os.environ.setdefault("DATASET_STORE_DIR", os.path.join(_scratch, "datasets"))
+os.environ.setdefault("WORKOUT_DB_PATH", os.path.join(_scratch, "workouts.db"))
+os.environ.setdefault("SHARED_STATE_PATH", os.path.join(_scratch, "shared_state.db"))
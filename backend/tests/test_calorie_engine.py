@@ -0,0 +1,68 @@
+# backend/tests/test_calorie_engine.py - Batch calorie estimates against the single-session endpoint
+import os
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from conftest import BACKEND_DIR
+
+SAMPLE_CSV = os.path.join(BACKEND_DIR, "..", "frontend", "src", "assets", "workout_fitness_tracker_data.csv")
+
+SESSIONS = [
+    {"gender": "Male", "weight_kg": 80, "age": 30, "duration_mins": 45, "exercise_type": "Jogging", "heart_rate": 150},
+    {"gender": "Female", "weight_kg": 62, "age": 41, "duration_mins": 60, "exercise_type": "Cycling", "heart_rate": 135},
+    {"gender": "Female", "weight_kg": 62, "age": 41, "duration_mins": 60, "exercise_type": "Cycling"},
+    {"gender": "Male", "weight_kg": 90, "age": 52, "duration_mins": 40, "exercise_type": "Weight Lifting", "intensity": "Vigorous Effort"},
+    {"gender": "Male", "weight_kg": 90, "age": 52, "duration_mins": 40, "exercise_type": "Weight Lifting", "intensity": "Unknown"},
+    {"gender": "Female", "weight_kg": 58, "age": 27, "duration_mins": 30, "exercise_type": "Swimming", "swimming_style": "Butterfly"},
+    {"gender": "Female", "weight_kg": 58, "age": 27, "duration_mins": 30, "exercise_type": "Swimming"},
+    {"gender": "Male", "weight_kg": 80, "age": 35, "duration_mins": 60, "exercise_type": "Yoga", "heart_rate": 95},
+]
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+def test_batch_matches_the_single_session_endpoint(client):
+    batch = client.post("/api/calculate-calories/batch", json={"sessions": SESSIONS})
+    assert batch.status_code == 200
+    body = batch.json()
+    singles = [client.post("/api/calculate-calories", json=session).json() for session in SESSIONS]
+    assert body["calories_burned"] == [single["calories_burned"] for single in singles]
+    assert body["count"] == len(SESSIONS)
+    assert body["total_calories"] == pytest.approx(sum(body["calories_burned"]), abs=0.01)
+    assert body["methods"] == ["heart_rate", "heart_rate", "met", "met", "met", "met", "met", "met"]
+
+
+def test_single_endpoint_keeps_its_method_contract(client):
+    # Yoga has no heart-rate formula, so the MET default is used; the method still says heart_rate
+    yoga = client.post("/api/calculate-calories", json=SESSIONS[-1]).json()
+    assert yoga["calories_burned"] == 400.0
+    assert yoga["method"] == "heart_rate"
+    assert client.post("/api/calculate-calories", json=SESSIONS[2]).json()["method"] == "met"
+
+
+def test_batch_needs_exactly_one_source(client):
+    assert client.post("/api/calculate-calories/batch", json={}).status_code == 400
+    both = {"sessions": SESSIONS[:1], "dataset_id": "0" * 64}
+    assert client.post("/api/calculate-calories/batch", json=both).status_code == 400
+
+
+def test_dataset_rows_use_the_dataset_met_table(client):
+    df = pd.read_csv(SAMPLE_CSV, nrows=300)
+    upload = client.post("/api/analyze-data", files={"file": ("sample.csv", df.to_csv(index=False).encode(), "text/csv")})
+    body = client.post("/api/calculate-calories/batch", json={"dataset_id": upload.json()["dataset_id"]}).json()
+    assert body["count"] == len(df)
+
+    hours = df["Workout Duration (mins)"] / 60
+    for workout, met in [("Yoga", 2.5), ("HIIT", 8.0), ("Cardio", 7.0)]:
+        rows = (df["Workout Type"] == workout).to_numpy()
+        expected = (met * df["Weight (kg)"] * hours)[rows].round(2).tolist()
+        assert [c for c, keep in zip(body["calories_burned"], rows) if keep] == pytest.approx(expected, abs=0.01)
+    # Running maps onto Jogging, which has a heart rate in every row
+    running = (df["Workout Type"] == "Running").to_numpy()
+    assert {m for m, keep in zip(body["methods"], running) if keep} == {"heart_rate"}
@@ -0,0 +1,94 @@
+# backend/tests/test_cohort_index.py - Cohort percentiles against a brute-force mid-rank, fallbacks and appends
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cohort_index import CohortIndex
+
+
+def people(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Gender": rng.choice(["Male", "Female"], rows),
+        "Age": rng.integers(18, 70, rows),
+        "Workout Type": rng.choice(["Yoga", "HIIT", "Cycling"], rows),
+        # Rounded so that ties occur and the mid-rank matters
+        "VO2 Max": rng.normal(42, 6, rows).round(),
+        "Calories Burned": rng.uniform(200, 900, rows),
+    })
+
+
+def mid_rank(values: pd.Series, value: float) -> float:
+    return 100.0 * ((values < value).sum() + 0.5 * (values == value).sum()) / len(values)
+
+
+def test_percentiles_match_a_brute_force_mid_rank():
+    df = people(3000)
+    index = CohortIndex(df, min_cohort_size=30)
+    users = [
+        {"gender": "male", "age": 35, "workout_type": " yoga", "metrics": {"VO2 Max": 44.0, "Calories Burned": 500.0}},
+        {"gender": "Female", "age": 61, "workout_type": "HIIT", "metrics": {"VO2 Max": 40.0}},
+    ]
+    results = index.percentiles(users)
+
+    cohort = df[(df["Gender"] == "Male") & df["Age"].between(30, 39) & (df["Workout Type"] == "Yoga")]
+    assert results[0]["cohort"] == {"Gender": "Male", "Age Band": "30-39", "Workout Type": "Yoga"}
+    assert results[0]["cohort_size"] == len(cohort)
+    assert results[0]["percentiles"]["VO2 Max"] == pytest.approx(mid_rank(cohort["VO2 Max"], 44.0), abs=0.01)
+    assert results[0]["percentiles"]["Calories Burned"] == pytest.approx(mid_rank(cohort["Calories Burned"], 500.0), abs=0.01)
+
+    cohort = df[(df["Gender"] == "Female") & (df["Age"] >= 60) & (df["Workout Type"] == "HIIT")]
+    assert results[1]["percentiles"]["VO2 Max"] == pytest.approx(mid_rank(cohort["VO2 Max"], 40.0), abs=0.01)
+    assert "Calories Burned" not in results[1]["percentiles"]
+
+
+def test_small_cohorts_fall_back_to_a_broader_one():
+    df = people(400)
+    index = CohortIndex(df, min_cohort_size=100)
+    result = index.percentiles([{"gender": "Female", "age": 45, "workout_type": "Cycling", "metrics": {"VO2 Max": 42.0}}])[0]
+    women = df[df["Gender"] == "Female"]
+    assert result["cohort"] == {"Gender": "Female"}
+    assert result["cohort_size"] == len(women)
+    assert result["percentiles"]["VO2 Max"] == pytest.approx(mid_rank(women["VO2 Max"], 42.0), abs=0.01)
+
+    # Nobody of that gender at all: everyone is the cohort
+    result = index.percentiles([{"gender": "Other", "age": 45, "metrics": {"VO2 Max": 42.0}}])[0]
+    assert result["cohort"] == {} and result["cohort_size"] == len(df)
+
+
+def test_appends_give_the_same_answers_as_a_rebuild():
+    base, added = people(1500), people(500, seed=1)
+    added["Workout Type"] = added["Workout Type"].replace("Yoga", "Pilates")
+    index = CohortIndex(base, min_cohort_size=10)
+    assert index.append(added, seq=1) == 2000
+    # The same log entry again is skipped
+    assert index.append(added, seq=1) == 2000
+    rebuilt = CohortIndex(pd.concat([base, added], ignore_index=True), min_cohort_size=10)
+
+    users = [
+        {"gender": g, "age": age, "workout_type": w, "metrics": {"VO2 Max": 42.0, "Calories Burned": 600.0}}
+        for g in ("Male", "Female") for age in (25, 45, 65) for w in ("Yoga", "Pilates", "HIIT")
+    ]
+    assert index.percentiles(users) == rebuilt.percentiles(users)
+    assert index.describe() == rebuilt.describe()
+
+
+def test_concurrent_appends_keep_every_row_and_label():
+    index = CohortIndex(people(200), min_cohort_size=1)
+    batches = []
+    for i in range(8):
+        batch = people(50, seed=10 + i)
+        batch["Workout Type"] = f"Sport {i}"
+        batches.append(batch)
+    threads = [threading.Thread(target=index.append, args=(batch,)) for batch in batches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert index.rows == 600
+    for i in range(8):
+        result = index.percentiles([{"gender": "Male", "age": 20, "workout_type": f"sport {i}", "metrics": {}}])[0]
+        assert result["cohort"]["Workout Type"] == f"Sport {i}"
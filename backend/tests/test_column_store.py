@@ -0,0 +1,145 @@
+# backend/tests/test_column_store.py - Round trips through the on-disk column store, its appends and its LRU byte budget
+import hashlib
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cohort_index import CohortIndex
+from column_store import ColumnStore
+from rollup_cube import RollupCube
+
+
+def dataset_id(name: str) -> str:
+    return hashlib.sha256(name.encode()).hexdigest()
+
+
+def frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Age": rng.integers(18, 70, rows).astype(np.int16),
+        "Body Fat (%)": rng.uniform(8, 40, rows),
+        "Gender": pd.Categorical(rng.choice(["Male", "Female"], rows)),
+        "Notes": rng.choice(["easy", "hard", None], rows),
+    })
+
+
+def test_round_trip_keeps_values_and_dtypes(tmp_path):
+    store = ColumnStore(str(tmp_path))
+    df = frame(1000)
+    assert store.save(dataset_id("a"), df)
+    assert not store.save(dataset_id("a"), df)
+    loaded = store.load(dataset_id("a"))
+    pd.testing.assert_frame_equal(loaded.copy(deep=True), df)
+    assert list(store.load(dataset_id("a"), ["Gender", "missing"]).columns) == ["Gender"]
+    with pytest.raises(ValueError):
+        store.save("../escape", df)
+
+
+def test_least_recently_loaded_datasets_are_evicted_past_the_budget(tmp_path):
+    unbounded = ColumnStore(str(tmp_path / "probe"))
+    unbounded.save(dataset_id("probe"), frame(5000))
+    size = unbounded.stats()["bytes"]
+
+    store = ColumnStore(str(tmp_path / "store"), max_bytes=int(size * 2.5))
+    for i, name in enumerate(["a", "b"]):
+        store.save(dataset_id(name), frame(5000, seed=i))
+        # mtime resolution differs between filesystems, so age the manifests explicitly
+        manifest = os.path.join(store.root, dataset_id(name), "manifest.json")
+        os.utime(manifest, (time.time() - 100 + i, time.time() - 100 + i))
+    store.load(dataset_id("a"))  # "a" is now the most recently used
+
+    store.save(dataset_id("c"), frame(5000, seed=2))
+    assert dataset_id("b") not in store
+    assert dataset_id("a") in store and dataset_id("c") in store
+    stats = store.stats()
+    assert stats["datasets"] == 2 and stats["evictions"] == 1
+    assert stats["bytes"] <= store.max_bytes
+
+
+def test_a_dataset_larger_than_the_budget_is_still_kept(tmp_path):
+    store = ColumnStore(str(tmp_path), max_bytes=1)
+    store.save(dataset_id("a"), frame(100))
+    store.save(dataset_id("b"), frame(100))
+    assert dataset_id("a") not in store
+    assert dataset_id("b") in store
+
+
+def test_eviction_by_another_worker_is_noticed(tmp_path):
+    first, second = ColumnStore(str(tmp_path)), ColumnStore(str(tmp_path))
+    first.save(dataset_id("a"), frame(10))
+    assert dataset_id("a") in second
+    first.delete(dataset_id("a"))
+    assert dataset_id("a") not in second
+    with pytest.raises(KeyError):
+        second.load(dataset_id("a"))
+
+
+def workout_rows(n: int, offset: int = 0) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Gender": ["Male", "Female"] * (n // 2),
+        "Age": [25 + (offset + i) % 40 for i in range(n)],
+        "Workout Type": ["Yoga", "HIIT", "Cycling", "Running"] * (n // 4),
+        "Calories Burned": [300.0 + offset + i for i in range(n)],
+    })
+
+
+def test_appends_are_numbered_in_order_and_need_the_dataset(tmp_path):
+    store = ColumnStore(str(tmp_path))
+    with pytest.raises(KeyError):
+        store.append(dataset_id("a"), workout_rows(4))
+    store.save(dataset_id("a"), workout_rows(8))
+    assert store.append(dataset_id("a"), workout_rows(4, offset=10)) == 1
+    assert store.append(dataset_id("a"), workout_rows(4, offset=20)) == 2
+    assert store.appended(dataset_id("a")) == [1, 2]
+    assert store.appended(dataset_id("a"), after_seq=1) == [2]
+    pd.testing.assert_frame_equal(store.load_append(dataset_id("a"), 2).copy(deep=True), workout_rows(4, offset=20))
+    # Appends count towards the budget and go when their dataset is deleted
+    assert store.stats()["bytes"] > ColumnStore(str(tmp_path / "empty")).stats()["bytes"]
+    store.delete(dataset_id("a"))
+    assert store.appended(dataset_id("a")) == []
+
+
+def test_concurrent_appends_get_distinct_numbers(tmp_path):
+    first, second = ColumnStore(str(tmp_path)), ColumnStore(str(tmp_path))
+    first.save(dataset_id("a"), workout_rows(8))
+    seqs = []
+
+    def add(store, offset):
+        seqs.append(store.append(dataset_id("a"), workout_rows(4, offset=offset)))
+
+    threads = [threading.Thread(target=add, args=(store, 10 * i)) for i, store in enumerate([first, second] * 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(seqs) == list(range(1, 11))
+    assert first.appended(dataset_id("a")) == list(range(1, 11))
+
+
+def test_appends_reach_other_workers_and_cubes_rebuilt_after_a_restart(tmp_path, monkeypatch):
+    import main
+
+    root = str(tmp_path / "datasets")
+    base, added = workout_rows(200), workout_rows(40, offset=1000)
+    expected = RollupCube(pd.concat([base, added], ignore_index=True))
+
+    # Worker A stores the dataset and the appended rows
+    monkeypatch.setattr(main, "storage", SimpleNamespace(column_store=ColumnStore(root)))
+    main.storage.column_store.save(dataset_id("dataset"), base)
+    main.storage.column_store.append(dataset_id("dataset"), added)
+
+    # Worker B (or A after a restart) only has the files on disk to go by
+    monkeypatch.setattr(main, "storage", SimpleNamespace(column_store=ColumnStore(root)))
+    cube, index = RollupCube(base), CohortIndex(base, min_cohort_size=1)
+    for target in (cube, index):
+        main.replay_dataset_appends(dataset_id("dataset"), target)
+        assert target.rows == 240
+        # A second replay finds nothing new
+        main.replay_dataset_appends(dataset_id("dataset"), target)
+        assert target.rows == 240
+    assert cube.query("Calories Burned", "Sum", ["Workout Type"]) == expected.query("Calories Burned", "Sum", ["Workout Type"])
@@ -0,0 +1,85 @@
+# backend/tests/test_csv_ingest.py - Chunked CSV parsing and the bounded-memory exact profile
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import csv_ingest
+from csv_ingest import profile_csv_upload, read_csv_upload
+
+
+def fitness_csv(rows: int, seed: int = 3) -> bytes:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "User ID": np.arange(rows),
+        "Gender": rng.choice(["Male", "Female", "Other"], rows),
+        "Age": rng.integers(18, 70, rows),
+        "Workout Type": rng.choice(["Yoga", "HIIT", "Cycling", "Running", "Strength"], rows),
+        "Calories Burned": rng.integers(100, 1200, rows),
+        "Body Fat (%)": np.round(rng.uniform(8, 40, rows), 1),
+    })
+    return df.to_csv(index=False).encode()
+
+
+@pytest.mark.parametrize("chunksize", [97, 1000, 50000])
+def test_chunked_parse_matches_one_chunk(chunksize):
+    data = fitness_csv(3000)
+    whole = read_csv_upload(io.BytesIO(data), chunksize=10**6)
+    chunked = read_csv_upload(io.BytesIO(data), chunksize=chunksize)
+    pd.testing.assert_frame_equal(chunked, whole)
+    assert isinstance(chunked["Gender"].dtype, pd.CategoricalDtype)
+    assert list(chunked["Gender"].cat.categories) == ["Female", "Male", "Other"]
+    assert chunked.attrs["memory"]["bytes_after"] < chunked.attrs["memory"]["bytes_before"]
+
+
+def test_header_only_csv_parses_to_an_empty_frame():
+    df = read_csv_upload(io.BytesIO(b"Age,Gender\n"))
+    assert df.shape == (0, 2)
+
+
+def test_exact_profile_stays_exact_below_the_limit():
+    data = fitness_csv(2000)
+    profile = profile_csv_upload(io.BytesIO(data), chunksize=500)
+    expected = pd.read_csv(io.BytesIO(data))["Age"].describe()
+    assert "approximate" not in profile
+    for stat in ("25%", "50%", "75%"):
+        assert profile["summary_stats"]["Age"][stat] == pytest.approx(expected[stat])
+
+
+def test_exact_profile_switches_to_a_sketch_past_the_limit(monkeypatch):
+    monkeypatch.setattr(csv_ingest, "EXACT_QUANTILE_MAX_VALUES", 1500)
+    data = fitness_csv(20000)
+    profile = profile_csv_upload(io.BytesIO(data), chunksize=1000)
+
+    assert profile["approximate"] is True
+    assert set(profile["error_bounds"]["approximate_percentiles"]) == {"User ID", "Age", "Calories Burned", "Body Fat (%)"}
+    expected = pd.read_csv(io.BytesIO(data))["Calories Burned"]
+    stats = profile["summary_stats"]["Calories Burned"]
+    # Moments stay exact, percentiles are within a few ranks of the truth
+    assert stats["mean"] == pytest.approx(expected.mean())
+    assert stats["max"] == expected.max()
+    for stat, q in (("25%", 0.25), ("50%", 0.5), ("75%", 0.75)):
+        rank = (expected <= stats[stat]).mean()
+        assert abs(rank - q) < 3 * profile["error_bounds"]["quantile_rank_error"]
+    # No column keeps its raw values once it has switched
+    moments = csv_ingest._RunningMoments(max_exact_values=10)
+    moments.update(np.arange(25, dtype=float))
+    assert moments.approximate and moments.values == []
+
+
+def test_streamed_profile_does_not_hand_out_a_dataset_id():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    client = TestClient(main.app)
+    data = fitness_csv(500, seed=11)
+    streamed = client.post(
+        "/api/analyze-data", files={"file": ("streamed.csv", data, "text/csv")}, data={"approximate": "true"}
+    ).json()
+    assert streamed["approximate"] is True
+    assert "dataset_id" not in streamed
+
+    stored = client.post("/api/analyze-data", files={"file": ("stored.csv", data, "text/csv")}).json()
+    assert client.get(f"/api/cube/{stored['dataset_id']}").status_code == 200
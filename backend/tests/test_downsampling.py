@@ -0,0 +1,95 @@
+# backend/tests/test_downsampling.py - LTTB against a point-by-point reference and grid binning invariants
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsampling import downsample_series, grid_bin, lttb_indices
+
+
+def reference_lttb(x, y, threshold):
+    """Plain loop over the same buckets as lttb_indices, as in the original LTTB description"""
+    n = len(x)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected, previous = [0], 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_start, next_stop = edges[bucket + 1], edges[bucket + 2]
+            avg_x, avg_y = np.mean(x[next_start:next_stop]), np.mean(y[next_start:next_stop])
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        best, best_area = start, -1.0
+        for i in range(start, stop):
+            area = abs((x[previous] - avg_x) * (y[i] - y[previous]) - (x[previous] - x[i]) * (avg_y - y[previous]))
+            if area > best_area:
+                best, best_area = i, area
+        selected.append(best)
+        previous = best
+    return selected + [n - 1]
+
+
+@pytest.mark.parametrize("n, threshold", [(1000, 50), (10_007, 333), (12, 5)])
+def test_lttb_matches_the_reference(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.uniform(0.5, 1.5, n))
+    y = np.cumsum(rng.normal(0, 1, n))
+    indices = lttb_indices(x, y, threshold)
+    assert indices.tolist() == reference_lttb(x, y, threshold)
+    assert len(indices) == threshold and np.all(np.diff(indices) > 0)
+
+
+def test_lttb_keeps_spikes_and_skips_missing_values():
+    x = np.arange(5000, dtype=np.float64)
+    y = np.sin(x / 300)
+    y[1234], y[4321] = 25.0, -25.0
+    y[2000:2500:3] = np.nan
+    indices = lttb_indices(x, y, 100)
+    assert {1234, 4321} <= set(indices.tolist())
+    assert not np.isnan(y[indices]).any()
+
+
+def test_lttb_leaves_short_series_alone():
+    x = y = np.arange(10, dtype=np.float64)
+    assert lttb_indices(x, y, 10).tolist() == list(range(10))
+    assert lttb_indices(x, y, 2).tolist() == list(range(10))
+
+
+def test_grid_bin_conserves_points_and_their_centroid():
+    rng = np.random.default_rng(0)
+    x, y = rng.normal(0, 1, 50_000), rng.normal(5, 2, 50_000)
+    x[:10] = np.nan
+    binned = grid_bin(x, y, 400)
+    assert len(binned["counts"]) <= 400
+    assert binned["counts"].sum() == 50_000 - 10
+    # Weighted by their counts, the cell centroids average to the mean of the points
+    keep = ~np.isnan(x)
+    assert np.average(binned["x"], weights=binned["counts"]) == pytest.approx(x[keep].mean())
+    assert np.average(binned["y"], weights=binned["counts"]) == pytest.approx(y[keep].mean())
+    assert binned["x"].min() >= np.nanmin(x) and binned["x"].max() <= np.nanmax(x)
+
+
+def test_grid_bin_handles_a_constant_axis():
+    binned = grid_bin(np.full(1000, 3.0), np.linspace(0, 1, 1000), 100)
+    assert np.all(binned["x"] == 3.0)
+    assert binned["counts"].sum() == 1000 and len(binned["counts"]) <= 10
+
+
+def test_downsample_series_picks_the_method_per_plot_type():
+    rng = np.random.default_rng(1)
+    x = np.arange(5000)
+    line = [{"x": x, "y": np.cumsum(rng.normal(size=5000))}, {"x": x[:50], "y": rng.normal(size=50)}]
+    assert downsample_series(line, "Line", 200) == "lttb"
+    assert len(line[0]["x"]) == 200 and line[0]["original_points"] == 5000
+    assert "original_points" not in line[1]
+
+    scatter = [{"x": rng.normal(size=5000), "y": rng.normal(size=5000)} for _ in range(2)]
+    scatter[1]["x"] = scatter[1]["x"] + 10
+    assert downsample_series(scatter, "Scatter", 100) == "grid"
+    assert all(len(s["x"]) <= 100 and s["counts"].sum() == 5000 for s in scatter)
+    # Both series were binned on the one shared grid, so the second stays to the right of the first
+    assert scatter[1]["x"].min() > scatter[0]["x"].max()
+
+    dates = [{"x": pd.date_range("2024-01-01", periods=5000, freq="h").to_numpy(), "y": rng.normal(size=5000)}]
+    assert downsample_series(dates, "Scatter", 100) == "lttb"
+    assert downsample_series(dates, "Bar", 10) is None
+    assert downsample_series(line, "Line", 0) is None
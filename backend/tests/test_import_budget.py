@@ -0,0 +1,11 @@
+# backend/tests/test_import_budget.py - Importing the API stays within its cold-start budget (see check_import_budget.py)
+from check_import_budget import IMPORT_BUDGET_RSS_MB, IMPORT_BUDGET_S, RUNS, measure
+
+
+def test_import_stays_within_budget():
+    # Best of a few runs, as the command-line check does, so a cold disk cache does not fail it
+    runs = [measure() for _ in range(RUNS)]
+    best = min(runs, key=lambda run: run["import_s"])
+    assert best["loaded"] == [], f"heavy modules imported eagerly: {best['loaded']}"
+    assert best["import_s"] <= IMPORT_BUDGET_S, f"import took {best['import_s']:.2f}s"
+    assert best["max_rss_mb"] <= IMPORT_BUDGET_RSS_MB, f"RSS reached {best['max_rss_mb']:.0f} MB"
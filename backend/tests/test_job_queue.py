@@ -0,0 +1,110 @@
+# backend/tests/test_job_queue.py - Job status transitions, failures, backpressure and expiry
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from job_queue import JobQueue, JobQueueFull
+
+
+def test_job_goes_from_queued_to_running_to_succeeded():
+    queue = JobQueue(workers=1, max_pending=10, result_ttl_s=60)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def generate():
+            await release.wait()
+            return {"plan": "3x5 squats"}
+
+        job = await queue.submit("diet_plan", generate)
+        seen = [job.status]
+        assert await job.wait_for_change(timeout=5)
+        seen.append(job.status)
+        assert queue.stats()["running"] == 1
+        release.set()
+        assert await job.wait_for_change(timeout=5)
+        seen.append(job.status)
+        await queue.stop()
+        return job, seen
+
+    job, seen = asyncio.run(scenario())
+    assert seen == ["queued", "running", "succeeded"]
+    assert job.started_at >= job.created_at and job.finished_at >= job.started_at
+    assert job.to_dict()["result"] == {"plan": "3x5 squats"} and "error" not in job.to_dict()
+
+
+def test_failures_keep_the_http_detail():
+    queue = JobQueue(workers=2, max_pending=10, result_ttl_s=60)
+
+    async def scenario():
+        async def rejected():
+            raise HTTPException(status_code=502, detail="OpenRouter unavailable")
+
+        async def broken():
+            raise ValueError("bad profile")
+
+        jobs = [await queue.submit("diet_plan", rejected), await queue.submit("ai_insights", broken)]
+        for job in jobs:
+            while not job.done:
+                await job.wait_for_change(timeout=5)
+        await queue.stop()
+        return jobs
+
+    rejected, broken = asyncio.run(scenario())
+    assert rejected.status == broken.status == "failed"
+    assert rejected.to_dict()["error"] == "OpenRouter unavailable"
+    assert broken.error == "bad profile" and "result" not in broken.to_dict()
+
+
+def test_workers_bound_concurrency_and_pending_jobs_are_bounded():
+    queue = JobQueue(workers=2, max_pending=3, result_ttl_s=60)
+
+    async def scenario():
+        release = asyncio.Event()
+        running = []
+
+        async def generate():
+            running.append(1)
+            await release.wait()
+            return "done"
+
+        jobs = [await queue.submit("workout_plan", generate) for _ in range(2)]
+        await asyncio.sleep(0.01)  # both workers pick a job up
+        jobs += [await queue.submit("workout_plan", generate) for _ in range(3)]
+        with pytest.raises(JobQueueFull):
+            await queue.submit("workout_plan", generate)
+        stats = queue.stats()
+        assert (stats["running"], stats["queued"], len(running)) == (2, 3, 2)
+
+        release.set()
+        for job in jobs:
+            while not job.done:
+                await job.wait_for_change(timeout=5)
+        await queue.stop()
+        return queue.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["succeeded"] == 5 and stats["queued"] == stats["running"] == 0
+
+
+def test_stopping_fails_running_jobs_and_finished_jobs_expire():
+    queue = JobQueue(workers=1, max_pending=10, result_ttl_s=60)
+
+    async def scenario():
+        async def forever():
+            await asyncio.Event().wait()
+
+        job = await queue.submit("diet_plan", forever)
+        await job.wait_for_change(timeout=5)
+        await queue.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == "failed" and job.error == "Job cancelled during shutdown"
+    assert queue.get(job.id) is job
+
+    job.finished_at = time.time() - 61
+    assert queue.get(job.id) is None
+    assert queue.get("no-such-job") is None
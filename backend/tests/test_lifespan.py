@@ -0,0 +1,25 @@
+# backend/tests/test_lifespan.py - The app's lifespan starts the background workers and closes every resource
+from fastapi.testclient import TestClient
+
+import main
+from shared_state import MemoryStateBackend
+from workout_store import WorkoutStore
+
+
+def test_lifespan_starts_workers_and_closes_resources_on_shutdown(monkeypatch):
+    # Private stand-ins, so closing them does not affect the module-level singletons other tests use
+    store, state = WorkoutStore(":memory:"), MemoryStateBackend()
+    closed = []
+    monkeypatch.setattr(store, "close", lambda: closed.append("workout_store"))
+    monkeypatch.setattr(state, "close", lambda: closed.append("shared_state"))
+    monkeypatch.setattr(main, "workout_store", store)
+    monkeypatch.setattr(main, "shared_state", state)
+    monkeypatch.setenv("PREWARM_SUBSYSTEMS", "calorie_engine")
+
+    with TestClient(main.app) as client:
+        assert main.job_queue._workers
+        assert client.get("/api/jobs/stats").json()["workers"] == main.job_queue.worker_count
+        assert client.get("/api/subsystems").json()["calorie_engine"] is not None
+    assert not main.job_queue._workers
+    assert main.loop_lag_sampler._task is None
+    assert closed == ["workout_store", "shared_state"]
@@ -0,0 +1,100 @@
+# backend/tests/test_llm_cache.py - Single-flight deduplication, TTL and size bound of the LLM response cache
+import asyncio
+
+import pytest
+
+import llm_cache
+from llm_cache import LLMResponseCache, prompt_cache_key
+
+
+class Upstream:
+    """Counts calls and holds each one until released"""
+
+    def __init__(self, result: str = "plan", error: Exception = None):
+        self.calls = 0
+        self.result, self.error = result, error
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_identical_prompts_make_one_upstream_call():
+    cache = LLMResponseCache(max_entries=8, ttl_s=60)
+
+    async def scenario():
+        upstream = Upstream()
+        waiters = [asyncio.ensure_future(cache.get_or_generate("k", upstream)) for _ in range(10)]
+        await asyncio.sleep(0)
+        assert cache.stats()["in_flight"] == 1
+        upstream.release.set()
+        results = await asyncio.gather(*waiters)
+        # Afterwards the completion is served from the cache
+        assert await cache.get_or_generate("k", upstream) == "plan"
+        return upstream.calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert calls == 1 and results == ["plan"] * 10
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"], stats["in_flight"]) == (1, 9, 1, 0)
+    assert stats["hit_ratio"] == pytest.approx(10 / 11, abs=1e-4)
+
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    cache = LLMResponseCache(max_entries=8, ttl_s=60)
+
+    async def scenario():
+        failing = Upstream(error=RuntimeError("upstream down"))
+        waiters = [asyncio.ensure_future(cache.get_or_generate("k", failing)) for _ in range(3)]
+        await asyncio.sleep(0)
+        failing.release.set()
+        outcomes = await asyncio.gather(*waiters, return_exceptions=True)
+        working = Upstream()
+        working.release.set()
+        return outcomes, await cache.get_or_generate("k", working), working.calls
+
+    outcomes, retried, calls = asyncio.run(scenario())
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert retried == "plan" and calls == 1
+
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_call():
+    cache = LLMResponseCache(max_entries=8, ttl_s=60)
+
+    async def scenario():
+        upstream = Upstream()
+        leaving = asyncio.ensure_future(cache.get_or_generate("k", upstream))
+        staying = asyncio.ensure_future(cache.get_or_generate("k", upstream))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        await asyncio.sleep(0)
+        upstream.release.set()
+        return leaving.cancelled(), await staying
+
+    assert asyncio.run(scenario()) == (True, "plan")
+    assert cache.get("k") == "plan"
+
+
+def test_entries_expire_and_the_least_recently_used_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "monotonic", lambda: now[0])
+    cache = LLMResponseCache(max_entries=2, ttl_s=10)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    assert cache.get("b") is None and cache.stats()["evictions"] == 1
+
+    now[0] += 11
+    assert cache.get("a") is None and cache.get("c") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_keys_depend_on_model_and_prompt():
+    assert prompt_cache_key("m", "p") == prompt_cache_key("m", "p")
+    assert prompt_cache_key("m", "p") != prompt_cache_key("n", "p")
+    assert prompt_cache_key("m", "ab") != prompt_cache_key("ma", "b")
@@ -0,0 +1,36 @@
+# backend/tests/test_plot_config.py - Plot config validation against the dataset's columns
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+import main
+
+
+def bar_config(x_axis: str) -> dict:
+    return {
+        "x_axis": x_axis, "y_axis": "Calories Burned", "graph_type": "Bar", "legend_attr": None,
+        "stat_mode": "Mean", "max_points": 0, "format": "png", "dpi": 100,
+    }
+
+
+@pytest.fixture
+def frame():
+    n = 200
+    names = [f"user-{i}" for i in range(n)]
+    return pd.DataFrame({
+        "Name": names,
+        "Name (categorical)": pd.Categorical(names),
+        "Steps Taken": range(n),
+        "Calories Burned": [float(i) for i in range(n)],
+    })
+
+
+@pytest.mark.parametrize("x_axis", ["Name", "Name (categorical)"])
+def test_bar_accepts_text_and_categorical_x_axes_of_any_cardinality(frame, x_axis):
+    main.validate_plot_config(frame, bar_config(x_axis))
+
+
+def test_bar_rejects_a_high_cardinality_numeric_x_axis(frame):
+    with pytest.raises(HTTPException) as error:
+        main.validate_plot_config(frame, bar_config("Steps Taken"))
+    assert error.value.status_code == 400
@@ -0,0 +1,89 @@
+# backend/tests/test_plot_etag.py - Plot ETags: stable per dataset and config, 304 on revalidation
+import hashlib
+import json
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from plot_cache import PlotCache, etag_matches, normalize_plot_config, plot_cache_key
+
+PARAMS = {"x_axis": "Age", "y_axis": "Calories Burned", "graph_type": "Scatter", "stat_mode": "Mean"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    client = TestClient(main.app)
+    yield client
+    main.plotting.plot_renderer.shutdown()
+
+
+@pytest.fixture(scope="module")
+def dataset_id(client):
+    df = pd.DataFrame({"Age": range(20, 70), "Calories Burned": [300.0 + 5 * i for i in range(50)]})
+    upload = client.post("/api/analyze-data", files={"file": ("ages.csv", df.to_csv(index=False).encode(), "text/csv")})
+    return upload.json()["dataset_id"]
+
+
+def test_revalidation_with_the_etag_gets_a_304(client, dataset_id):
+    first = client.get("/api/generate-plot/image", params={**PARAMS, "dataset_id": dataset_id})
+    assert first.status_code == 200 and first.content.startswith(b"\x89PNG")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == main.PLOT_CACHE_CONTROL
+
+    again = client.get("/api/generate-plot/image", params={**PARAMS, "dataset_id": dataset_id}, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+    weak = client.get("/api/generate-plot/image", params={**PARAMS, "dataset_id": dataset_id}, headers={"If-None-Match": f'"other", W/{etag}'})
+    assert weak.status_code == 304
+
+    # The JSON variant shares the cache entry and the ETag
+    hits = main.plot_cache.hits
+    as_json = client.get("/api/generate-plot", params={**PARAMS, "dataset_id": dataset_id})
+    assert as_json.headers["etag"] == etag and as_json.json()["plot"].startswith("data:image/png;base64,")
+    assert main.plot_cache.hits == hits + 1
+
+
+def test_etag_changes_with_the_config_but_not_its_spelling(client, dataset_id):
+    etag = client.get("/api/generate-plot/image", params={**PARAMS, "dataset_id": dataset_id}).headers["etag"]
+    spaced = client.get("/api/generate-plot/image", params={**PARAMS, "x_axis": " Age ", "dataset_id": dataset_id})
+    assert spaced.headers["etag"] == etag
+    stale = client.get(
+        "/api/generate-plot/image", params={**PARAMS, "stat_mode": "Sum", "dataset_id": dataset_id}, headers={"If-None-Match": etag}
+    )
+    assert stale.status_code == 200 and stale.headers["etag"] != etag
+
+
+def test_uploading_the_file_again_revalidates_against_the_same_etag(client, dataset_id):
+    etag = client.get("/api/generate-plot/image", params={**PARAMS, "dataset_id": dataset_id}).headers["etag"]
+    df = pd.DataFrame({"Age": range(20, 70), "Calories Burned": [300.0 + 5 * i for i in range(50)]})
+    response = client.post(
+        "/api/generate-plot/image",
+        files={"file": ("ages.csv", df.to_csv(index=False).encode(), "text/csv")},
+        data={"plot_config": json.dumps(PARAMS)},
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 304
+
+
+def test_a_known_etag_is_answered_without_loading_the_dataset(client):
+    unknown = hashlib.sha256(b"never uploaded").hexdigest()
+    etag = f'"{plot_cache_key(unknown, normalize_plot_config(PARAMS))}"'
+    params = {**PARAMS, "dataset_id": unknown}
+    assert client.get("/api/generate-plot/image", params=params, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/generate-plot/image", params=params).status_code == 404
+
+
+def test_etag_matching_and_the_byte_bounded_cache():
+    assert etag_matches('"a", "b"', '"b"') and etag_matches("*", '"b"') and etag_matches('W/"b"', '"b"')
+    assert not etag_matches(None, '"b"') and not etag_matches('"bb"', '"b"')
+
+    cache = PlotCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.get("a")
+    cache.put("c", b"1234")
+    assert cache.get("b") is None and cache.get("a") == b"1234"
+    cache.put("huge", b"x" * 11)
+    assert cache.get("huge") is None
+    assert cache.stats()["evictions"] == 1 and cache.stats()["bytes"] == 8
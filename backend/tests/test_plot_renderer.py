@@ -0,0 +1,42 @@
+# backend/tests/test_plot_renderer.py - Queue slots of the plot process pool
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from plot_renderer import PlotQueueFull, PlotRenderer, PlotTimeout
+
+CONFIG = {"x_axis": "Age", "y_axis": "Calories Burned", "graph_type": "Scatter", "legend_attr": None, "stat_mode": "Mean"}
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({"Age": range(20, 70), "Calories Burned": [300.0 + 5 * i for i in range(50)]})
+
+
+def test_timed_out_render_keeps_its_slot_until_the_worker_finishes(frame):
+    # A cold pool spawns its worker and imports matplotlib first, which alone outlasts the timeout
+    renderer = PlotRenderer(pool_size=1, max_queue=1, timeout_s=0.01)
+
+    async def scenario():
+        with pytest.raises(PlotTimeout):
+            await renderer.render(frame, CONFIG)
+        assert renderer.in_flight == 1
+        with pytest.raises(PlotQueueFull):
+            await renderer.render(frame, CONFIG)
+
+        deadline = time.monotonic() + 60
+        while renderer.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        assert renderer.in_flight == 0
+
+        renderer.timeout_s = 60
+        image = await renderer.render(frame, CONFIG)
+        assert image.startswith(b"\x89PNG")
+        assert renderer.in_flight == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        renderer.shutdown()
@@ -0,0 +1,97 @@
+# backend/tests/test_rollup_cube.py - Cube answers against pandas groupby, before and after appends
+import numpy as np
+import pandas as pd
+import pytest
+
+from rollup_cube import CUBE_STATS, RollupCube
+
+PANDAS_STATS = {"Count": "count", "Sum": "sum", "Mean": "mean", "Variance": "var", "Min": "min", "Max": "max"}
+
+
+def workouts(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "User ID": np.arange(rows),
+        "Age": rng.integers(18, 70, rows),
+        "Gender": rng.choice(["Male", "Female"], rows),
+        "Workout Type": rng.choice(["Yoga", "HIIT", "Cycling", "Running"], rows),
+        "Workout Intensity": rng.choice(["Low", "Medium", "High"], rows),
+        "Steps Taken": rng.integers(1000, 20000, rows).astype(np.int32),
+        "Calories Burned": rng.normal(500, 120, rows),
+    })
+
+
+def expected_cells(df: pd.DataFrame, measure: str, stat: str, group_by, filters=None) -> dict:
+    for dimension, value in (filters or {}).items():
+        df = df[df[dimension] == value]
+    if not group_by:
+        return {(): getattr(df[measure], PANDAS_STATS[stat])()}
+    grouped = getattr(df.groupby(group_by)[measure], PANDAS_STATS[stat])()
+    return {key if isinstance(key, tuple) else (key,): value for key, value in grouped.items()}
+
+
+def cube_cells(cube: RollupCube, measure: str, stat: str, group_by, filters=None) -> dict:
+    return {tuple(cell[d] for d in group_by): cell["value"] for cell in cube.query(measure, stat, group_by, filters)}
+
+
+def assert_cells_equal(actual: dict, expected: dict):
+    assert set(actual) == set(expected)
+    for key, value in expected.items():
+        assert actual[key] == pytest.approx(value, rel=1e-9, abs=1e-6)
+
+
+@pytest.mark.parametrize("stat", CUBE_STATS)
+@pytest.mark.parametrize("group_by", [[], ["Gender"], ["Workout Type", "Workout Intensity"]])
+def test_queries_match_pandas(stat, group_by):
+    df = workouts(2000)
+    cube = RollupCube(df)
+    for measure in ("Calories Burned", "Steps Taken"):
+        assert_cells_equal(cube_cells(cube, measure, stat, group_by), expected_cells(df, measure, stat, group_by))
+    filters = {"Gender": "Female"}
+    assert_cells_equal(
+        cube_cells(cube, "Calories Burned", stat, group_by, filters),
+        expected_cells(df, "Calories Burned", stat, group_by, filters),
+    )
+
+
+def test_variance_of_large_values_keeps_its_precision():
+    df = workouts(500)
+    df["Steps Taken"] = df["Steps Taken"].astype(np.int64) + 10_000_000
+    cube = RollupCube(df)
+    (cell,) = cube.query("Steps Taken", "Variance")
+    assert cell["value"] == pytest.approx(df["Steps Taken"].var(), rel=1e-6)
+    single = RollupCube(df.head(1))
+    assert single.query("Steps Taken", "Variance")[0]["value"] is None
+
+
+def test_appends_match_a_rebuild():
+    base, added = workouts(1500), workouts(700, seed=1)
+    # A workout type the base never saw adds new cells to the existing cuboids
+    added.loc[added.index[:50], "Workout Type"] = "Pilates"
+    cube = RollupCube(base)
+    assert cube.append(added.iloc[:300], seq=1) == 1800
+    assert cube.append(added.iloc[:300], seq=1) == 1800  # already folded in
+    assert cube.append(added.iloc[300:], seq=2) == 2200
+    rebuilt = RollupCube(pd.concat([base, added], ignore_index=True))
+
+    assert cube.describe() == rebuilt.describe()
+    for stat in CUBE_STATS:
+        for group_by in ([], ["Workout Type"], ["Age Band", "Gender", "Workout Type"]):
+            assert_cells_equal(
+                cube_cells(cube, "Calories Burned", stat, group_by),
+                cube_cells(rebuilt, "Calories Burned", stat, group_by),
+            )
+
+
+def test_ids_are_not_measures_and_bad_queries_are_rejected():
+    cube = RollupCube(workouts(100), max_dimensions=2)
+    assert "User ID" not in cube.measures
+    assert "Age Band" in cube.dimensions
+    with pytest.raises(ValueError):
+        cube.query("Calories Burned", "Median")
+    with pytest.raises(ValueError):
+        cube.query("User ID", "Sum")
+    with pytest.raises(ValueError):
+        cube.query("Calories Burned", "Sum", ["Gender", "Workout Type", "Workout Intensity"])
+    with pytest.raises(KeyError):
+        cube.append(workouts(10).drop(columns=["Gender"]))
@@ -0,0 +1,112 @@
+# backend/tests/test_route_tracker.py - Ring-buffered route sessions: distances against geopy, wraparound, validation and eviction
+import random
+
+import numpy as np
+import pytest
+from geopy.distance import great_circle
+
+import route_tracker
+from route_tracker import RouteSession, RouteTracker, path_distance_km
+
+
+def random_walk(n: int, seed: int = 7):
+    """n fixes a few hundred metres apart, one every 10 s, starting anywhere on earth"""
+    rng = random.Random(seed)
+    latitude, longitude = rng.uniform(-60, 60), rng.uniform(-170, 170)
+    points = []
+    for i in range(n):
+        latitude += rng.uniform(-0.003, 0.003)
+        longitude += rng.uniform(-0.003, 0.003)
+        points.append((latitude, longitude, 1_700_000_000.0 + 10 * i))
+    return points
+
+
+def geopy_length_km(points) -> float:
+    return sum(great_circle(a[:2], b[:2]).km for a, b in zip(points, points[1:]))
+
+
+def test_incremental_distance_matches_geopy():
+    points = random_walk(500)
+    session = RouteSession("walk", capacity=1000)
+    for i, (latitude, longitude, timestamp) in enumerate(points):
+        session.add(latitude, longitude, timestamp)
+        if i:
+            assert session.last_segment_km == pytest.approx(great_circle(points[i - 1][:2], points[i][:2]).km, rel=1e-9, abs=1e-12)
+    assert session.distance_km == pytest.approx(geopy_length_km(points), rel=1e-9)
+
+
+@pytest.mark.parametrize("points", [
+    random_walk(300, seed=1),
+    [(0.0, 179.9, 0.0), (0.0, -179.9, 1.0)],  # across the antimeridian
+    [(89.9, 0.0, 0.0), (89.9, 180.0, 1.0)],   # over the pole
+    [(0.0, 0.0, 0.0), (0.0, 180.0, 1.0)],     # antipodal
+])
+def test_path_distance_matches_geopy(points):
+    latitudes, longitudes = np.array([p[0] for p in points]), np.array([p[1] for p in points])
+    assert path_distance_km(latitudes, longitudes) == pytest.approx(geopy_length_km(points), rel=1e-9)
+
+
+def test_path_distance_of_fewer_than_two_points_is_zero():
+    assert path_distance_km(np.array([]), np.array([])) == 0.0
+    assert path_distance_km(np.array([10.0]), np.array([20.0])) == 0.0
+
+
+def test_ring_buffer_keeps_the_latest_fixes_and_total_distance():
+    points = random_walk(700)
+    session = RouteSession("long", capacity=300)
+    for point in points:
+        session.add(*point)
+
+    retained = session.points()
+    assert len(retained) == 300
+    assert [(p["latitude"], p["longitude"]) for p in retained] == [p[:2] for p in points[-300:]]
+    assert session.nbytes == 300 * 24
+    # Distance and elapsed time cover every fix, not only the retained ones
+    assert session.total_points == 700
+    assert session.distance_km == pytest.approx(geopy_length_km(points), rel=1e-9)
+    assert session.stats()["elapsed_s"] == pytest.approx(points[-1][2] - points[0][2])
+
+
+def test_buffer_grows_to_capacity_before_wrapping():
+    session = RouteSession("grow", capacity=1000)
+    assert session.nbytes == route_tracker.INITIAL_BUFFER_POINTS * 24
+    for point in random_walk(route_tracker.INITIAL_BUFFER_POINTS + 1):
+        session.add(*point)
+    assert session.nbytes == 2 * route_tracker.INITIAL_BUFFER_POINTS * 24
+    assert len(session.points()) == route_tracker.INITIAL_BUFFER_POINTS + 1
+
+
+@pytest.mark.parametrize("latitude, longitude", [(90.1, 0.0), (-91.0, 0.0), (0.0, 180.5), (0.0, -181.0)])
+def test_invalid_coordinates_are_rejected(latitude, longitude):
+    session = RouteSession("bad", capacity=10)
+    session.add(10.0, 10.0, 100.0)
+    with pytest.raises(ValueError):
+        session.add(latitude, longitude, 200.0)
+    assert session.total_points == 1
+
+
+def test_out_of_order_fix_is_rejected_and_leaves_the_route_unchanged():
+    tracker = RouteTracker(max_points=10, idle_timeout_s=600)
+    tracker.add_point("run", 40.0, -74.0, "2024-05-01T07:00:10Z")
+    before = tracker.add_point("run", 40.001, -74.0, "2024-05-01T07:00:20Z")
+    with pytest.raises(ValueError):
+        tracker.add_point("run", 40.002, -74.0, "2024-05-01T07:00:15Z")
+    assert tracker.get("run").stats() == before
+    # The same timestamp as the last fix is still accepted
+    assert tracker.add_point("run", 40.001, -74.0, "2024-05-01T07:00:20Z")["total_points"] == 3
+
+
+def test_idle_sessions_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(route_tracker.time, "monotonic", lambda: now[0])
+    tracker = RouteTracker(max_points=10, idle_timeout_s=60)
+    tracker.add_point("idle", 10.0, 10.0, "2024-05-01T07:00:00Z")
+    now[0] += 45
+    tracker.add_point("active", 20.0, 20.0, "2024-05-01T07:00:00Z")
+    now[0] += 30
+
+    assert tracker.get("idle") is None
+    assert tracker.get("active") is not None
+    stats = tracker.stats()
+    assert stats["sessions"] == 1
+    assert stats["evictions"] == 1
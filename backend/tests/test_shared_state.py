@@ -0,0 +1,102 @@
+# backend/tests/test_shared_state.py - Writes through one SQLite state backend are visible to another worker on the same file
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from job_queue import JobQueue, RemoteJob
+from route_tracker import RouteTracker
+from shared_state import SQLiteStateBackend
+
+from conftest import BACKEND_DIR
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "shared_state.db")
+
+
+@pytest.fixture
+def workers(state_path):
+    """Two backends on one file, each with its own connection, like two API worker processes"""
+    first, second = SQLiteStateBackend(state_path), SQLiteStateBackend(state_path)
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_route_points_reach_the_other_worker(workers):
+    state_a, state_b = workers
+    tracker_a = RouteTracker(max_points=100, idle_timeout_s=600, state=state_a)
+    tracker_b = RouteTracker(max_points=100, idle_timeout_s=600, state=state_b)
+
+    tracker_a.add_point("run", 52.5200, 13.4050, "2024-05-01T07:00:00Z")
+    stats_a = tracker_a.add_point("run", 52.5210, 13.4060, "2024-05-01T07:00:30Z")
+    session_b = tracker_b.get("run")
+    assert session_b is not None
+    assert session_b.stats() == stats_a
+
+    stats_b = tracker_b.add_point("run", 52.5220, 13.4070, "2024-05-01T07:01:00Z")
+    assert tracker_a.get("run").stats() == stats_b
+    assert stats_b["total_points"] == 3
+
+    # Ordering is checked against the shared log, not just the local replay
+    with pytest.raises(ValueError):
+        tracker_a.add_point("run", 52.5230, 13.4080, "2024-05-01T06:59:00Z")
+
+    assert tracker_b.clear("run")
+    assert tracker_a.get("run") is None
+
+
+def test_route_points_reach_another_process(state_path):
+    writer = (
+        "from route_tracker import RouteTracker\n"
+        "from shared_state import SQLiteStateBackend\n"
+        f"tracker = RouteTracker(100, 600, state=SQLiteStateBackend({state_path!r}))\n"
+        "tracker.add_point('ride', 48.8566, 2.3522, '2024-05-01T07:00:00Z')\n"
+        "tracker.add_point('ride', 48.8606, 2.3376, '2024-05-01T07:05:00Z')\n"
+    )
+    subprocess.run([sys.executable, "-c", writer], cwd=BACKEND_DIR, check=True, env={**os.environ, "PYTHONPATH": BACKEND_DIR})
+
+    state = SQLiteStateBackend(state_path)
+    try:
+        session = RouteTracker(100, 600, state=state).get("ride")
+        assert session is not None
+        assert session.total_points == 2
+        assert session.distance_km > 1.0
+    finally:
+        state.close()
+
+
+def test_job_status_reaches_the_other_worker(workers):
+    state_a, state_b = workers
+    queue_a = JobQueue(workers=1, max_pending=10, result_ttl_s=60, state=state_a)
+    queue_b = JobQueue(workers=1, max_pending=10, result_ttl_s=60, state=state_b)
+    release = None
+
+    async def generate():
+        await release.wait()
+        return {"plan": "3x5 squats"}
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        job = await queue_a.submit("diet_plan", generate)
+        remote = queue_b.get(job.id)
+        assert isinstance(remote, RemoteJob)
+        assert remote.status in ("queued", "running")
+
+        release.set()
+        while not remote.done:
+            assert await remote.wait_for_change(timeout=5)
+        await queue_a.stop()
+        return job, remote
+
+    job, remote = asyncio.run(scenario())
+    assert job.status == "succeeded"
+    assert remote.to_dict()["status"] == "succeeded"
+    assert remote.to_dict()["result"] == {"plan": "3x5 squats"}
+    assert queue_b.get("no-such-job") is None
+
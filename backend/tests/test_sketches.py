@@ -0,0 +1,82 @@
+# backend/tests/test_sketches.py - Sketch estimates stay within their stated error bounds
+import numpy as np
+import pandas as pd
+import pytest
+
+from sketches import HyperLogLog, KLLSketch, ReservoirSample
+
+QUANTILES = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+
+def rank_errors(sketch: KLLSketch, data: np.ndarray) -> np.ndarray:
+    """How far each estimated quantile's true rank is from the requested one, as a fraction of n"""
+    ordered = np.sort(data)
+    estimates = sketch.quantiles(QUANTILES)
+    ranks = np.searchsorted(ordered, estimates, side='right') / len(data)
+    return np.abs(ranks - np.array(QUANTILES))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_kll_rank_error_is_within_bound_in_chunks(seed):
+    rng = np.random.default_rng(seed)
+    data = rng.lognormal(3, 1, 200_000)
+    sketch = KLLSketch(k=200, seed=seed)
+    for chunk in np.array_split(data, 37):
+        sketch.update(chunk)
+    assert sketch.count == len(data)
+    assert sketch.retained < 3 * 200 * np.log2(len(data) / 200)
+    assert rank_errors(sketch, data).max() <= sketch.rank_error()
+
+
+def test_kll_merge_is_as_accurate_as_one_sketch():
+    rng = np.random.default_rng(7)
+    parts = [rng.normal(i, 1, 50_000) for i in range(4)]
+    merged = KLLSketch(k=200, seed=0)
+    for i, part in enumerate(parts):
+        sketch = KLLSketch(k=200, seed=i + 1)
+        sketch.update(part)
+        merged.merge(sketch)
+    data = np.concatenate(parts)
+    assert merged.count == len(data)
+    assert rank_errors(merged, data).max() <= merged.rank_error()
+
+
+def test_kll_ignores_nan_and_small_inputs_are_exact():
+    sketch = KLLSketch(k=200, seed=0)
+    assert np.isnan(sketch.quantiles([0.5])[0])
+    sketch.update(np.array([3.0, np.nan, 1.0, 2.0]))
+    assert sketch.count == 3
+    assert sketch.quantiles([0.0, 0.5, 1.0]) == [1.0, 2.0, 3.0]
+
+
+@pytest.mark.parametrize("distinct", [50, 3_000, 100_000])
+def test_hll_estimate_is_within_three_standard_errors(distinct):
+    rng = np.random.default_rng(distinct)
+    # Every value several times over, in chunks, so duplicates across chunks must not be counted twice
+    values = pd.Series(rng.permutation(np.repeat(np.arange(distinct), 3)))
+    hll = HyperLogLog(p=12)
+    for chunk in np.array_split(values, 10):
+        hll.update(chunk)
+    assert hll.estimate() == pytest.approx(distinct, rel=3 * hll.relative_error())
+
+
+def test_hll_merge_equals_one_pass_and_skips_missing():
+    values = pd.Series([f"user-{i}" for i in range(20_000)] + [None] * 100)
+    whole, first, second = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    whole.update(values)
+    first.update(values.iloc[:12_000])
+    second.update(values.iloc[8_000:])
+    first.merge(second)
+    assert first.estimate() == whole.estimate()
+    assert whole.estimate() == pytest.approx(20_000, rel=3 * whole.relative_error())
+
+
+def test_reservoir_sample_keeps_size_rows_spread_over_the_stream():
+    stream = pd.DataFrame({"row": np.arange(100_000)})
+    sample = ReservoirSample(size=1000, seed=1)
+    for chunk in np.array_split(stream, 23):
+        sample.update(chunk)
+    rows = [r["row"] for r in sample.rows]
+    assert sample.seen == len(stream) and len(rows) == 1000 == len(set(rows))
+    # A uniform sample has its mean near the stream's: one standard error is ~0.9% of the range here
+    assert np.mean(rows) == pytest.approx(stream["row"].mean(), rel=0.06)
@@ -0,0 +1,69 @@
+# backend/tests/test_weight_projection.py - Batch weight trajectories against the single-profile closed form
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from formulas import linear_weight_plan
+from weight_projection import project_weights
+
+PROFILE = {"weight_kg": 80.0, "height_cm": 180.0, "age": 30, "gender": "Male", "activity_level": "Sedentary", "goal_type": "lose"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("goal_type", ["lose", "maintain", "gain", "Lose ", "unknown"])
+def test_linear_projection_matches_the_scalar_plan(goal_type):
+    profile = {**PROFILE, "goal_type": goal_type}
+    projection = project_weights(pd.DataFrame([profile]), 180, adaptive=False)
+    plan = linear_weight_plan(**profile)
+    assert projection["tdee"][0] == pytest.approx(plan["tdee"])
+    assert projection["daily_calories"][0] == pytest.approx(plan["daily_calories"])
+    assert projection["trajectory"][0, 30] == pytest.approx(80.0 + 30 * plan["daily_change_kg"], abs=1e-4)
+
+
+def test_adaptive_loss_slows_down_as_weight_drops():
+    trajectory = project_weights(pd.DataFrame([PROFILE]), 365)["trajectory"][0]
+    losses = -(trajectory[1:] - trajectory[:-1])
+    assert (losses > 0).all()
+    assert losses[-1] < losses[0]
+
+
+def test_single_endpoint_uses_the_scalar_plan(client):
+    body = client.post("/api/predict-weight", json=PROFILE).json()
+    plan = linear_weight_plan(**PROFILE)
+    assert body["predictions"]["1_month"] == round(80.0 + 30 * plan["daily_change_kg"], 2)
+    assert body["tdee"] == round(plan["tdee"])
+
+
+def test_batch_steps_always_end_on_the_last_day(client):
+    response = client.post("/api/predict-weight/batch", json={"profiles": [PROFILE], "days": 31, "step_days": 10})
+    assert response.status_code == 200
+    body = response.json()
+    expected = project_weights(pd.DataFrame([PROFILE]), 31)["trajectory"][0]
+    assert body["trajectory_days"] == [0, 10, 20, 30, 31]
+    projection = body["projections"][0]
+    assert projection["trajectory"] == [round(float(expected[d]), 2) for d in (0, 10, 20, 30, 31)]
+    assert projection["final_weight"] == round(float(expected[31]), 2)
+
+
+def test_batch_accepts_goal_types_in_any_case(client):
+    profiles = [{**PROFILE, "goal_type": goal} for goal in ("Lose", "GAIN", " maintain ")]
+    response = client.post("/api/predict-weight/batch", json={"profiles": profiles, "days": 10, "adaptive": False})
+    assert response.status_code == 200
+    finals = [p["final_weight"] for p in response.json()["projections"]]
+    assert finals[0] < 80.0 < finals[1]
+    assert finals[2] == 80.0
+
+
+@pytest.mark.parametrize("body, status", [
+    ({"profiles": []}, 400),
+    ({"profiles": [{**PROFILE, "goal_type": "bulk"}]}, 400),
+    ({"profiles": [PROFILE], "step_days": 0}, 400),
+    ({"profiles": [PROFILE], "days": 0}, 400),
+])
+def test_batch_rejects_invalid_requests(client, body, status):
+    assert client.post("/api/predict-weight/batch", json=body).status_code == status
@@ -0,0 +1,100 @@
+# backend/tests/test_workout_store.py - Incrementally maintained streaks and totals against a full rebuild
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from workout_store import WorkoutStore
+
+TODAY = date(2024, 6, 30)
+
+
+@pytest.fixture
+def store():
+    store = WorkoutStore(":memory:")
+    yield store
+    store.close()
+
+
+def log(store: WorkoutStore, day: date, calories: int = 300, user_id: str = "default") -> int:
+    return store.add({"date": day.isoformat(), "duration": 30, "calories": calories, "exercises": {}}, user_id)["id"]
+
+
+def runs(store: WorkoutStore):
+    return [tuple(row) for row in store._conn.execute(
+        "SELECT user_id, start_date, end_date, length FROM streak_runs ORDER BY user_id, start_date"
+    )]
+
+
+def test_backfilled_day_merges_the_runs_around_it(store):
+    for offset in (5, 4, 3, 1, 0):
+        log(store, TODAY - timedelta(days=offset))
+    summary = store.summary(today=TODAY)
+    assert (summary["current_streak"], summary["longest_streak"]) == (2, 3)
+
+    log(store, TODAY - timedelta(days=2))
+    summary = store.summary(today=TODAY)
+    assert (summary["current_streak"], summary["longest_streak"]) == (6, 6)
+    assert len(runs(store)) == 1
+
+
+def test_deleting_the_last_workout_of_a_day_splits_its_run(store):
+    ids = {offset: log(store, TODAY - timedelta(days=offset)) for offset in range(7)}
+    second = log(store, TODAY - timedelta(days=3))
+
+    # The day still has a workout, so the run is untouched
+    store.delete(second)
+    assert store.summary(today=TODAY)["current_streak"] == 7
+
+    store.delete(ids[3])
+    summary = store.summary(today=TODAY)
+    assert (summary["current_streak"], summary["longest_streak"]) == (3, 3)
+    assert [(start, end) for _, start, end, _ in runs(store)] == [("2024-06-24", "2024-06-26"), ("2024-06-28", "2024-06-30")]
+
+    # Deleting the ends shortens the runs instead of splitting them
+    store.delete(ids[0])
+    store.delete(ids[6])
+    assert [length for *_, length in runs(store)] == [2, 2]
+    assert store.delete(ids[0]) is None
+
+
+def test_current_streak_counts_from_yesterday_until_a_day_is_missed(store):
+    for offset in range(1, 4):
+        log(store, TODAY - timedelta(days=offset))
+    assert store.streak(today=TODAY) == 3
+    assert store.streak(today=TODAY + timedelta(days=1)) == 0
+    # Asking about an earlier day ignores what came after it
+    assert store.streak(today=TODAY - timedelta(days=2)) == 2
+
+
+def test_rolling_totals_cover_their_window(store):
+    for offset, calories in [(0, 100), (6, 200), (7, 400), (29, 800), (30, 1600)]:
+        log(store, TODAY - timedelta(days=offset), calories)
+    summary = store.summary(today=TODAY)
+    assert summary["last_7_days"]["calories"] == 300
+    assert summary["last_30_days"] == {"workouts": 4, "duration": 120, "calories": 1500}
+    assert summary["last_workout_date"] == TODAY.isoformat()
+
+
+def test_random_adds_and_deletes_match_a_rebuild(store):
+    rng = random.Random(4)
+    ids = []
+    for _ in range(400):
+        if ids and rng.random() < 0.35:
+            store.delete(ids.pop(rng.randrange(len(ids))))
+        else:
+            day = TODAY - timedelta(days=rng.randrange(60))
+            ids.append(log(store, day, rng.randrange(100, 900), user_id=rng.choice(["a", "b"])))
+    for user_id in ("a", "b"):
+        incremental = (store.summary(user_id, TODAY), runs(store))
+        store.rebuild_summaries(user_id)
+        assert (store.summary(user_id, TODAY), runs(store)) == incremental
+
+
+def test_query_orders_newest_first_within_a_range(store):
+    for offset in range(10):
+        log(store, TODAY - timedelta(days=offset), calories=offset)
+    recent = store.query(limit=3)
+    assert [w["calories"] for w in recent] == [0, 1, 2]
+    window = store.query(limit=None, start_date="2024-06-22", end_date="2024-06-25T18:00:00Z")
+    assert [w["date"] for w in window] == ["2024-06-25", "2024-06-24", "2024-06-23", "2024-06-22"]
@@ -0,0 +1,64 @@
+# backend/weight_projection.py - Vectorized weight trajectories for many profiles (lose / maintain / gain)
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from formulas import (
+    KCAL_PER_KG, ACTIVITY_MULTIPLIERS, DEFAULT_ACTIVITY_MULTIPLIER, GOAL_DEFAULT_WEEKLY_KG, GOAL_SIGNS
+)
+
+
+def bmr_offsets(profiles: pd.DataFrame) -> np.ndarray:
+    """The weight-independent part of the Mifflin-St Jeor BMR: 6.25*height - 5*age + (5 | -161)"""
+    male = profiles["gender"].str.lower().eq("male").to_numpy()
+    return (
+        6.25 * profiles["height_cm"].to_numpy(dtype=np.float64)
+        - 5 * profiles["age"].to_numpy(dtype=np.float64)
+        + np.where(male, 5.0, -161.0)
+    )
+
+
+def activity_multipliers(profiles: pd.DataFrame) -> np.ndarray:
+    categories = list(ACTIVITY_MULTIPLIERS)
+    codes = pd.Categorical(profiles["activity_level"], categories=categories).codes
+    lookup = np.append([ACTIVITY_MULTIPLIERS[c] for c in categories], DEFAULT_ACTIVITY_MULTIPLIER)
+    return lookup[codes]
+
+
+def project_weights(profiles: pd.DataFrame, days: int, adaptive: bool = True) -> Dict[str, np.ndarray]:
+    """Daily weight trajectories (days + 1 points per profile, day 0 included) for every profile at once.
+
+    Calorie intake is fixed at the starting TDEE plus the surplus/deficit implied by the goal rate.
+    With adaptive=True the TDEE is recomputed from each day's weight, so loss or gain slows as weight
+    moves; the recurrence w[t+1] = w[t] + (intake - m*(10*w[t] + c)) / 7700 is solved in closed form.
+    With adaptive=False the weight changes linearly at the goal rate. Unknown goals are treated as maintain.
+    """
+    weight = profiles["weight_kg"].to_numpy(dtype=np.float64)
+    offset = bmr_offsets(profiles)
+    multiplier = activity_multipliers(profiles)
+    goal = profiles["goal_type"].str.strip().str.lower()
+    sign = goal.map(GOAL_SIGNS).fillna(0.0).to_numpy(dtype=np.float64)
+    weekly_kg = (
+        pd.to_numeric(profiles["weekly_rate_kg"], errors="coerce") if "weekly_rate_kg" in profiles
+        else pd.Series(np.nan, index=profiles.index)
+    ).fillna(goal.map(GOAL_DEFAULT_WEEKLY_KG)).fillna(0.0).to_numpy(dtype=np.float64)
+
+    bmr = 10 * weight + offset
+    tdee = bmr * multiplier
+    daily_change_kcal = sign * weekly_kg * KCAL_PER_KG / 7
+    intake = tdee + daily_change_kcal
+
+    t = np.arange(days + 1, dtype=np.float64)
+    if adaptive:
+        ratio = 1 - 10 * multiplier / KCAL_PER_KG
+        equilibrium = (intake / multiplier - offset) / 10
+        trajectory = equilibrium[:, None] + (weight - equilibrium)[:, None] * ratio[:, None] ** t
+    else:
+        trajectory = weight[:, None] + (daily_change_kcal / KCAL_PER_KG)[:, None] * t
+    return {
+        "bmr": bmr,
+        "tdee": tdee,
+        "daily_calories": intake,
+        "trajectory": trajectory.astype(np.float32),
+    }
@@ -0,0 +1,328 @@
+# backend/workout_store.py - Persistent, date-indexed workout log store (SQLite in WAL mode)
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_USER = "default"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workouts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    calories INTEGER NOT NULL,
+    exercises TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_workouts_user_date ON workouts (user_id, date, id);
+CREATE TABLE IF NOT EXISTS workout_days (
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    workouts INTEGER NOT NULL,
+    duration INTEGER NOT NULL,
+    calories INTEGER NOT NULL,
+    PRIMARY KEY (user_id, date)
+);
+CREATE TABLE IF NOT EXISTS streak_runs (
+    user_id TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (user_id, start_date)
+);
+CREATE INDEX IF NOT EXISTS idx_streak_runs_end ON streak_runs (user_id, end_date);
+CREATE INDEX IF NOT EXISTS idx_streak_runs_length ON streak_runs (user_id, length);
+"""
+
+ROLLING_WINDOWS = (7, 30)
+
+
+def normalize_workout_date(value: str) -> str:
+    """Accept YYYY-MM-DD or a full ISO timestamp and return the YYYY-MM-DD day"""
+    return date.fromisoformat(value[:10]).isoformat()
+
+
+class WorkoutStore:
+    """Workout logs in SQLite with a (user_id, date) index, so range and limit queries never scan"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        # Worker processes share the file; writers wait up to 30s for each other's locks
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30.0)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        if self._needs_rebuild():
+            self.rebuild_summaries()
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database write lock up front.
+
+        With several worker processes, a deferred transaction that reads and then writes can fail
+        outright when another process committed in between; BEGIN IMMEDIATE waits its turn instead.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            yield
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "date": row["date"],
+            "duration": row["duration"],
+            "calories": row["calories"],
+            "exercises": json.loads(row["exercises"]),
+        }
+
+    def _needs_rebuild(self) -> bool:
+        # Databases created before the summary tables existed have workouts but no day totals
+        has_workouts = self._conn.execute("SELECT 1 FROM workouts LIMIT 1").fetchone()
+        has_days = self._conn.execute("SELECT 1 FROM workout_days LIMIT 1").fetchone()
+        return bool(has_workouts) and not has_days
+
+    def _apply_to_day(self, user_id: str, day: str, workouts: int, duration: int, calories: int):
+        """Add (or, with negative values, remove) one workout's totals to its day and keep streak runs in step"""
+        row = self._conn.execute(
+            "SELECT workouts FROM workout_days WHERE user_id = ? AND date = ?", (user_id, day)
+        ).fetchone()
+        if row is None:
+            self._conn.execute(
+                "INSERT INTO workout_days (user_id, date, workouts, duration, calories) VALUES (?, ?, ?, ?, ?)",
+                (user_id, day, workouts, duration, calories)
+            )
+            self._add_streak_day(user_id, date.fromisoformat(day))
+        elif row["workouts"] + workouts <= 0:
+            self._conn.execute("DELETE FROM workout_days WHERE user_id = ? AND date = ?", (user_id, day))
+            self._remove_streak_day(user_id, date.fromisoformat(day))
+        else:
+            self._conn.execute(
+                "UPDATE workout_days SET workouts = workouts + ?, duration = duration + ?, calories = calories + ? "
+                "WHERE user_id = ? AND date = ?",
+                (workouts, duration, calories, user_id, day)
+            )
+
+    def _insert_run(self, user_id: str, start: date, end: date):
+        self._conn.execute(
+            "INSERT INTO streak_runs (user_id, start_date, end_date, length) VALUES (?, ?, ?, ?)",
+            (user_id, start.isoformat(), end.isoformat(), (end - start).days + 1)
+        )
+
+    def _add_streak_day(self, user_id: str, day: date):
+        """Merge a newly active day with the runs ending the day before and starting the day after"""
+        before = self._conn.execute(
+            "SELECT start_date FROM streak_runs WHERE user_id = ? AND end_date = ?",
+            (user_id, (day - timedelta(days=1)).isoformat())
+        ).fetchone()
+        after = self._conn.execute(
+            "SELECT end_date FROM streak_runs WHERE user_id = ? AND start_date = ?",
+            (user_id, (day + timedelta(days=1)).isoformat())
+        ).fetchone()
+        start, end = day, day
+        if before:
+            start = date.fromisoformat(before["start_date"])
+            self._conn.execute("DELETE FROM streak_runs WHERE user_id = ? AND start_date = ?", (user_id, before["start_date"]))
+        if after:
+            end = date.fromisoformat(after["end_date"])
+            self._conn.execute("DELETE FROM streak_runs WHERE user_id = ? AND start_date = ?", (user_id, (day + timedelta(days=1)).isoformat()))
+        self._insert_run(user_id, start, end)
+
+    def _remove_streak_day(self, user_id: str, day: date):
+        """Split the run containing a day that no longer has any workouts"""
+        run = self._conn.execute(
+            "SELECT start_date, end_date FROM streak_runs WHERE user_id = ? AND start_date <= ? ORDER BY start_date DESC LIMIT 1",
+            (user_id, day.isoformat())
+        ).fetchone()
+        if run is None or run["end_date"] < day.isoformat():
+            return
+        start, end = date.fromisoformat(run["start_date"]), date.fromisoformat(run["end_date"])
+        self._conn.execute("DELETE FROM streak_runs WHERE user_id = ? AND start_date = ?", (user_id, run["start_date"]))
+        if start < day:
+            self._insert_run(user_id, start, day - timedelta(days=1))
+        if day < end:
+            self._insert_run(user_id, day + timedelta(days=1), end)
+
+    def _insert(self, user_id: str, entry: Dict[str, Any], skip_duplicates: bool = False) -> Optional[int]:
+        values = (
+            user_id,
+            normalize_workout_date(entry["date"]),
+            int(entry["duration"]),
+            int(entry["calories"]),
+            json.dumps(entry.get("exercises") or {}, sort_keys=True),
+        )
+        if skip_duplicates:
+            exists = self._conn.execute(
+                "SELECT 1 FROM workouts WHERE user_id = ? AND date = ? AND duration = ? AND calories = ? AND exercises = ? LIMIT 1",
+                values
+            ).fetchone()
+            if exists:
+                return None
+        cursor = self._conn.execute(
+            "INSERT INTO workouts (user_id, date, duration, calories, exercises, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            values + (datetime.now().isoformat(),)
+        )
+        self._apply_to_day(user_id, values[1], 1, values[2], values[3])
+        return cursor.lastrowid
+
+    def add(self, entry: Dict[str, Any], user_id: str = DEFAULT_USER) -> Dict[str, Any]:
+        with self._transaction():
+            workout_id = self._insert(user_id, entry)
+        return self.get(workout_id, user_id)
+
+    def add_many(self, entries: Iterable[Dict[str, Any]], user_id: str = DEFAULT_USER, skip_duplicates: bool = True) -> int:
+        """Insert many workouts in one transaction; returns how many rows were added"""
+        added = 0
+        with self._transaction():
+            for entry in entries:
+                if self._insert(user_id, entry, skip_duplicates) is not None:
+                    added += 1
+        return added
+
+    def import_json(self, path: str, user_id: str = DEFAULT_USER) -> int:
+        """Bulk-import a workout_log.json style file, skipping entries that are already stored"""
+        with open(path, encoding='utf-8') as f:
+            return self.add_many(json.load(f), user_id)
+
+    def get(self, workout_id: int, user_id: str = DEFAULT_USER) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM workouts WHERE id = ? AND user_id = ?", (workout_id, user_id)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def delete(self, workout_id: int, user_id: str = DEFAULT_USER) -> Optional[Dict[str, Any]]:
+        """Delete a workout, returning the deleted row if it existed"""
+        with self._transaction():
+            workout = self.get(workout_id, user_id)
+            if workout is not None:
+                self._conn.execute("DELETE FROM workouts WHERE id = ? AND user_id = ?", (workout_id, user_id))
+                self._apply_to_day(user_id, workout["date"], -1, -workout["duration"], -workout["calories"])
+        return workout
+
+    def query(
+        self,
+        user_id: str = DEFAULT_USER,
+        limit: Optional[int] = 10,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Most recent workouts first, optionally within [start_date, end_date], via an index range scan"""
+        sql = "SELECT * FROM workouts WHERE user_id = ?"
+        params: List[Any] = [user_id]
+        if start_date:
+            sql += " AND date >= ?"
+            params.append(normalize_workout_date(start_date))
+        if end_date:
+            sql += " AND date <= ?"
+            params.append(normalize_workout_date(end_date))
+        sql += " ORDER BY date DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def streak(self, user_id: str = DEFAULT_USER, today: Optional[date] = None) -> int:
+        """Consecutive workout days ending today, or yesterday if there is no workout yet today"""
+        return self.summary(user_id, today)["current_streak"]
+
+    def summary(self, user_id: str = DEFAULT_USER, today: Optional[date] = None) -> Dict[str, Any]:
+        """Current/longest streak and rolling totals, read from the maintained summary tables.
+
+        Every lookup is an index seek or a range over at most 30 day rows, independent of history length.
+        """
+        today = today or date.today()
+        with self._lock:
+            run = self._conn.execute(
+                "SELECT start_date, end_date FROM streak_runs WHERE user_id = ? AND start_date <= ? ORDER BY start_date DESC LIMIT 1",
+                (user_id, today.isoformat())
+            ).fetchone()
+            longest = self._conn.execute(
+                "SELECT MAX(length) AS longest FROM streak_runs WHERE user_id = ?", (user_id,)
+            ).fetchone()["longest"]
+            last = self._conn.execute(
+                "SELECT MAX(date) AS last FROM workout_days WHERE user_id = ?", (user_id,)
+            ).fetchone()["last"]
+            rolling = {}
+            for days in ROLLING_WINDOWS:
+                totals = self._conn.execute(
+                    "SELECT COALESCE(SUM(workouts), 0) AS workouts, COALESCE(SUM(duration), 0) AS duration, "
+                    "COALESCE(SUM(calories), 0) AS calories FROM workout_days WHERE user_id = ? AND date BETWEEN ? AND ?",
+                    (user_id, (today - timedelta(days=days - 1)).isoformat(), today.isoformat())
+                ).fetchone()
+                rolling[f"last_{days}_days"] = dict(totals)
+
+        current = 0
+        if run is not None and run["end_date"] >= (today - timedelta(days=1)).isoformat():
+            end = min(date.fromisoformat(run["end_date"]), today)
+            current = (end - date.fromisoformat(run["start_date"])).days + 1
+        return {
+            "current_streak": current,
+            "longest_streak": longest or 0,
+            "last_workout_date": last,
+            **rolling,
+        }
+
+    def rebuild_summaries(self, user_id: Optional[str] = None) -> int:
+        """Recompute day totals and streak runs from the workout log; returns the number of active days"""
+        where, params = ("WHERE user_id = ?", (user_id,)) if user_id else ("", ())
+        with self._transaction():
+            self._conn.execute(f"DELETE FROM workout_days {where}", params)
+            self._conn.execute(f"DELETE FROM streak_runs {where}", params)
+            self._conn.execute(
+                "INSERT INTO workout_days (user_id, date, workouts, duration, calories) "
+                f"SELECT user_id, date, COUNT(*), SUM(duration), SUM(calories) FROM workouts {where} GROUP BY user_id, date",
+                params
+            )
+            rows = self._conn.execute(
+                f"SELECT user_id, date FROM workout_days {where} ORDER BY user_id, date", params
+            ).fetchall()
+            run_user, start, end = None, None, None
+            for row in rows:
+                day = date.fromisoformat(row["date"])
+                if row["user_id"] == run_user and day == end + timedelta(days=1):
+                    end = day
+                    continue
+                if run_user is not None:
+                    self._insert_run(run_user, start, end)
+                run_user, start, end = row["user_id"], day, day
+            if run_user is not None:
+                self._insert_run(run_user, start, end)
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+workout_store = WorkoutStore(os.getenv(
+    "WORKOUT_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "workouts.db")
+))
+
+
+if __name__ == "__main__":
+    # python workout_store.py import [path/to/workout_log.json] [user_id]
+    # python workout_store.py rebuild [user_id]
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "import":
+        source = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "workout_log.json")
+        user = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_USER
+        print(f"Imported {workout_store.import_json(source, user)} workouts from {source}")
+    elif command == "rebuild":
+        user = sys.argv[2] if len(sys.argv) > 2 else None
+        print(f"Rebuilt summaries for {workout_store.rebuild_summaries(user)} workout days")
+    else:
+        print("usage: python workout_store.py import [workout_log.json] [user_id] | rebuild [user_id]")
+        sys.exit(1)
@@ -3,6 +3,7 @@
 import axios from 'axios';
 import type {
   WorkoutEntry,
+  WorkoutSummary,
   WeightPredictionRequest,
   WeightPredictionResponse,
   CalorieCalculationRequest,
@@ -15,7 +16,8 @@ import type {
   RouteResponse,
   DataAnalysisResponse,
   PlotResponse,
-  PlotRequest
+  PlotRequest,
+  PlotSeriesResponse
 } from '../types';
 
 // Create axios instance with base configuration
@@ -57,10 +59,16 @@ export const workoutApi = {
   },
 
   // Get workout streak
-  getWorkoutStreak: async (): Promise<{ streak: number }> => {
+  getWorkoutStreak: async (): Promise<{ streak: number; longest_streak: number }> => {
     const response = await api.get('/workouts/streak');
     return response.data;
   },
+
+  // Get streaks and rolling 7/30-day totals
+  getWorkoutSummary: async (): Promise<WorkoutSummary> => {
+    const response = await api.get('/workouts/summary');
+    return response.data;
+  },
 };
 
 // Weight Prediction API
@@ -105,6 +113,14 @@ export const dataApi = {
     });
     return response.data;
   },
+
+  // Aggregated chart data for a previously uploaded dataset, drawn client-side
+  getPlotSeries: async (datasetId: string, plotConfig: PlotRequest): Promise<PlotSeriesResponse> => {
+    const response = await api.get('/plot-series', {
+      params: { dataset_id: datasetId, ...plotConfig },
+    });
+    return response.data;
+  },
 };
 
 // AI Integration API
@@ -130,6 +146,12 @@ export const aiApi = {
     const response = await api.post('/personalized-workout', request);
     return response.data;
   },
+
+  streamInsights: (request: AIInsightRequest, onToken: (token: string) => void): Promise<string> =>
+    streamCompletion('/ai-insights/stream', request, onToken),
+
+  streamPersonalizedWorkout: (request: PersonalizedWorkoutRequest, onToken: (token: string) => void): Promise<string> =>
+    streamCompletion('/personalized-workout/stream', request, onToken),
 };
 
 // Route Tracking API
@@ -155,6 +177,47 @@ export const routeApi = {
   },
 };
 
+// Stream an AI completion over server-sent events, calling onToken as tokens arrive
+export const streamCompletion = async (
+  path: string,
+  body: unknown,
+  onToken: (token: string) => void
+): Promise<string> => {
+  const response = await fetch(`${api.defaults.baseURL}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+  });
+  if (!response.ok || !response.body) {
+    const data = await response.json().catch(() => null);
+    throw new Error(data?.detail || `Request failed with status ${response.status}`);
+  }
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  let text = '';
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    const events = buffer.split('\n\n');
+    buffer = events.pop() || '';
+    for (const raw of events) {
+      const lines = raw.split('\n');
+      const event = lines.find(line => line.startsWith('event: '))?.slice(7);
+      const data = lines.find(line => line.startsWith('data: '))?.slice(6);
+      if (!event || !data) continue;
+      const payload = JSON.parse(data);
+      if (event === 'token') {
+        text += payload.token;
+        onToken(payload.token);
+      } else if (event === 'error') {
+        throw new Error(payload.detail);
+      }
+    }
+  }
+  return text;
+};
+
 // Health Check API
 export const healthApi = {
   checkHealth: async (): Promise<{ status: string; timestamp: string }> => {
@@ -14,6 +14,7 @@ const statModes = [
   'Sum',
   'Mean',
   'Median',
+  'Mode',
 ];
 
 const AnalyticsInfoBox: React.FC = () => (
@@ -43,6 +44,7 @@ const Modal: React.FC<{ open: boolean; onClose: () => void; children: React.Reac
 
 const Analytics: React.FC = () => {
   const [file, setFile] = useState<File | null>(null);
+  const [datasetId, setDatasetId] = useState<string | null>(null);
   const [columns, setColumns] = useState<string[]>([]);
   const [xAxis, setXAxis] = useState('');
   const [yAxis, setYAxis] = useState('');
@@ -56,11 +58,13 @@ const Analytics: React.FC = () => {
 
   // Step 1: Read columns from CSV
   const handleFileChange = async (e: React.ChangeEvent<HTMLInputElement>) => {
+    if (plotUrl) URL.revokeObjectURL(plotUrl);
     setPlotUrl(null);
     setError('');
     if (e.target.files && e.target.files[0]) {
       const selectedFile = e.target.files[0];
       setFile(selectedFile);
+      setDatasetId(null);
       // Fetch columns from backend
       const formData = new FormData();
       formData.append('file', selectedFile);
@@ -72,6 +76,7 @@ const Analytics: React.FC = () => {
           { headers: { 'Content-Type': 'multipart/form-data' } }
         );
         setColumns(res.data.column_names || []);
+        setDatasetId(res.data.dataset_id || null);
         setXAxis('');
         setYAxis('');
       } catch (err) {
@@ -86,29 +91,49 @@ const Analytics: React.FC = () => {
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     setError('');
+    if (plotUrl) URL.revokeObjectURL(plotUrl);
     setPlotUrl(null);
     if (!file || !xAxis || !yAxis) {
       setError('Please select a file and both axes.');
       return;
     }
-    const formData = new FormData();
-    formData.append('file', file);
-    formData.append(
-      'plot_config',
-      JSON.stringify({ x_axis: xAxis, y_axis: yAxis, graph_type: graphType, legend_attr: legend, stat_mode: statMode })
-    );
-    try {
-      setLoading(true);
-      const res = await axios.post(
-        'http://localhost:8000/api/generate-plot',
+    const plotConfig = { x_axis: xAxis, y_axis: yAxis, graph_type: graphType, legend_attr: legend, stat_mode: statMode, format: 'webp' };
+    // Re-send the file only when there is no dataset_id or the server evicted it
+    const postPlot = () => {
+      const formData = new FormData();
+      formData.append('file', file);
+      formData.append('plot_config', JSON.stringify(plotConfig));
+      return axios.post(
+        'http://localhost:8000/api/generate-plot/image',
         formData,
-        { headers: { 'Content-Type': 'multipart/form-data' } }
+        { headers: { 'Content-Type': 'multipart/form-data' }, responseType: 'blob' }
       );
-      setPlotUrl(res.data.plot);
+    };
+    try {
+      setLoading(true);
+      let res;
+      if (datasetId) {
+        try {
+          // GET lets the browser revalidate a previously rendered plot via its ETag
+          res = await axios.get('http://localhost:8000/api/generate-plot/image', {
+            params: { dataset_id: datasetId, ...plotConfig },
+            responseType: 'blob',
+          });
+        } catch (err: any) {
+          if (err.response?.status !== 404) throw err;
+          res = await postPlot();
+        }
+      } else {
+        res = await postPlot();
+      }
+      // Raw image bytes instead of a base64 data URL: a third smaller and never parsed as JSON
+      setPlotUrl(URL.createObjectURL(res.data));
       setModalOpen(true);
     } catch (err: any) {
-      if (err.response && err.response.data && err.response.data.detail) {
-        setError(err.response.data.detail);
+      // Error bodies arrive as blobs too, since the request asked for one
+      const data = err.response?.data instanceof Blob ? await err.response.data.text().then(JSON.parse).catch(() => null) : err.response?.data;
+      if (data && data.detail) {
+        setError(data.detail);
       } else {
         setError('Failed to generate plot.');
       }
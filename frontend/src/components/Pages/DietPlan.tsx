@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import axios from 'axios';
+import { streamCompletion } from '../../Services/api';
 import './DietPlan.css';
 import type { UserProfile } from '../../Services/profileService';
 import { saveDietPlan, fetchDietPlans, deleteDietPlan, type DietPlanEntry } from '../../Services/dietPlanService';
@@ -128,7 +128,9 @@ const DietPlan: React.FC<DietPlanProps> = ({ profile }) => {
     setResult(null);
     setLoading(true);
     try {
-      const res = await axios.post('http://localhost:8000/api/generate-diet-plan', {
+      // Stream the plan so it shows up as the model writes it
+      let dietPlan = '';
+      await streamCompletion('/generate-diet-plan/stream', {
         ...form,
         age: Number(form.age),
         height_cm: Number(form.height_cm),
@@ -136,11 +138,13 @@ const DietPlan: React.FC<DietPlanProps> = ({ profile }) => {
         target_weight: form.target_weight ? Number(form.target_weight) : undefined,
         timeline_weeks: Number(form.timeline_weeks),
         meal_frequency: Number(form.meal_frequency),
+      }, (token) => {
+        dietPlan += token;
+        setResult({ diet_plan: dietPlan });
+        setModalOpen(true);
       });
-      setResult(res.data);
-      setModalOpen(true);
     } catch (err: any) {
-      setError(err.response?.data?.detail || 'Failed to generate diet plan.');
+      setError(err.message || 'Failed to generate diet plan.');
     } finally {
       setLoading(false);
     }
@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useCallback } from 'react';
-import axios from 'axios';
+import { streamCompletion } from '../../Services/api';
 import './PersonalizedWorkout.css';
 import type { UserProfile } from '../../Services/profileService';
 import {
@@ -93,7 +93,9 @@ const PersonalizedWorkout: React.FC<PersonalizedWorkoutProps> = ({ profile }) =>
     const decision = Number(form.target_weight) < Number(form.current_weight) ? 'Loose Weight' : 'Gain Weight';
     try {
       setLoading(true);
-      const res = await axios.post('http://localhost:8000/api/personalized-workout', {
+      // Stream the plan into the save dialog's preview as the model writes it
+      let plan = '';
+      await streamCompletion('/personalized-workout/stream', {
         decision,
         current_weight: Number(form.current_weight),
         aim,
@@ -106,11 +108,14 @@ const PersonalizedWorkout: React.FC<PersonalizedWorkoutProps> = ({ profile }) =>
         injuries: form.injuries,
         gender: form.gender,
         age: Number(form.age),
+      }, (token) => {
+        plan += token;
+        setResult(plan);
+        setSaveModal(true); // Prompt for name and save
       });
-      setResult(res.data.workout_plan || 'No plan generated.');
-      setSaveModal(true); // Prompt for name and save
+      if (!plan) setResult('No plan generated.');
     } catch (err: any) {
-      let msg = 'Failed to generate workout plan.';
+      let msg = err.message || 'Failed to generate workout plan.';
       if (err.response?.data?.detail) {
         if (Array.isArray(err.response.data.detail)) {
           msg = err.response.data.detail.map((e: any) => e.msg).join('; ');
@@ -320,7 +325,7 @@ const PersonalizedWorkout: React.FC<PersonalizedWorkoutProps> = ({ profile }) =>
               className="pw-form-input"
               autoFocus
             />
-            <button className="pw-form-btn" style={{width:'100%',marginBottom:8}} onClick={handleSavePlan} disabled={saveLoading}>
+            <button className="pw-form-btn" style={{width:'100%',marginBottom:8}} onClick={handleSavePlan} disabled={saveLoading || loading}>
               {saveLoading ? 'Saving...' : 'Save Plan'}
             </button>
             {saveError && <div className="pw-error-message">{saveError}</div>}
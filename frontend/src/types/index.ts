@@ -5,6 +5,20 @@ export interface WorkoutEntry {
   exercises: Record<string, any>;
 }
 
+export interface WorkoutTotals {
+  workouts: number;
+  duration: number;
+  calories: number;
+}
+
+export interface WorkoutSummary {
+  current_streak: number;
+  longest_streak: number;
+  last_workout_date: string | null;
+  last_7_days: WorkoutTotals;
+  last_30_days: WorkoutTotals;
+}
+
 export interface UserProfile {
   age: number;
   height_cm: number;
@@ -77,6 +91,9 @@ export interface PlotRequest {
   graph_type: "Line" | "Scatter" | "Bar" | "Histogram" | "Box";
   legend_attr?: string;
   stat_mode?: "Sum" | "Mean" | "Median" | "Mode";
+  max_points?: number; // Line/Scatter points per series before downsampling, 0 disables
+  format?: "png" | "webp" | "svg";
+  dpi?: number; // 50-300, raster formats only
 }
 
 export interface PersonalizedWorkoutRequest {
@@ -90,6 +107,8 @@ export interface PersonalizedWorkoutRequest {
   workout_type: string;
   fitness_level: string;
   injuries?: string;
+  gender: string;
+  age: number;
 }
 
 export interface PersonalizedWorkoutResponse {
@@ -97,6 +116,8 @@ export interface PersonalizedWorkoutResponse {
 }
 
 export interface DataAnalysisResponse {
+  // Absent for large uploads that were only profiled, not stored
+  dataset_id?: string;
   rows: number;
   columns: number;
   column_names: string[];
@@ -110,6 +131,36 @@ export interface PlotResponse {
   plot: string; // base64 encoded image
 }
 
+export interface PlotSeries {
+  name: string;
+  x?: (string | number)[];
+  y?: (number | null)[];
+  counts?: number[]; // Histogram bins, or rows per grid cell for a binned Scatter
+  original_points?: number; // set when the series was downsampled
+}
+
+export interface PlotSeriesResponse {
+  dataset_id: string;
+  graph_type: PlotRequest["graph_type"];
+  x_axis: string;
+  y_axis: string;
+  legend_attr: string | null;
+  stat_mode: NonNullable<PlotRequest["stat_mode"]>;
+  series?: PlotSeries[]; // Line, Scatter, Bar and Histogram
+  downsampling?: "lttb" | "grid" | null; // Line, Scatter and Bar
+  bin_edges?: number[]; // Histogram
+  box?: {
+    label: string;
+    q1: number;
+    med: number;
+    q3: number;
+    mean: number;
+    whislo: number;
+    whishi: number;
+    fliers: number[];
+  };
+}
+
 export interface RouteResponse {
   points: RoutePoint[];
   distance_km: number;